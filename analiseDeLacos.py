@@ -0,0 +1,154 @@
+# for (var i = a; i < b; i = i + k) pode virar `for i in range(a, b, k)` quando
+# b e k não mudam durante o laço, o corpo nunca escreve em i e ninguém lê i
+# depois do laço (o for do Python deixa i em b - k, não em b). O resto continua
+# sendo traduzido para while. a, b e k precisam ser inteiros (range() não
+# aceita float): literais inteiros, .length e + - * entre eles, e nomes que
+# a inferência de tipos (inferenciaDeTipos.py) provou inteiros.
+COMPARISONS = {'<': (1, 0), '<=': (1, 1), '>': (-1, 0), '>=': (-1, -1)}
+BUILTINS = ('console.log', 'prompt')
+# Operadores que mantêm o resultado inteiro
+INTEGER_OPERATORS = ('+', '-', '*')
+
+class LacoContado:
+    # range(start, stop + offset, step); start e stop são nós do AST
+    __slots__ = ('variable', 'start', 'stop', 'offset', 'step')
+
+    def __init__(self, variable, start, stop, offset, step):
+        self.variable = variable
+        self.start = start
+        self.stop = stop
+        self.offset = offset
+        self.step = step
+
+def find_counted_loops(ast, outside_names=(), types=None):
+    # outside_names são os nomes lidos fora de laços em outras partes do
+    # programa, quando ast é só um trecho dele. types: um TiposInferidos;
+    # sem ele nenhum nome conta como inteiro
+    candidates, free_names = loop_reads(ast)
+    counted = {}
+    for node in candidates:
+        loop = counted_loop(node, types)
+        if loop is not None and loop.variable not in free_names and loop.variable not in outside_names:
+            counted[node] = loop
+    return counted
+
+def loop_reads(ast):
+    # Uma passada com pilha explícita sobre a árvore toda, guardando os nomes
+    # inicializados pelos for que envolvem o nó atual. Uma leitura fora de
+    # qualquer for que inicialize aquele nome (ou dentro de uma função) impede
+    # a troca por range nos laços daquele nome. Tuplas na pilha marcam onde o
+    # conjunto de nomes muda. Devolve os for candidatos e esses nomes.
+    free_names = set()
+    candidates = []
+    loops = ()
+    stack = [ast]
+    while stack:
+        node = stack.pop()
+        if node.__class__ is tuple:
+            loops = node[0]
+            continue
+        type = node.type
+        if type == 'Identifier':
+            if node.value not in loops:
+                free_names.add(node.value)
+        elif type == 'FunctionDeclaration':
+            stack.append((loops,))
+            stack.append(node.children[2])
+            stack.append(((),))
+        elif type == 'ForStatement' and len(node.children) == 4:
+            init, test, update, body = node.children
+            if init.type == 'VarDeclaration' and len(init.children) == 2:
+                variable, value = init.children
+                if variable.value not in loops:
+                    candidates.append(node)
+                stack.append((loops,))
+                stack.extend((body, update, test))
+                stack.append((loops + (variable.value,),))
+                stack.append(value)
+            else:
+                stack.extend(node.children)
+        else:
+            stack.extend(node.children)
+    return candidates, free_names
+
+def counted_loop(node, types=None):
+    init, test, update, body = node.children
+    variable, start = init.children
+    name = variable.value
+    if test.type != 'BinaryExpression' or test.value not in COMPARISONS:
+        return None
+    counter, stop = test.children
+    if counter.type != 'Identifier' or counter.value != name:
+        return None
+    step = loop_step(update, name)
+    direction, offset = COMPARISONS[test.value]
+    if step is None or step * direction <= 0:
+        return None
+    if integer_names(start, types) is None:
+        return None
+    stop_names = integer_names(stop, types)
+    if stop_names is None or name in stop_names:
+        return None
+    written, calls = body_effects(body)
+    if written is None or name in written or stop_names & written or (stop_names and calls):
+        return None
+    return LacoContado(name, start, stop, offset, step)
+
+def loop_step(update, name):
+    # i = i + k, i = k + i ou i = i - k, com k inteiro
+    if update.type != 'AssignmentExpression':
+        return None
+    target, value = update.children
+    if target.type != 'Identifier' or target.value != name or value.type != 'BinaryExpression':
+        return None
+    left, right = value.children
+    if value.value == '+' and right.type == 'Identifier' and left.type == 'Number':
+        left, right = right, left
+    if left.type != 'Identifier' or left.value != name or right.type != 'Number' or \
+            right.value.__class__ is not int:
+        return None
+    return right.value if value.value == '+' else -right.value if value.value == '-' else None
+
+def integer_names(node, types=None):
+    # Nomes lidos por uma expressão inteira (literais inteiros, variáveis
+    # provadas inteiras, .length e + - *); None se a expressão tiver
+    # qualquer outra coisa. O otimizador pode ter dobrado 5 / 2 em 2.5
+    names = set()
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        type = node.type
+        if type == 'Number':
+            if node.value.__class__ is not int:
+                return None
+        elif type == 'Identifier':
+            if types is None or not types.integer(node):
+                return None
+            names.add(node.value)
+        elif type == 'PropertyAccess' and node.value == 'length' and node.children[0].type == 'Identifier':
+            names.add(node.children[0].value)
+        elif type == 'BinaryExpression' and node.value in INTEGER_OPERATORS:
+            stack.extend(node.children)
+        else:
+            return None
+    return names
+
+def body_effects(body):
+    # Nomes escritos no corpo e se ele chama funções do usuário (que podem
+    # mudar o limite por fora); None se o corpo declara funções
+    written = set()
+    calls = False
+    stack = [body]
+    while stack:
+        node = stack.pop()
+        type = node.type
+        if type == 'FunctionDeclaration':
+            return None, True
+        if type in ('VarDeclaration', 'AssignmentExpression'):
+            target = node.children[0]
+            if target.type == 'Identifier':
+                written.add(target.value)
+        elif type == 'FunctionCall' and node.value not in BUILTINS:
+            calls = True
+        stack.extend(node.children)
+    return written, calls
@@ -1,5 +1,29 @@
+import os
+import re
+
 import ply.lex as lex
 
+reserved = {
+    word: word.upper()
+    for word in ('var', 'const', 'let', 'for', 'while', 'break', 'continue', 'if', 'else',
+                 'function', 'return', 'prompt', 'true', 'false')
+}
+
+# Caracteres que não começam nenhum token: com diagnósticos, um erro léxico
+# pula a sequência inteira e gera um só registro
+ILLEGAL_RUN = re.compile(r'[^ \t\na-zA-Z0-9_"+\-*/(){}\[\];=,.<>!&|]+')
+
+def report_illegal(diagnostics, text, position, lineno):
+    # Devolve quantos caracteres pular
+    match = ILLEGAL_RUN.match(text, position)
+    length = match.end() - position if match else 1
+    if length == 1:
+        message = f"Caractere ilegal '{text[position]}'"
+    else:
+        message = f"Caracteres ilegais '{text[position:position + length]}'"
+    diagnostics.report('JS101', message, lineno, position)
+    return length
+
 class AnalisadorLexicoJS:
     tokens = (
         'NUMBER', 'PLUS', 'MINUS', 'TIMES', 'DIVIDE',
@@ -44,44 +68,8 @@ class AnalisadorLexicoJS:
         t.value = int(t.value)
         return t
 
-    def t_FOR(self, t):
-        r'for'
-        return t
-
-    def t_WHILE(self, t):
-        r'while'
-        return t
-
-    def t_BREAK(self, t):
-        r'break'
-        return t
-
-    def t_CONTINUE(self, t):
-        r'continue'
-        return t
-
-    def t_IF(self, t):
-        r'if'
-        return t
-
-    def t_ELSE(self, t):
-        r'else'
-        return t
-
-    def t_FUNCTION(self, t):
-        r'function'
-        return t
-
-    def t_RETURN(self, t):
-        r'return'
-        return t
-
     def t_CONSOLE_LOG(self, t):
-        r'console\.log'
-        return t
-
-    def t_PROMPT(self, t):
-        r'prompt'
+        r'console\.log(?![a-zA-Z_0-9])'
         return t
 
     def t_STRING(self, t):
@@ -91,8 +79,9 @@ class AnalisadorLexicoJS:
 
     def t_IDENTIFIER(self, t):
         r'[a-zA-Z_][a-zA-Z_0-9]*'
-        if t.value in ('var', 'const', 'let', 'for', 'while', 'break', 'continue', 'if', 'else', 'function', 'return', 'true', 'false'):
-            t.type = t.value.upper()
+        # Palavras reservadas são resolvidas aqui para que identificadores como
+        # 'format' ou 'iffy' não sejam quebrados em FOR/IF + IDENTIFIER
+        t.type = reserved.get(t.value, 'IDENTIFIER')
         return t
 
     t_ignore = ' \t'
@@ -102,19 +91,53 @@ class AnalisadorLexicoJS:
         t.lexer.lineno += len(t.value)
 
     def t_error(self, t):
-        print(f"Illegal character '{t.value[0]}'")
-        t.lexer.skip(1)
+        if self.diagnostics is None:
+            print(f"Illegal character '{t.value[0]}'")
+            t.lexer.skip(1)
+        else:
+            t.lexer.skip(report_illegal(self.diagnostics, t.lexer.lexdata, t.lexpos, t.lineno))
 
-    def __init__(self):
-        self.lexer = lex.lex(module=self)
+    _lexer_base = None
+    diagnostics = None
 
-    def tokenize(self, code):
+    def __init__(self):
+        # Clona o lexer base em vez de refletir sobre as regras t_* a cada instância
+        self.lexer = self.build_lexer().clone(self)
+        self.lexer.begin('INITIAL')
+
+    @classmethod
+    def build_lexer(cls, optimize=False, lextab='jslextab', outputdir=None):
+        # Constrói o lexer PLY uma única vez por processo. Com optimize=True o PLY
+        # grava (e reaproveita nas próximas execuções) a tabela em lextab.
+        lexer_base = cls.__dict__.get('_lexer_base')
+        if lexer_base is None:
+            if outputdir is None:
+                outputdir = os.path.dirname(os.path.abspath(__file__))
+            lexer_base = lex.lex(module=object.__new__(cls), optimize=optimize,
+                                 lextab=lextab, outputdir=outputdir)
+            cls._lexer_base = lexer_base
+        return lexer_base
+
+    def iter_tokens(self, code, diagnostics=None):
+        # Com um Diagnosticos (diagnosticos.py), erros léxicos são registrados
+        # nele em vez de impressos
+        self.diagnostics = diagnostics
         self.lexer.input(code)
-        tokens = []
+        self.lexer.lineno = 1
         while True:
             tok = self.lexer.token()
             if not tok:
-                break
-            tokens.append(tok)
-        return tokens
+                return
+            yield tok
 
+    def tokenize(self, code):
+        return list(self.iter_tokens(code))
+
+def create_lexer(backend='ply'):
+    # 'ply' é o AnalisadorLexicoJS; 'scanner' é o ScannerJS escrito à mão
+    if backend == 'ply':
+        return AnalisadorLexicoJS()
+    if backend == 'scanner':
+        from scannerJS import ScannerJS
+        return ScannerJS()
+    raise ValueError(f"Backend léxico desconhecido: {backend}")
@@ -0,0 +1,88 @@
+import codecs
+import io
+import mmap
+import re
+
+from analiseLexica import AnalisadorLexicoJS, create_lexer
+
+# Análise léxica de arquivos grandes sem ler o arquivo inteiro numa str: o
+# arquivo é mapeado com mmap e decodificado em blocos de CHUNK_BYTES (com a
+# mesma tradução de fim de linha de open()), e cada janela de texto é passada
+# ao analisador léxico escolhido até o último ponto de corte seguro. O resto
+# da janela volta para a próxima junto com o bloco seguinte.
+#
+# Um ponto de corte seguro fica logo depois de um caractere que sempre
+# termina um token (;  ,  (  )  {  }  [  ]  quebra de linha) ou de uma string
+# completa, e nunca dentro de uma string: elas podem ter quebras de linha e
+# qualquer um desses caracteres. Uma aspa sem fechamento dentro da janela
+# pode fechar num bloco seguinte, então o corte fica antes dela. Os tokens
+# saem com lineno e lexpos (posição no texto todo) iguais aos da análise do
+# arquivo inteiro em memória.
+CHUNK_BYTES = 1024 * 1024
+BOUNDARIES = ';,(){}[]\n'
+STRING = re.compile(AnalisadorLexicoJS.t_STRING.__doc__)
+
+def safe_cut(text):
+    # Maior posição de text em que a análise pode parar e recomeçar; 0
+    # quando não há nenhuma
+    string_end = 0
+    position = text.find('"')
+    while position >= 0:
+        match = STRING.match(text, position)
+        if match is None:
+            break
+        string_end = match.end()
+        position = text.find('"', string_end)
+    limit = position if position >= 0 else len(text)
+    cut = max(text.rfind(char, string_end, limit) for char in BOUNDARIES) + 1
+    return cut or string_end
+
+def iter_chunks(path, chunk_bytes=CHUNK_BYTES, encoding='utf-8'):
+    # Texto do arquivo em pedaços; só um bloco de bytes e seu texto existem
+    # por vez, fora as páginas do mmap, que o sistema descarta quando quiser
+    with open(path, 'rb') as input_file:
+        try:
+            mapping = mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Arquivo vazio: não há o que mapear
+            return
+    with mapping:
+        decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder(encoding)(), translate=True)
+        size = len(mapping)
+        for start in range(0, size, chunk_bytes):
+            end = min(start + chunk_bytes, size)
+            text = decoder.decode(mapping[start:end], final=end == size)
+            if text:
+                yield text
+
+def iter_windows(path, chunk_bytes=CHUNK_BYTES, encoding='utf-8'):
+    # Texto do arquivo cortado só em pontos seguros
+    pending = ''
+    for text in iter_chunks(path, chunk_bytes, encoding):
+        window = pending + text
+        cut = safe_cut(window)
+        if cut:
+            yield window[:cut]
+            pending = window[cut:]
+        else:
+            pending = window
+    if pending:
+        yield pending
+
+def iter_file_tokens(path, tokenizer=None, chunk_bytes=CHUNK_BYTES, encoding='utf-8', diagnostics=None):
+    if tokenizer is None:
+        tokenizer = create_lexer('ply')
+    lines = 0
+    position = 0
+    for window in iter_windows(path, chunk_bytes, encoding):
+        window_diagnostics = None if diagnostics is None else diagnostics.shifted(lines, position)
+        # Quebras de linha dentro de strings não contam em lineno
+        inside_strings = 0
+        for token in tokenizer.iter_tokens(window, window_diagnostics):
+            token.lineno += lines
+            token.lexpos += position
+            if token.type == 'STRING':
+                inside_strings += token.value.count('\n')
+            yield token
+        lines += window.count('\n') - inside_strings
+        position += len(window)
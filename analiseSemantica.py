@@ -1,14 +1,39 @@
-class AnalisadorSemanticoJS:
-    def __init__(self, ast):
+from tabelaDeSimbolos import TabelaDeSimbolos
+from visitanteAST import VisitanteAST
+
+BUILTINS = (
+    ('input', 'builtin', []),
+    ('console.log', 'builtin', None),  # Permite múltiplos argumentos
+    ('prompt', 'builtin', ['message']),
+    ('true', 'builtin', None),
+    ('false', 'builtin', None),
+)
+# Propriedades que a geração de código sabe traduzir
+PROPERTIES = ('length',)
+
+class AnalisadorSemanticoJS(VisitanteAST):
+    # Escopos: programa e funções (var, function e parâmetros), blocos e for
+    # (let e const). Funções são declaradas no início do escopo em que estão,
+    # como no JS, e seus corpos são analisados quando esse escopo termina,
+    # já vendo tudo o que ele declara. Cada Identifier resolvido guarda em
+    # binding o (profundidade, slot) do símbolo. Com um Diagnosticos, cada
+    # erro também é registrado nele com código e linha.
+    #
+    # O Python não tem escopo de bloco: um let/const num bloco que sombreia
+    # uma variável visível ganha outro nome (nome_slot), escrito no value da
+    # declaração e de cada Identifier que a resolve, e o resto do pipeline
+    # já vê nomes distintos. O nome novo evita os nomes visíveis e os usados
+    # na função atual (no nível superior, os de fora de funções).
+    def __init__(self, ast, diagnostics=None):
         self.ast = ast
-        self.symbol_table = {
-            'input': {'type': 'function', 'params': []},
-            'console.log': {'type': 'function', 'params': None},  # Permite múltiplos argumentos
-            'prompt': {'type': 'function', 'params': ['message']},
-            'true': {'type': 'boolean'},
-            'false': {'type': 'boolean'}
-        }
+        self.diagnostics = diagnostics
+        self.symbol_table = TabelaDeSimbolos()
+        for name, kind, params in BUILTINS:
+            self.symbol_table.declare(name, kind, True, params)
         self.errors = []
+        self.unsupported = 0  # construções que a geração de código não traduz
+        self.function = None  # FunctionDeclaration cujo corpo está sendo analisado
+        self.used_names = {}  # função (None no nível superior) -> nomes usados nela
 
     def analyze(self):
         self.visit(self.ast)
@@ -18,81 +43,156 @@ class AnalisadorSemanticoJS:
         else:
             print("Análise Semântica concluída sem erros.")
 
-    def visit(self, node):
-        method_name = f'visit_{node.type}'
-        visitor = getattr(self, method_name, self.generic_visit)
-        return visitor(node)
+    def error(self, code, message, node):
+        self.errors.append(message)
+        if self.diagnostics is not None:
+            self.diagnostics.report(code, message, node.lineno, node.position)
+
+    def statements(self, statements):
+        for statement in statements:
+            if statement.type == 'FunctionDeclaration':
+                identifier, params, _ = statement.children
+                symbol = self.symbol_table.declare(
+                    identifier.value, 'function', True, [param.value for param in params.children])
+                if symbol is None:
+                    self.error('JS301', f"Função '{identifier.value}' já declarada.", identifier)
+        for statement in statements:
+            yield statement
+
+    def close_scope(self):
+        # Corpos de função pendentes; um corpo pode declarar novas funções,
+        # que ficam pendentes no escopo dele
+        scope = self.symbol_table.scope
+        while scope.pending:
+            yield from self.function_body(scope.pending.pop(0))
+        self.symbol_table.exit()
 
-    def generic_visit(self, node):
-        for child in node.children:
-            self.visit(child)
+    def function_body(self, node):
+        _, params, body = node.children
+        outer = self.function
+        self.function = node
+        self.symbol_table.enter(function=True)
+        for param in params.children:
+            symbol = self.symbol_table.declare(param.value, 'param', True)
+            if symbol is None:
+                self.error('JS302', f"Parâmetro '{param.value}' repetido.", param)
+            else:
+                param.binding = symbol.binding
+        yield from self.statements(body.children)
+        yield from self.close_scope()
+        self.function = outer
+
+    def names_in(self, function):
+        # Nomes lidos, escritos ou chamados dentro da função, ou fora de
+        # qualquer função quando function é None
+        names = self.used_names.get(function)
+        if names is None:
+            names = self.used_names[function] = set()
+            stack = [self.ast if function is None else function]
+            while stack:
+                node = stack.pop()
+                if node.type in ('Identifier', 'FunctionCall'):
+                    names.add(node.value)
+                if node.type == 'FunctionDeclaration' and function is None:
+                    names.add(node.children[0].value)
+                    continue
+                stack.extend(node.children)
+        return names
+
+    def shadowing_name(self, name, binding):
+        names = self.names_in(self.function)
+        visible = self.symbol_table.visible_names()
+        candidate = f"{name}_{binding[1]}"
+        while candidate in names or candidate in visible:
+            candidate += '_'
+        names.add(candidate)
+        return candidate
+
+    def bind(self, identifier, symbol):
+        identifier.binding = symbol.binding
+        if symbol.name is not None:
+            identifier.value = symbol.name
 
     def visit_Program(self, node):
-        self.generic_visit(node)
+        yield from self.statements(node.children)
+        scope = self.symbol_table.scope
+        while scope.pending:
+            yield from self.function_body(scope.pending.pop(0))
+
+    def visit_Block(self, node):
+        self.symbol_table.enter()
+        yield from self.statements(node.children)
+        yield from self.close_scope()
 
     def visit_VarDeclaration(self, node):
         identifier = node.children[0]
-        if identifier.value in self.symbol_table:
-            self.errors.append(f"Variável '{identifier.value}' já declarada.")
-        else:
-            self.symbol_table[identifier.value] = {'type': 'variable', 'initialized': False}
+        table = self.symbol_table
+        shadowed = None
+        if node.kind != 'var' and table.scope.function is not table.scope:
+            shadowed = table.resolve(identifier.value)
+        symbol = table.declare(identifier.value, node.kind)
+        if symbol is None:
+            self.error('JS303', f"Variável '{identifier.value}' já declarada.", identifier)
+            symbol = table.resolve(identifier.value)
+        elif shadowed is not None and shadowed.kind != 'builtin':
+            symbol.name = self.shadowing_name(identifier.value, symbol.binding)
+        self.bind(identifier, symbol)
         if len(node.children) > 1:
-            self.visit(node.children[1])
-            self.symbol_table[identifier.value]['initialized'] = True
+            yield node.children[1]
+            symbol.initialized = True
 
     def visit_FunctionDeclaration(self, node):
         identifier = node.children[0]
-        if identifier.value in self.symbol_table:
-            self.errors.append(f"Função '{identifier.value}' já declarada.")
-        else:
-            self.symbol_table[identifier.value] = {'type': 'function', 'params': [], 'body': node.children[2]}
-        params_node = node.children[1]
-        for param in params_node.children:
-            self.symbol_table[identifier.value]['params'].append(param.value)
+        symbol = self.symbol_table.resolve(identifier.value)
+        if symbol is not None:
+            identifier.binding = symbol.binding
+        self.symbol_table.scope.pending.append(node)
 
     def visit_FunctionCall(self, node):
         identifier = node.value
-        if identifier not in self.symbol_table or self.symbol_table[identifier]['type'] != 'function':
-            self.errors.append(f"Chamada a função não declarada '{identifier}'.")
+        symbol = self.symbol_table.resolve(identifier)
+        if symbol is None or symbol.kind not in ('function', 'builtin') or (
+                symbol.kind == 'builtin' and identifier in ('true', 'false')):
+            self.error('JS304', f"Chamada a função não declarada '{identifier}'.", node)
         else:
             params_count = len(node.children)
-            if self.symbol_table[identifier]['params'] is not None and params_count != len(self.symbol_table[identifier]['params']):
-                self.errors.append(f"Função '{identifier}' chamada com número incorreto de argumentos.")
+            if symbol.params is not None and params_count != len(symbol.params):
+                self.error('JS305', f"Função '{identifier}' chamada com número incorreto de argumentos.", node)
+        yield from self.generic_visit(node)
+
+    def visit_PropertyAccess(self, node):
+        if node.value not in PROPERTIES:
+            self.unsupported += 1
+            self.error('JS309', f"Propriedade não suportada: {node.value}", node)
+        yield node.children[0]
 
     def visit_Identifier(self, node):
-        if node.value not in self.symbol_table:
-            self.errors.append(f"Uso de variável não declarada '{node.value}'.")
-        else:
-            if not self.symbol_table[node.value]['initialized']:
-                self.errors.append(f"Uso de variável não inicializada '{node.value}'.")
+        symbol = self.symbol_table.resolve(node.value)
+        if symbol is None:
+            self.error('JS306', f"Uso de variável não declarada '{node.value}'.", node)
+            return
+        # Leituras de variáveis de outra função acontecem quando ela for
+        # chamada; só o que é da função atual é conferido
+        if not symbol.initialized and symbol.binding[0] == self.symbol_table.depth:
+            self.error('JS307', f"Uso de variável não inicializada '{node.value}'.", node)
+        self.bind(node, symbol)
 
     def visit_AssignmentExpression(self, node):
         identifier = node.children[0]
-        if identifier.value not in self.symbol_table:
-            self.errors.append(f"Atribuição a variável não declarada '{identifier.value}'.")
+        if identifier.type != 'Identifier':
+            yield identifier
+            yield node.children[1]
+            return
+        symbol = self.symbol_table.resolve(identifier.value)
+        if symbol is None:
+            self.error('JS308', f"Atribuição a variável não declarada '{identifier.value}'.", identifier)
         else:
-            self.visit(node.children[1])
-            self.symbol_table[identifier.value]['initialized'] = True
-
-    def visit_ReturnStatement(self, node):
-        self.visit(node.children[0])
-
-    def visit_BinaryExpression(self, node):
-        self.visit(node.children[0])
-        self.visit(node.children[1])
-
-    def visit_IfStatement(self, node):
-        self.visit(node.children[0])
-        self.visit(node.children[1])
-        if len(node.children) > 2:
-            self.visit(node.children[2])
-
-    def visit_WhileStatement(self, node):
-        self.visit(node.children[0])
-        self.visit(node.children[1])
+            self.bind(identifier, symbol)
+            yield node.children[1]
+            symbol.initialized = True
 
     def visit_ForStatement(self, node):
-        self.visit(node.children[0])
-        self.visit(node.children[1])
-        self.visit(node.children[2])
-        self.visit(node.children[3])
+        # O for tem um escopo próprio para o let da inicialização
+        self.symbol_table.enter()
+        yield from self.generic_visit(node)
+        self.symbol_table.exit()
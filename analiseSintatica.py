@@ -1,310 +1,421 @@
-from arvoreSintatica import ASTNode
+from arvoreSintatica import (
+    ArrayAccess, ArrayLiteral, AssignmentExpression, BinaryExpression, Block, Boolean,
+    ExpressionStatement, ForStatement, FunctionCall, FunctionDeclaration, Identifier,
+    IfStatement, LogicalExpression, Number, Parameters, Program, PropertyAccess,
+    ReturnStatement, String, VarDeclaration, WhileStatement,
+)
+from bufferDeTokens import END, TOKEN_KINDS, TOKEN_NAMES, BufferDeTokens
+from scannerJS import Token
+
+_VAZIO = object()
+
+# Tipos de token como inteiros, os mesmos de BufferDeTokens.kinds: as
+# comparações do parser são entre ints pequenos. END é o tipo depois do
+# último token
+(NUMBER, STRING, IDENTIFIER, TRUE, FALSE, CONSOLE_LOG, PROMPT, VAR, LET, CONST,
+ WHILE, FOR, IF, ELSE, FUNCTION, RETURN, LPAREN, RPAREN, LBRACE, RBRACE,
+ LBRACKET, RBRACKET, SEMICOLON, COMMA, DOT, ASSIGN) = (TOKEN_KINDS[name] for name in (
+    'NUMBER', 'STRING', 'IDENTIFIER', 'TRUE', 'FALSE', 'CONSOLE_LOG', 'PROMPT', 'VAR', 'LET', 'CONST',
+    'WHILE', 'FOR', 'IF', 'ELSE', 'FUNCTION', 'RETURN', 'LPAREN', 'RPAREN', 'LBRACE', 'RBRACE',
+    'LBRACKET', 'RBRACKET', 'SEMICOLON', 'COMMA', 'DOT', 'ASSIGN'))
+
+# tipo do token: (precedência, associa à direita, classe do nó), indexado
+# pelo tipo inteiro (None para quem não é operador binário, END incluído)
+BINARY_OPERATORS = [None] * (END + 1)
+for _name, _operator in {
+    'ASSIGN': (1, True, AssignmentExpression),
+    'OR': (2, False, LogicalExpression),
+    'AND': (3, False, LogicalExpression),
+    'EQ': (4, False, BinaryExpression),
+    'NEQ': (4, False, BinaryExpression),
+    'LT': (4, False, BinaryExpression),
+    'LE': (4, False, BinaryExpression),
+    'GT': (4, False, BinaryExpression),
+    'GE': (4, False, BinaryExpression),
+    'PLUS': (5, False, BinaryExpression),
+    'MINUS': (5, False, BinaryExpression),
+    'TIMES': (6, False, BinaryExpression),
+    'DIVIDE': (6, False, BinaryExpression),
+}.items():
+    BINARY_OPERATORS[TOKEN_KINDS[_name]] = _operator
+
+class ErroSintatico(SyntaxError):
+    # code é o código do diagnóstico (diagnosticos.py); token, onde o erro
+    # aconteceu, ou None no fim do input
+    def __init__(self, code, message, token):
+        super().__init__(message)
+        self.code = code
+        self.token = token
 
 class AnalisadorSintaticoJS:
-    def __init__(self, tokens):
-        self.tokens = tokens
-        self.current_token = None
+    def __init__(self, tokens, diagnostics=None):
+        # Aceita qualquer iterável de tokens (lista ou gerador como
+        # AnalisadorLexicoJS.iter_tokens), consumido um token por vez, ou um
+        # BufferDeTokens, lido direto dos arrays sem criar objetos Token. Do
+        # token atual ficam tipo (inteiro), valor, linha e posição; de um
+        # iterável, só ele e um token de lookahead (peek_token). Sem
+        # diagnostics o primeiro erro levanta ErroSintatico; com um
+        # Diagnosticos, cada erro é registrado nele e a análise continua na
+        # próxima declaração (syntax_errors conta quantos)
+        self.diagnostics = diagnostics
+        self.syntax_errors = 0
+        self.kind = END
+        self.value = self.lineno = self.lexpos = None
+        self.token = None
+        self.lookahead = _VAZIO
         self.pos = 0
         self.ast = None
+        if isinstance(tokens, BufferDeTokens):
+            self.next_token, self.peek_token = self.buffered(tokens)
+        else:
+            self.tokens = iter(tokens)
         self.next_token()
 
     def next_token(self):
-        if self.pos < len(self.tokens):
-            self.current_token = self.tokens[self.pos]
-            self.pos += 1
+        token = self.lookahead
+        if token is _VAZIO:
+            token = next(self.tokens, None)
+        else:
+            self.lookahead = _VAZIO
+        self.token = token
+        if token is None:
+            self.kind = END
         else:
-            self.current_token = None
+            self.kind = TOKEN_KINDS[token.type]
+            self.value = token.value
+            self.lineno = token.lineno
+            self.lexpos = token.lexpos
+            self.pos += 1
+
+    def peek_token(self):
+        # O token depois do atual, sem consumi-lo; None no fim
+        if self.lookahead is _VAZIO:
+            self.lookahead = next(self.tokens, None)
+        return self.lookahead
+
+    def buffered(self, buffer):
+        # next_token e peek_token sobre os arrays de um BufferDeTokens
+        kinds, value_ids, values = buffer.kinds, buffer.value_ids, buffer.values
+        lines, offsets = buffer.lines, buffer.offsets
+        count = len(kinds)
+
+        def next_token():
+            index = self.pos
+            if index < count:
+                self.kind = kinds[index]
+                self.value = values[value_ids[index]]
+                self.lineno = lines[index]
+                self.lexpos = offsets[index]
+                self.pos = index + 1
+            else:
+                self.kind = END
+
+        def peek_token():
+            return buffer[self.pos] if self.pos < count else None
+        return next_token, peek_token
+
+    @property
+    def current_token(self):
+        # O token atual como objeto, None no fim. Lido de um BufferDeTokens,
+        # ele só é criado aqui, quando alguém pede
+        if self.kind == END:
+            return None
+        if self.token is not None:
+            return self.token
+        return Token(TOKEN_NAMES[self.kind], self.value, self.lineno, self.lexpos)
+
+    def unexpected(self, expected=None, code='JS201'):
+        # ErroSintatico para o token atual; no fim do input é sempre JS202
+        suffix = f", esperado {expected}" if expected else ''
+        if self.kind == END:
+            return ErroSintatico('JS202', f"Fim inesperado do input{suffix}", None)
+        token = self.current_token
+        return ErroSintatico(code, f"Token inesperado: {token.type} '{token.value}'{suffix}", token)
+
+    def expect(self, kind, code='JS201'):
+        # Consome um token obrigatório do tipo kind
+        if self.kind != kind:
+            raise self.unexpected(TOKEN_NAMES[kind], code)
+        self.next_token()
+
+    def identifier(self):
+        node = Identifier(self.value, self.lineno, position=self.lexpos)
+        self.expect(IDENTIFIER)
+        return node
 
     def parse(self):
         self.ast = self.program()
         return self.ast
 
+    def parse_into(self, arena):
+        # Emite cada declaração de nível superior na ArenaAST assim que ela é
+        # reconhecida; só a subárvore da declaração atual existe como objetos
+        while self.kind != END:
+            try:
+                arena.append(self.top_level_statement())
+            except ErroSintatico as error:
+                self.recover(error, inside_block=False)
+        self.ast = arena.root
+        return self.ast
+
     def program(self):
-        node = ASTNode("Program")
-        while self.current_token:
-            if self.current_token.type in ('VAR', 'LET', 'CONST'):
-                node.add_child(self.var_declaration())
-            elif self.current_token.type == 'WHILE':
-                node.add_child(self.while_statement())
-            elif self.current_token.type == 'FOR':
-                node.add_child(self.for_statement())
-            elif self.current_token.type == 'IF':
-                node.add_child(self.if_statement())
-            elif self.current_token.type == 'FUNCTION':
-                node.add_child(self.function_declaration())
-            else:
-                node.add_child(self.expression_statement())
+        node = Program(lineno=1, position=0)
+        while self.kind != END:
+            try:
+                node.add_child(self.top_level_statement())
+            except ErroSintatico as error:
+                self.recover(error, inside_block=False)
         return node
 
+    def recover(self, error, inside_block):
+        # Modo pânico: registra o erro e descarta tokens até depois de um ';'
+        # ou até o '}' que fecha o bloco atual (no nível superior um '}'
+        # sobrando é descartado também)
+        if self.diagnostics is None:
+            raise error
+        self.syntax_errors += 1
+        token = error.token
+        if token is None:
+            self.diagnostics.report(error.code, str(error))
+        else:
+            self.diagnostics.report(error.code, str(error), token.lineno, token.lexpos)
+        while self.kind != END:
+            kind = self.kind
+            if kind == RBRACE and inside_block:
+                return
+            self.next_token()
+            if kind in (SEMICOLON, RBRACE):
+                return
+
+    def top_level_statement(self):
+        if self.kind in (VAR, LET, CONST):
+            return self.var_declaration()
+        elif self.kind == WHILE:
+            return self.while_statement()
+        elif self.kind == FOR:
+            return self.for_statement()
+        elif self.kind == IF:
+            return self.if_statement()
+        elif self.kind == FUNCTION:
+            return self.function_declaration()
+        else:
+            return self.expression_statement()
+
     def var_declaration(self):
-        node = ASTNode("VarDeclaration")
+        node = VarDeclaration(kind=self.value, lineno=self.lineno, position=self.lexpos)
         self.next_token()  # Consume 'VAR', 'LET' or 'CONST'
-        if self.current_token.type == 'IDENTIFIER':
-            node.add_child(ASTNode("Identifier", self.current_token.value))
-            self.next_token()  # Consume IDENTIFIER
-            if self.current_token.type == 'ASSIGN':
-                self.next_token()  # Consume '='
-                node.add_child(self.expression())
-            if self.current_token.type == 'SEMICOLON':
-                self.next_token()  # Consume ';'
+        node.identifier = self.identifier()
+        if self.kind == ASSIGN:
+            self.next_token()  # Consume '='
+            node.init = self.expression()
+        if self.kind == SEMICOLON:
+            self.next_token()  # Consume ';'
         return node
 
     def while_statement(self):
-        node = ASTNode("WhileStatement")
+        node = WhileStatement(lineno=self.lineno, position=self.lexpos)
         self.next_token()  # Consume 'WHILE'
-        if self.current_token.type == 'LPAREN':
-            self.next_token()  # Consume '('
-            node.add_child(self.expression())
-            if self.current_token.type == 'RPAREN':
-                self.next_token()  # Consume ')'
-                node.add_child(self.block())
+        self.expect(LPAREN)
+        node.test = self.expression()
+        self.expect(RPAREN)
+        node.body = self.block()
         return node
 
     def for_statement(self):
-        node = ASTNode("ForStatement")
+        node = ForStatement(lineno=self.lineno, position=self.lexpos)
         self.next_token()  # Consume 'FOR'
-        if self.current_token.type == 'LPAREN':
-            self.next_token()  # Consume '('
-            node.add_child(self.var_declaration())
-            node.add_child(self.expression())
-            if self.current_token.type == 'SEMICOLON':
-                self.next_token()  # Consume ';'
-                node.add_child(self.expression())
-            if self.current_token.type == 'RPAREN':
-                self.next_token()  # Consume ')'
-                node.add_child(self.block())
+        self.expect(LPAREN)
+        if self.kind not in (VAR, LET, CONST):
+            raise self.unexpected('VAR')
+        node.init = self.var_declaration()
+        node.test = self.expression()
+        self.expect(SEMICOLON)
+        node.update = self.expression()
+        self.expect(RPAREN)
+        node.body = self.block()
         return node
 
     def if_statement(self):
-        node = ASTNode("IfStatement")
+        node = IfStatement(lineno=self.lineno, position=self.lexpos)
         self.next_token()  # Consume 'IF'
-        if self.current_token.type == 'LPAREN':
-            self.next_token()  # Consume '('
-            node.add_child(self.expression())
-            if self.current_token.type == 'RPAREN':
-                self.next_token()  # Consume ')'
-                node.add_child(self.block())
-                if self.current_token and self.current_token.type == 'ELSE':
-                    self.next_token()  # Consume 'ELSE'
-                    node.add_child(self.block())
+        self.expect(LPAREN)
+        node.test = self.expression()
+        self.expect(RPAREN)
+        node.consequent = self.block()
+        if self.kind == ELSE:
+            self.next_token()  # Consume 'ELSE'
+            node.alternate = self.block()
         return node
 
     def return_statement(self):
-        node = ASTNode("ReturnStatement")
+        node = ReturnStatement(lineno=self.lineno, position=self.lexpos)
         self.next_token()  # Consume 'RETURN'
-        if self.current_token and self.current_token.type != 'SEMICOLON':
-            node.add_child(self.expression())
-        if self.current_token and self.current_token.type == 'SEMICOLON':
+        if self.kind not in (SEMICOLON, END):
+            node.argument = self.expression()
+        if self.kind == SEMICOLON:
             self.next_token()  # Consume ';'
         return node
 
     def function_declaration(self):
-        node = ASTNode("FunctionDeclaration")
+        node = FunctionDeclaration(lineno=self.lineno, position=self.lexpos)
         self.next_token()  # Consume 'FUNCTION'
-        if self.current_token.type == 'IDENTIFIER':
-            node.add_child(ASTNode("Identifier", self.current_token.value))
-            self.next_token()  # Consume IDENTIFIER
-            if self.current_token.type == 'LPAREN':
-                self.next_token()  # Consume '('
-                node.add_child(self.parameters())
-                if self.current_token.type == 'RPAREN':
-                    self.next_token()  # Consume ')'
-                    node.add_child(self.block())
+        node.identifier = self.identifier()
+        self.expect(LPAREN)
+        node.params = self.parameters()
+        self.expect(RPAREN)
+        node.body = self.block()
         return node
 
     def parameters(self):
-        node = ASTNode("Parameters")
-        while self.current_token.type == 'IDENTIFIER':
-            node.add_child(ASTNode("Identifier", self.current_token.value))
-            self.next_token()  # Consume IDENTIFIER
-            if self.current_token.type == 'COMMA':
-                self.next_token()  # Consume ','
+        node = Parameters(lineno=self.lineno, position=self.lexpos)
+        while self.kind != RPAREN:
+            node.add_child(self.identifier())
+            if self.kind != COMMA:
+                break
+            self.next_token()  # Consume ','
         return node
 
     def expression_statement(self):
-        node = ASTNode("ExpressionStatement")
-        node.add_child(self.expression())
-        if self.current_token and self.current_token.type == 'SEMICOLON':
+        node = ExpressionStatement(lineno=self.lineno, position=self.lexpos)
+        node.expression = self.expression()
+        if self.kind == SEMICOLON:
             self.next_token()  # Consume ';'
         return node
 
     def expression(self):
-        node = self.assignment()
-        return node
+        # Precedência por tabela (operator-precedence/shunting-yard): operandos
+        # e operadores pendentes ficam em pilhas explícitas, então cadeias como
+        # a + b + c ... e parênteses aninhados não consomem pilha do Python
+        operands = []
+        operators = []  # (precedência, classe do nó, operador) ou None para '('
+        open_parens = 0
+        while True:
+            while self.kind == LPAREN:
+                self.next_token()  # Consume '('
+                operators.append(None)
+                open_parens += 1
+            operands.append(self.factor())
 
-    def assignment(self):
-        node = self.logical_or()
-        while self.current_token and self.current_token.type == 'ASSIGN':
-            operator = self.current_token
-            self.next_token()
-            right = self.assignment()
-            new_node = ASTNode("AssignmentExpression", operator.value)
-            new_node.add_child(node)
-            new_node.add_child(right)
-            node = new_node
-        return node
-    
-    def logical_or(self):
-        node = self.logical_and()
-        while self.current_token and self.current_token.type == 'OR':
-            operator = self.current_token
-            self.next_token()
-            right = self.logical_and()
-            new_node = ASTNode("LogicalExpression", operator.value)
-            new_node.add_child(node)
-            new_node.add_child(right)
-            node = new_node
-        return node
+            while open_parens and self.kind == RPAREN:
+                self.next_token()  # Consume ')'
+                while operators[-1] is not None:
+                    self.reduce(operands, operators)
+                operators.pop()
+                open_parens -= 1
 
-    def logical_and(self):
-        node = self.comparison()
-        while self.current_token and self.current_token.type == 'AND':
-            operator = self.current_token
-            self.next_token()
-            right = self.comparison()
-            new_node = ASTNode("LogicalExpression", operator.value)
-            new_node.add_child(node)
-            new_node.add_child(right)
-            node = new_node
-        return node
+            operator = BINARY_OPERATORS[self.kind]
+            if not operator:
+                break
+            level, right_assoc, node_class = operator
+            while operators and operators[-1] is not None and (
+                    operators[-1][0] > level or (operators[-1][0] == level and not right_assoc)):
+                self.reduce(operands, operators)
+            operators.append((level, node_class, self.value))
+            self.next_token()  # Consume operator
 
-    def comparison(self):
-        node = self.term()
-        while self.current_token and self.current_token.type in ('EQ', 'NEQ', 'LT', 'LE', 'GT', 'GE'):
-            operator = self.current_token
-            self.next_token()
-            right = self.term()
-            new_node = ASTNode("BinaryExpression", operator.value)
-            new_node.add_child(node)
-            new_node.add_child(right)
-            node = new_node
-        return node
+        if open_parens:
+            raise ErroSintatico('JS203', "Esperado ')' após expressão", self.current_token)
+        while operators:
+            self.reduce(operands, operators)
+        return operands[0]
 
-    def term(self):
-        node = self.factor()
-        while self.current_token and self.current_token.type in ('TIMES', 'DIVIDE', 'PLUS', 'MINUS'):
-            operator = self.current_token
-            self.next_token()
-            right = self.factor()
-            new_node = ASTNode("BinaryExpression", operator.value)
-            new_node.add_child(node)
-            new_node.add_child(right)
-            node = new_node
-        return node
+    def reduce(self, operands, operators):
+        _, node_class, operator = operators.pop()
+        right = operands.pop()
+        left = operands.pop()
+        operands.append(node_class(operator, left, right, left.lineno, left.position))
 
     def factor(self):
-        if self.current_token is None:
-            raise SyntaxError("Fim inesperado do input")
-
-        if self.current_token.type == 'NUMBER':
-            node = ASTNode("Number", self.current_token.value)
+        if self.kind == NUMBER:
+            node = Number(self.value, self.lineno, position=self.lexpos)
             self.next_token()
-        elif self.current_token.type == 'STRING':
-            node = ASTNode("String", self.current_token.value)
+        elif self.kind == STRING:
+            node = String(self.value, self.lineno, position=self.lexpos)
             self.next_token()
-        elif self.current_token.type == 'TRUE':
-            node = ASTNode("Boolean", True)
+        elif self.kind == TRUE:
+            node = Boolean(True, self.lineno, position=self.lexpos)
             self.next_token()
-        elif self.current_token.type == 'FALSE':
-            node = ASTNode("Boolean", False)
+        elif self.kind == FALSE:
+            node = Boolean(False, self.lineno, position=self.lexpos)
             self.next_token()
-        elif self.current_token.type == 'IDENTIFIER':
-            node = ASTNode("Identifier", self.current_token.value)
+        elif self.kind == IDENTIFIER:
+            node = Identifier(self.value, self.lineno, position=self.lexpos)
             self.next_token()
-            if self.current_token and self.current_token.type == 'LPAREN':
+            if self.kind == LPAREN:
                 node = self.function_call(node)
-            while self.current_token and self.current_token.type == 'DOT':
+            while self.kind == DOT:
                 self.next_token()  # Consume '.'
-                if self.current_token and self.current_token.type == 'IDENTIFIER':
-                    property_node = ASTNode("PropertyAccess", self.current_token.value)
-                    property_node.add_child(node)
-                    node = property_node
-                    self.next_token()  # Consume IDENTIFIER
-                else:
-                    raise SyntaxError("Esperado IDENTIFIER após '.'")
-            if self.current_token and self.current_token.type == 'LBRACKET':
+                property_node = PropertyAccess(self.value, node, node.lineno, node.position)
+                self.expect(IDENTIFIER, 'JS204')
+                node = property_node
+            if self.kind == LBRACKET:
                 node = self.array_access(node)
-        elif self.current_token.type in ('CONSOLE_LOG', 'PROMPT'):
+        elif self.kind in (CONSOLE_LOG, PROMPT):
             node = self.function_call()
-        elif self.current_token.type == 'LBRACKET':
+        elif self.kind == LBRACKET:
             node = self.array_literal()
-        elif self.current_token.type == 'LPAREN':
-            self.next_token()
-            node = self.expression()
-            if self.current_token and self.current_token.type == 'RPAREN':
-                self.next_token()
-            else:
-                raise SyntaxError("Esperado ')' após expressão")
         else:
-            raise SyntaxError(f"Token inesperado: {self.current_token}")
+            raise self.unexpected()
         return node
 
 
     def array_literal(self):
         elements = []
+        lineno, position = self.lineno, self.lexpos
         self.next_token()  # Consume '['
-        while self.current_token and self.current_token.type != 'RBRACKET':
+        while self.kind != RBRACKET:
             elements.append(self.expression())
-            if self.current_token and self.current_token.type == 'COMMA':
-                self.next_token()  # Consume ','
-        if self.current_token and self.current_token.type == 'RBRACKET':
-            self.next_token()  # Consume ']'
-        node = ASTNode("ArrayLiteral")
-        node.children.extend(elements)
-        return node
+            if self.kind != COMMA:
+                break
+            self.next_token()  # Consume ','
+        self.expect(RBRACKET)
+        return ArrayLiteral(elements, lineno, position)
 
     def array_access(self, array_node):
         self.next_token()  # Consume '['
         index = self.expression()
-        if self.current_token and self.current_token.type == 'RBRACKET':
-            self.next_token()  # Consume ']'
-        node = ASTNode("ArrayAccess")
-        node.add_child(array_node)
-        node.add_child(index)
-        return node
+        self.expect(RBRACKET)
+        return ArrayAccess(array_node, index, array_node.lineno, array_node.position)
 
     def function_call(self, node=None):
-        func_name = node.value if node else self.current_token.value
-        node = ASTNode("FunctionCall", func_name)
-        self.next_token()  # Consume IDENTIFIER or CONSOLE_LOG or PROMPT
-        if self.current_token.type == 'LPAREN':
-            self.next_token()  # Consume '('
-            while self.current_token and self.current_token.type != 'RPAREN':
-                node.add_child(self.expression())
-                if self.current_token and self.current_token.type == 'COMMA':
-                    self.next_token()  # Consume ','
-            if self.current_token and self.current_token.type == 'RPAREN':
-                self.next_token()  # Consume ')'
+        if node is None:
+            func_name, lineno, position = self.value, self.lineno, self.lexpos
+            self.next_token()  # Consume CONSOLE_LOG or PROMPT
+        else:
+            func_name, lineno, position = node.value, node.lineno, node.position  # IDENTIFIER já consumido por factor
+        node = FunctionCall(func_name, lineno=lineno, position=position)
+        self.expect(LPAREN)
+        while self.kind != RPAREN:
+            node.add_child(self.expression())
+            if self.kind != COMMA:
+                break
+            self.next_token()  # Consume ','
+        self.expect(RPAREN)
         return node
 
     def block(self):
-        node = ASTNode("Block")
-        if self.current_token.type == 'LBRACE':
-            self.next_token()  # Consume '{'
-            while self.current_token and self.current_token.type != 'RBRACE':
+        node = Block(lineno=self.lineno, position=self.lexpos)
+        self.expect(LBRACE)
+        while self.kind not in (RBRACE, END):
+            try:
                 node.add_child(self.statement())
-            if self.current_token and self.current_token.type == 'RBRACE':
-                self.next_token()  # Consume '}'
+            except ErroSintatico as error:
+                self.recover(error, inside_block=True)
+        self.expect(RBRACE)
         return node
 
     def statement(self):
-        if self.current_token.type in ('VAR', 'LET', 'CONST'):
+        if self.kind in (VAR, LET, CONST):
             return self.var_declaration()
-        elif self.current_token.type == 'WHILE':
+        elif self.kind == WHILE:
             return self.while_statement()
-        elif self.current_token.type == 'FOR':
+        elif self.kind == FOR:
             return self.for_statement()
-        elif self.current_token.type == 'IF':
+        elif self.kind == IF:
             return self.if_statement()
-        elif self.current_token.type == 'FUNCTION':
+        elif self.kind == FUNCTION:
             return self.function_declaration()
-        elif self.current_token.type == 'RETURN':
+        elif self.kind == RETURN:
             return self.return_statement()
         else:
             return self.expression_statement()
-
-    def peek_token(self):
-        if self.pos < len(self.tokens):
-            return self.tokens[self.pos]
-        else:
-            return None
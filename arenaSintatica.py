@@ -0,0 +1,186 @@
+from array import array
+
+from arvoreSintatica import Node, create_node
+
+class ArenaAST:
+    # AST em arrays paralelos: tipo, índice do valor, primeiro filho e próximo
+    # irmão (-1 quando não há). O nó 0 é sempre o Program.
+    def __init__(self):
+        self.kinds = array('B')
+        self.value_ids = array('I')
+        self.first_child = array('i')
+        self.next_sibling = array('i')
+        self.lines = array('I')  # 0 quando o nó não tem linha
+        self.positions = array('Q')  # lexpos + 1; 0 quando o nó não tem posição
+        self.type_names = []
+        self.type_index = {}
+        self.values = [None]
+        self.value_index = {}
+        self.last_root_child = -1
+        # Atributos raros ficam fora dos arrays, por índice do nó: palavra-chave
+        # de VarDeclaration que não seja 'var' e bindings da análise semântica
+        self.declaration_kinds = {}
+        self.bindings = {}
+        self.new_node("Program", None, 1, 0)
+
+    @property
+    def root(self):
+        return ArenaNode(self, 0)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def new_node(self, type, value, lineno=None, position=None):
+        kind = self.type_index.get(type)
+        if kind is None:
+            kind = self.type_index[type] = len(self.type_names)
+            self.type_names.append(type)
+        self.kinds.append(kind)
+        self.value_ids.append(self.value_id(value))
+        self.first_child.append(-1)
+        self.next_sibling.append(-1)
+        self.lines.append(lineno or 0)
+        self.positions.append(0 if position is None else position + 1)
+        return len(self.kinds) - 1
+
+    def value_id(self, value):
+        if value is None:
+            return 0
+        # bool e int se confundem como chave de dicionário (True == 1)
+        key = (value.__class__, value)
+        value_id = self.value_index.get(key)
+        if value_id is None:
+            value_id = self.value_index[key] = len(self.values)
+            self.values.append(value)
+        return value_id
+
+    def append(self, node):
+        # Copia a subárvore de node como último filho do Program
+        index = self.add_tree(node)
+        if self.last_root_child < 0:
+            self.first_child[0] = index
+        else:
+            self.next_sibling[self.last_root_child] = index
+        self.last_root_child = index
+        return index
+
+    def add_tree(self, node):
+        # Pré-ordem com pilha explícita; cada entrada guarda o último irmão
+        # já emitido para encadear next_sibling
+        root = self.new_node(node.type, node.value, node.lineno, node.position)
+        self.copy_attributes(node, root)
+        stack = [(root, iter(node.children), -1)]
+        while stack:
+            parent, children, previous = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                continue
+            index = self.new_node(child.type, child.value, child.lineno, child.position)
+            self.copy_attributes(child, index)
+            if previous < 0:
+                self.first_child[parent] = index
+            else:
+                self.next_sibling[previous] = index
+            stack[-1] = (parent, children, index)
+            stack.append((index, iter(child.children), -1))
+        return root
+
+    def copy_attributes(self, node, index):
+        if node.type == 'VarDeclaration' and node.kind != 'var':
+            self.declaration_kinds[index] = node.kind
+
+    def node(self, index):
+        return ArenaNode(self, index)
+
+    def child_indexes(self, index):
+        child = self.first_child[index]
+        next_sibling = self.next_sibling
+        while child >= 0:
+            yield child
+            child = next_sibling[child]
+
+    def to_tree(self, index=0):
+        # Materializa a subárvore como nós tipados de arvoreSintatica, em
+        # pós-ordem com pilha explícita
+        built = []
+        stack = [(index, None)]
+        while stack:
+            current, count = stack.pop()
+            if count is None:
+                children = list(self.child_indexes(current))
+                stack.append((current, len(children)))
+                stack.extend((child, None) for child in reversed(children))
+                continue
+            children = built[len(built) - count:]
+            del built[len(built) - count:]
+            position = self.positions[current]
+            node = create_node(self.type_names[self.kinds[current]],
+                               self.values[self.value_ids[current]], children,
+                               self.lines[current] or None, position - 1 if position else None)
+            if current in self.declaration_kinds:
+                node.kind = self.declaration_kinds[current]
+            if current in self.bindings:
+                node.binding = self.bindings[current]
+            built.append(node)
+        return built[0]
+
+class ArenaNode(Node):
+    # Visão leve de um nó da arena com a mesma interface type/value/children
+    # usada pelos visitantes
+    __slots__ = ('arena', 'index')
+
+    def __init__(self, arena, index):
+        self.arena = arena
+        self.index = index
+
+    @property
+    def type(self):
+        arena = self.arena
+        return arena.type_names[arena.kinds[self.index]]
+
+    @property
+    def value(self):
+        arena = self.arena
+        return arena.values[arena.value_ids[self.index]]
+
+    @value.setter
+    def value(self, value):
+        # A análise semântica renomeia let/const que sombreiam outra variável
+        arena = self.arena
+        arena.value_ids[self.index] = arena.value_id(value)
+
+    @property
+    def lineno(self):
+        return self.arena.lines[self.index] or None
+
+    @property
+    def position(self):
+        position = self.arena.positions[self.index]
+        return position - 1 if position else None
+
+    @property
+    def kind(self):
+        return self.arena.declaration_kinds.get(self.index, 'var')
+
+    @property
+    def binding(self):
+        return self.arena.bindings.get(self.index)
+
+    @binding.setter
+    def binding(self, binding):
+        self.arena.bindings[self.index] = binding
+
+    @property
+    def children(self):
+        arena = self.arena
+        return [ArenaNode(arena, child) for child in arena.child_indexes(self.index)]
+
+    def add_child(self, node):
+        raise TypeError("ArenaAST é somente leitura; use ArenaAST.append")
+
+    def __eq__(self, other):
+        return isinstance(other, ArenaNode) and other.arena is self.arena and other.index == self.index
+
+    def __hash__(self):
+        return hash((id(self.arena), self.index))
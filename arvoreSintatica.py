@@ -1,17 +1,280 @@
-class ASTNode:
-    def __init__(self, type, value=None, children=None):
+class Node:
+    __slots__ = ()
+
+    def add_child(self, node):
+        self.children.append(node)
+
+    def __repr__(self, level=0):
+        # Pilha explícita e um único join: árvores profundas não estouram o
+        # limite de recursão nem pagam concatenações repetidas
+        lines = []
+        stack = [(self, level)]
+        while stack:
+            node, depth = stack.pop()
+            line = "\t" * depth + repr(node.type)
+            if node.value is not None:
+                line += f" ({repr(node.value)})"
+            lines.append(line + "\n")
+            stack.extend((child, depth + 1) for child in reversed(node.children))
+        return ''.join(lines)
+
+class ASTNode(Node):
+    # Nó genérico: tipo em string, valor opcional e lista de filhos
+    __slots__ = ('type', 'value', 'children', 'lineno', 'position')
+
+    def __init__(self, type, value=None, children=None, lineno=None, position=None):
         self.type = type
         self.value = value
         self.children = children if children is not None else []
+        self.lineno = lineno
+        self.position = position
+
+# Nós tipados. Todos expõem type/value/children como o ASTNode, então os
+# visitantes que usam node.children[i] continuam funcionando, mas guardam os
+# filhos em campos nomeados e folhas não alocam lista de filhos. lineno é a
+# linha do token JS onde o nó começa e position, o lexpos dele (None para
+# nós sintetizados).
+
+class Leaf(Node):
+    __slots__ = ('value', 'lineno', 'position')
+    children = ()
+
+    def __init__(self, value, lineno=None, position=None):
+        self.value = value
+        self.lineno = lineno
+        self.position = position
+
+class Identifier(Leaf):
+    # binding: (profundidade, slot) resolvido pela análise semântica
+    __slots__ = ('binding',)
+    type = "Identifier"
+
+    def __init__(self, value, lineno=None, binding=None, position=None):
+        self.value = value
+        self.lineno = lineno
+        self.position = position
+        self.binding = binding
+
+class Number(Leaf):
+    __slots__ = ()
+    type = "Number"
+
+class String(Leaf):
+    __slots__ = ()
+    type = "String"
+
+class Boolean(Leaf):
+    __slots__ = ()
+    type = "Boolean"
+
+class ListNode(Node):
+    # Nós com número variável de filhos; children é a própria lista
+    __slots__ = ('children', 'lineno', 'position')
+    value = None
+
+    def __init__(self, children=None, lineno=None, position=None):
+        self.children = children if children is not None else []
+        self.lineno = lineno
+        self.position = position
+
+class Program(ListNode):
+    __slots__ = ()
+    type = "Program"
+
+class Block(ListNode):
+    __slots__ = ()
+    type = "Block"
+
+class Parameters(ListNode):
+    __slots__ = ()
+    type = "Parameters"
+
+class ArrayLiteral(ListNode):
+    __slots__ = ()
+    type = "ArrayLiteral"
+
+class FunctionCall(ListNode):
+    __slots__ = ('value',)
+    type = "FunctionCall"
+
+    def __init__(self, value, children=None, lineno=None, position=None):
+        self.value = value
+        self.children = children if children is not None else []
+        self.lineno = lineno
+        self.position = position
+
+class FixedNode(Node):
+    # Nós com filhos fixos em campos nomeados; campos None são omitidos de children
+    __slots__ = ('lineno', 'position')
+    fields = ()
+    value = None
+
+    @property
+    def children(self):
+        return [child for child in map(self.__getattribute__, self.fields) if child is not None]
+
+    @children.setter
+    def children(self, children):
+        children = list(children)
+        for i, field in enumerate(self.fields):
+            setattr(self, field, children[i] if i < len(children) else None)
 
     def add_child(self, node):
-        self.children.append(node)
+        for field in self.fields:
+            if getattr(self, field) is None:
+                setattr(self, field, node)
+                return
+        raise ValueError(f"{self.type} não aceita mais filhos")
 
-    def __repr__(self, level=0):
-        ret = "\t" * level + repr(self.type)
-        if self.value is not None:
-            ret += f" ({repr(self.value)})"
-        ret += "\n"
-        for child in self.children:
-            ret += child.__repr__(level + 1)
-        return ret
+class VarDeclaration(FixedNode):
+    # kind é a palavra-chave da declaração: 'var', 'let' ou 'const'
+    __slots__ = ('identifier', 'init', 'kind')
+    type = "VarDeclaration"
+    fields = ('identifier', 'init')
+
+    def __init__(self, identifier=None, init=None, kind='var', lineno=None, position=None):
+        self.identifier = identifier
+        self.init = init
+        self.kind = kind
+        self.lineno = lineno
+        self.position = position
+
+class FunctionDeclaration(FixedNode):
+    __slots__ = ('identifier', 'params', 'body')
+    type = "FunctionDeclaration"
+    fields = __slots__
+
+    def __init__(self, identifier=None, params=None, body=None, lineno=None, position=None):
+        self.identifier = identifier
+        self.params = params
+        self.body = body
+        self.lineno = lineno
+        self.position = position
+
+class ExpressionStatement(FixedNode):
+    __slots__ = ('expression',)
+    type = "ExpressionStatement"
+    fields = __slots__
+
+    def __init__(self, expression=None, lineno=None, position=None):
+        self.expression = expression
+        self.lineno = lineno
+        self.position = position
+
+class ReturnStatement(FixedNode):
+    __slots__ = ('argument',)
+    type = "ReturnStatement"
+    fields = __slots__
+
+    def __init__(self, argument=None, lineno=None, position=None):
+        self.argument = argument
+        self.lineno = lineno
+        self.position = position
+
+class IfStatement(FixedNode):
+    __slots__ = ('test', 'consequent', 'alternate')
+    type = "IfStatement"
+    fields = __slots__
+
+    def __init__(self, test=None, consequent=None, alternate=None, lineno=None, position=None):
+        self.test = test
+        self.consequent = consequent
+        self.alternate = alternate
+        self.lineno = lineno
+        self.position = position
+
+class WhileStatement(FixedNode):
+    __slots__ = ('test', 'body')
+    type = "WhileStatement"
+    fields = __slots__
+
+    def __init__(self, test=None, body=None, lineno=None, position=None):
+        self.test = test
+        self.body = body
+        self.lineno = lineno
+        self.position = position
+
+class ForStatement(FixedNode):
+    __slots__ = ('init', 'test', 'update', 'body')
+    type = "ForStatement"
+    fields = __slots__
+
+    def __init__(self, init=None, test=None, update=None, body=None, lineno=None, position=None):
+        self.init = init
+        self.test = test
+        self.update = update
+        self.body = body
+        self.lineno = lineno
+        self.position = position
+
+class ArrayAccess(FixedNode):
+    __slots__ = ('array', 'index')
+    type = "ArrayAccess"
+    fields = __slots__
+
+    def __init__(self, array=None, index=None, lineno=None, position=None):
+        self.array = array
+        self.index = index
+        self.lineno = lineno
+        self.position = position
+
+class PropertyAccess(FixedNode):
+    __slots__ = ('value', 'object')
+    type = "PropertyAccess"
+    fields = ('object',)
+
+    def __init__(self, value, object=None, lineno=None, position=None):
+        self.value = value
+        self.object = object
+        self.lineno = lineno
+        self.position = position
+
+class OperatorNode(FixedNode):
+    # value guarda o operador, como no ASTNode
+    __slots__ = ('value', 'left', 'right')
+    fields = ('left', 'right')
+
+    def __init__(self, value, left=None, right=None, lineno=None, position=None):
+        self.value = value
+        self.left = left
+        self.right = right
+        self.lineno = lineno
+        self.position = position
+
+class BinaryExpression(OperatorNode):
+    __slots__ = ()
+    type = "BinaryExpression"
+
+class LogicalExpression(OperatorNode):
+    __slots__ = ()
+    type = "LogicalExpression"
+
+class AssignmentExpression(OperatorNode):
+    __slots__ = ()
+    type = "AssignmentExpression"
+
+NODE_CLASSES = {
+    cls.type: cls
+    for cls in (Identifier, Number, String, Boolean, Program, Block, Parameters, ArrayLiteral,
+                FunctionCall, VarDeclaration, FunctionDeclaration, ExpressionStatement,
+                ReturnStatement, IfStatement, WhileStatement, ForStatement, ArrayAccess,
+                PropertyAccess, BinaryExpression, LogicalExpression, AssignmentExpression)
+}
+
+def create_node(type, value=None, children=(), lineno=None, position=None):
+    # Constrói o nó tipado correspondente a (type, value, children); tipos
+    # desconhecidos caem no ASTNode genérico
+    cls = NODE_CLASSES.get(type)
+    if cls is None:
+        return ASTNode(type, value, list(children), lineno, position)
+    if issubclass(cls, Leaf):
+        return cls(value, lineno, position=position)
+    if cls is FunctionCall:
+        return cls(value, list(children), lineno, position)
+    if issubclass(cls, ListNode):
+        return cls(list(children), lineno, position)
+    node = cls(value) if issubclass(cls, (OperatorNode, PropertyAccess)) else cls()
+    node.children = children
+    node.lineno = lineno
+    node.position = position
+    return node
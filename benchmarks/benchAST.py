@@ -0,0 +1,71 @@
+# Bytes por nó (tracemalloc): árvore com os nós tipados de arvoreSintatica
+# versus a mesma árvore montada com o ASTNode genérico e com o ASTNode antigo
+# (sem __slots__).
+#
+#   python -m benchmarks.benchAST [funcoes]
+import sys
+import tracemalloc
+
+from analiseLexica import AnalisadorLexicoJS
+from analiseSintatica import AnalisadorSintaticoJS
+from arvoreSintatica import ASTNode
+
+
+def make_source(functions):
+    parts = []
+    for i in range(functions):
+        parts.append(f'''
+function f{i}(a, b) {{
+    let total = 0;
+    for (var i = 0; i < a; i = i + 1) {{
+        if (total > b && i != {i}) {{
+            total = total - b * 2;
+        }} else {{
+            total = total + [1, 2, 3][i] + a;
+        }}
+    }}
+    console.log("f{i}", total);
+    return total;
+}}
+''')
+    return ''.join(parts)
+
+
+class DictNode:
+    # ASTNode como era antes: atributos em __dict__ e lista de filhos sempre
+    def __init__(self, type, value=None, children=None):
+        self.type = type
+        self.value = value
+        self.children = children if children is not None else []
+
+
+def convert(node, cls):
+    return cls(node.type, node.value, [convert(child, cls) for child in node.children])
+
+
+def count_nodes(node):
+    return 1 + sum(count_nodes(child) for child in node.children)
+
+
+def retained(build):
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def main(functions=2000):
+    tokens = AnalisadorLexicoJS().tokenize(make_source(functions))
+    typed, typed_bytes = retained(lambda: AnalisadorSintaticoJS(tokens).parse())
+    _, dict_bytes = retained(lambda: convert(typed, DictNode))
+    _, generic_bytes = retained(lambda: convert(typed, ASTNode))
+    nodes = count_nodes(typed)
+    print(f"nós: {nodes}")
+    print(f"ASTNode antigo:   {dict_bytes / nodes:7.1f} bytes/nó")
+    print(f"ASTNode genérico: {generic_bytes / nodes:7.1f} bytes/nó")
+    print(f"nós tipados:      {typed_bytes / nodes:7.1f} bytes/nó")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
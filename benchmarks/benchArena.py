@@ -0,0 +1,40 @@
+# Pico de RSS e tempo ponta a ponta: árvore de objetos versus ArenaAST.
+# Cada modo roda num subprocesso separado para que ru_maxrss seja comparável.
+#
+#   python -m benchmarks.benchArena [funcoes]
+import resource
+import subprocess
+import sys
+import time
+
+from analiseLexica import AnalisadorLexicoJS
+from analiseSemantica import AnalisadorSemanticoJS
+from analiseSintatica import AnalisadorSintaticoJS
+from arenaSintatica import ArenaAST
+from benchmarks.benchAST import make_source
+from geradorDeCodigo import GeradorDeCodigoPythonFromJS
+
+
+def run(mode, functions):
+    code = make_source(functions)
+    start = time.perf_counter()
+    parser = AnalisadorSintaticoJS(AnalisadorLexicoJS().iter_tokens(code))
+    ast = parser.parse_into(ArenaAST()) if mode == 'arena' else parser.parse()
+    analyzer = AnalisadorSemanticoJS(ast)
+    analyzer.visit(ast)
+    python_code = GeradorDeCodigoPythonFromJS(ast).generate()
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{mode:6} {elapsed:8.2f} s {peak_kb / 1024:9.1f} MB de RSS ({len(python_code)} bytes gerados)")
+
+
+def main(functions=5000):
+    for mode in ('tree', 'arena'):
+        subprocess.run([sys.executable, '-m', 'benchmarks.benchArena', mode, str(functions)], check=True)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] in ('tree', 'arena'):
+        run(sys.argv[1], int(sys.argv[2]))
+    else:
+        main(*map(int, sys.argv[1:]))
@@ -0,0 +1,68 @@
+# Análise léxica de um arquivo grande: ler o arquivo inteiro numa str e
+# passá-la a iter_tokens versus iter_file_tokens (mmap e blocos). Mostra
+# tempo (sem tracemalloc) e pico de memória do Python numa segunda passada
+# (tracemalloc; as páginas do mmap ficam de fora, são do cache de arquivos do
+# sistema), só consumindo os tokens.
+#
+#   python -m benchmarks.benchArquivoGrande [megabytes] [bloco_kb]
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from analiseLexica import create_lexer
+from analiseLexicaEmBlocos import iter_file_tokens
+from benchmarks.geradorDeCorpus import generate
+
+
+def write_corpus(path, megabytes):
+    # Repete um programa gerado até o tamanho pedido
+    piece = generate('misto', 200, seed=7)
+    with open(path, 'w', encoding='utf-8') as output:
+        for _ in range(max(1, megabytes * 1024 * 1024 // len(piece))):
+            output.write(piece)
+
+
+def whole_file(path, tokenizer):
+    with open(path, encoding='utf-8') as input_file:
+        source = input_file.read()
+    return tokenizer.iter_tokens(source)
+
+
+def consume(tokens):
+    count = 0
+    last = None
+    for last in tokens():
+        count += 1
+    return count, (last.lineno, last.lexpos)
+
+
+def measure(tokens):
+    start = time.perf_counter()
+    count, end = consume(tokens)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    consume(tokens)
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, end, seconds, peak_bytes
+
+
+def main(megabytes=8, chunk_kb=1024):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'grande.js')
+        write_corpus(path, megabytes)
+        print(f"arquivo: {os.path.getsize(path) / 1e6:.1f} MB")
+        for backend in ('ply', 'scanner'):
+            tokenizer = create_lexer(backend)
+            whole = measure(lambda: whole_file(path, tokenizer))
+            chunked = measure(lambda: iter_file_tokens(path, tokenizer, chunk_kb * 1024))
+            assert whole[:2] == chunked[:2], (whole[:2], chunked[:2])
+            print(f"{backend:8} {whole[0]} tokens")
+            print(f"  arquivo inteiro: {whole[2]:7.2f} s  {whole[3] / 1e6:8.1f} MB de pico")
+            print(f"  mmap em blocos:  {chunked[2]:7.2f} s  {chunked[3] / 1e6:8.1f} MB de pico")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
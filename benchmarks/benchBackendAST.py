@@ -0,0 +1,34 @@
+# Latência de geração + compilação até o code object: texto Python seguido
+# de compile(str) versus GeradorDeASTPythonFromJS compilando o ast.Module.
+#
+#   python -m benchmarks.benchBackendAST [funcoes]
+import sys
+import time
+
+from analiseLexica import AnalisadorLexicoJS
+from analiseSintatica import AnalisadorSintaticoJS
+from benchmarks.benchAST import make_source
+from geradorAST import GeradorDeASTPythonFromJS
+from geradorDeCodigo import GeradorDeCodigoPythonFromJS
+
+
+def best_of(run, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(functions=500):
+    ast = AnalisadorSintaticoJS(AnalisadorLexicoJS().iter_tokens(make_source(functions))).parse()
+    via_text = best_of(lambda: compile(GeradorDeCodigoPythonFromJS(ast).generate(), '<js>', 'exec'))
+    via_ast = best_of(lambda: GeradorDeASTPythonFromJS(ast).compile())
+    print(f"funções: {functions}")
+    print(f"texto + compile(str): {via_text * 1e3:8.1f} ms")
+    print(f"ast.Module + compile: {via_ast * 1e3:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,83 @@
+# Cache de transpilação em disco: tempo de uma passada fria (todas faltas) e
+# de uma quente (todos acertos) contra transpile() direto, e vários processos
+# escrevendo no mesmo diretório com remoção LRU ativa, conferindo no fim que
+# o índice bate com os arquivos de entrada.
+#
+#   python -m benchmarks.benchCache [arquivos]
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.benchAST import make_source
+from cacheTranspilacao import HEADER, RECORD, CacheDeTranspilacao, IndiceDoCache
+from transpilador import transpile
+
+
+def sources(count, salt=''):
+    return [f'var marca{salt}{i} = {i};\n' + make_source(1 + i % 5).replace('f0', f'f{salt}{i}_') for i in range(count)]
+
+
+def writer(directory, worker, count):
+    cache = CacheDeTranspilacao(directory, max_bytes=16 * 1024)
+    for source in sources(count) + sources(count // 2, salt=f'w{worker}_'):
+        result = cache.transpile(source)
+        assert result.python_code == transpile(source).python_code
+    return cache.hits, cache.misses
+
+
+def check_index(directory):
+    with IndiceDoCache(os.path.join(directory, 'index')) as index:
+        records = [RECORD.unpack_from(index.map, position)
+                   for position in range(HEADER.size, len(index.map), RECORD.size)]
+        total = index.total_bytes
+    keys = [record[0] for record in records]
+    files = {
+        os.path.join(root, name)
+        for root, _, names in os.walk(os.path.join(directory, 'entries'))
+        for name in names
+    }
+    cache = CacheDeTranspilacao(directory)
+    assert len(keys) == len(set(keys)), "chave repetida no índice"
+    assert {cache.entry_path(key) for key in keys} == files, "índice e entradas divergem"
+    assert total == sum(os.path.getsize(path) for path in files), "total de bytes divergente"
+    return len(keys), total
+
+
+def main(count=200):
+    inputs = sources(count)
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        for source in inputs:
+            transpile(source)
+        direct = time.perf_counter() - start
+
+        cache = CacheDeTranspilacao(directory)
+        start = time.perf_counter()
+        for source in inputs:
+            cache.transpile(source)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        for source in inputs:
+            cache.transpile(source)
+        warm = time.perf_counter() - start
+        print(f"arquivos: {count}")
+        print(f"transpile direto: {direct * 1e3:8.1f} ms")
+        print(f"cache frio:       {cold * 1e3:8.1f} ms")
+        print(f"cache quente:     {warm * 1e3:8.1f} ms   ({direct / warm:.0f}x)")
+        print("contadores:", cache.stats())
+
+    with tempfile.TemporaryDirectory() as directory:
+        workers = 4
+        with multiprocessing.Pool(workers) as pool:
+            counters = pool.starmap(writer, [(directory, worker, count // 4) for worker in range(workers)])
+        entries, total = check_index(directory)
+        hits = sum(hit for hit, _ in counters)
+        misses = sum(miss for _, miss in counters)
+        print(f"{workers} processos: {hits} acertos, {misses} faltas; índice consistente com "
+              f"{entries} entradas, {total} bytes (limite 16384)")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
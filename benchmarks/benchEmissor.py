@@ -0,0 +1,42 @@
+# Pico de memória do gerador de código: generate() montando a string inteira
+# versus generate_to() escrevendo direto num arquivo.
+#
+#   python -m benchmarks.benchEmissor [funcoes]
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from analiseLexica import AnalisadorLexicoJS
+from analiseSintatica import AnalisadorSintaticoJS
+from benchmarks.benchAST import make_source
+from geradorDeCodigo import GeradorDeCodigoPythonFromJS
+
+
+def peak(generate):
+    tracemalloc.start()
+    generate()
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak_bytes
+
+
+def main(functions=5000):
+    ast = AnalisadorSintaticoJS(AnalisadorLexicoJS().iter_tokens(make_source(functions))).parse()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'saida.py')
+
+        def to_file():
+            with open(path, 'w') as output:
+                GeradorDeCodigoPythonFromJS(ast).generate_to(output)
+
+        in_memory = peak(lambda: GeradorDeCodigoPythonFromJS(ast).generate())
+        streamed = peak(to_file)
+        size = os.path.getsize(path)
+    print(f"saída: {size / 1e6:.2f} MB")
+    print(f"generate():    {in_memory / 1e6:8.2f} MB de pico")
+    print(f"generate_to(): {streamed / 1e6:8.2f} MB de pico")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,54 @@
+# Custo da instrumentação: transpile() sem ela contra as etapas chamadas
+# direto (tem de empatar: os ganchos de etapa padrão não fazem nada), e
+# com ela, com e sem o tracemalloc.
+#
+#   python -m benchmarks.benchInstrumentacao [funcoes] [repeticoes]
+import sys
+import time
+
+from analiseLexica import create_lexer
+from analiseSemantica import AnalisadorSemanticoJS
+from analiseSintatica import AnalisadorSintaticoJS
+from benchmarks.benchAST import make_source
+from geradorDeCodigo import GeradorDeCodigoPythonFromJS
+from inferenciaDeTipos import InferenciaDeTipos
+from instrumentacao import Instrumentacao
+from otimizador import Otimizador
+from transpilador import transpile
+
+
+def direct(source, tokenizer):
+    ast = AnalisadorSintaticoJS(tokenizer.iter_tokens(source)).parse()
+    AnalisadorSemanticoJS(ast).visit(ast)
+    ast = Otimizador(2).optimize(ast)
+    return GeradorDeCodigoPythonFromJS(ast, types=InferenciaDeTipos(ast).run()).generate()
+
+
+def best(function, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(functions=200, repeats=7):
+    source = make_source(functions)
+    tokenizer = create_lexer('ply')
+    expected = direct(source, tokenizer)
+    instrumentation = Instrumentacao('bench')
+    assert transpile(source, tokenizer, instrumentation=instrumentation).python_code == expected
+    baseline = best(lambda: direct(source, tokenizer), repeats)
+    disabled = best(lambda: transpile(source, tokenizer), repeats)
+    enabled = best(lambda: transpile(source, tokenizer, instrumentation=Instrumentacao('bench', False)), repeats)
+    memory = best(lambda: transpile(source, tokenizer, instrumentation=Instrumentacao('bench')), repeats)
+    print(f"etapas chamadas direto:         {baseline * 1e3:8.1f} ms")
+    print(f"transpile() sem instrumentação: {disabled * 1e3:8.1f} ms ({disabled / baseline:.3f}x)")
+    print(f"instrumentado, sem memória:     {enabled * 1e3:8.1f} ms ({enabled / baseline:.2f}x)")
+    print(f"instrumentado, com tracemalloc: {memory * 1e3:8.1f} ms ({memory / baseline:.2f}x)")
+    print('\n'.join(instrumentation.summary_lines()))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
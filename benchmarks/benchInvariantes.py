@@ -0,0 +1,84 @@
+# Tempo de execução do código gerado para laços cuja condição lê .length de
+# um vetor grande, sem e com o passo MovimentoDeInvariantes do Otimizador.
+#
+#   python -m benchmarks.benchInvariantes [tamanho]
+import sys
+import time
+
+from analiseLexica import AnalisadorLexicoJS
+from analiseSintatica import AnalisadorSintaticoJS
+from geradorDeCodigo import GeradorDeCodigoPythonFromJS
+from otimizador import EliminacaoDeCodigoMorto, MovimentoDeInvariantes, Otimizador, PropagacaoDeConstantes
+
+SOURCES = {
+    'while': '''
+function soma(valores) {
+    var total = 0;
+    var i = 0;
+    while (i < valores.length) {
+        total = total + valores[i];
+        i = i + 1;
+    }
+    return total;
+}
+''',
+    'for pulando': '''
+function soma(valores) {
+    var total = 0;
+    for (var i = 0; i < valores.length - 1; i = i + valores[i] + 1) {
+        total = total + valores[i];
+    }
+    return total;
+}
+''',
+    'aninhado': '''
+function soma(valores) {
+    var total = 0;
+    var i = 0;
+    while (i < valores.length) {
+        var j = 0;
+        while (j < valores.length / 1000) {
+            total = total + valores[j];
+            j = j + 1;
+        }
+        i = i + 1000;
+    }
+    return total;
+}
+''',
+}
+WITHOUT = (PropagacaoDeConstantes, EliminacaoDeCodigoMorto)
+WITH = WITHOUT + (MovimentoDeInvariantes,)
+
+
+def compiled(source, passes):
+    ast = AnalisadorSintaticoJS(AnalisadorLexicoJS().iter_tokens(source)).parse()
+    ast = Otimizador(passes=passes).optimize(ast)
+    namespace = {}
+    exec(compile(GeradorDeCodigoPythonFromJS(ast).generate(), '<js>', 'exec'), namespace)
+    return namespace['soma']
+
+
+def best_of(run, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(size=1_000_000):
+    values = [1] * size
+    print(f"tamanho do vetor: {size}")
+    for name, source in SOURCES.items():
+        before, after = compiled(source, WITHOUT), compiled(source, WITH)
+        assert before(values) == after(values), name
+        before_time = best_of(lambda: before(values))
+        after_time = best_of(lambda: after(values))
+        print(f"{name:12} antes {before_time * 1e3:8.1f} ms   depois {after_time * 1e3:8.1f} ms"
+              f"   {before_time / after_time:4.2f}x")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
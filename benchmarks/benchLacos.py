@@ -0,0 +1,86 @@
+# Tempo de execução do código gerado para laços contados no estilo de
+# example02/example06/example07: tradução para while versus for ... in range().
+# Cada função é chamada uma vez com um inteiro no próprio programa: só com
+# n provado inteiro pela inferência de tipos o laço vira range().
+#
+#   python -m benchmarks.benchLacos [iteracoes]
+import sys
+import time
+
+from analiseLexica import AnalisadorLexicoJS
+from analiseSintatica import AnalisadorSintaticoJS
+from geradorDeCodigo import GeradorDeCodigoPythonFromJS
+from inferenciaDeTipos import InferenciaDeTipos
+
+SOURCES = {
+    'contagem': '''
+function contagem(n) {
+    var total = 0;
+    for (var i = 0; i < n; i = i + 1) {
+        total = total + i;
+    }
+    return total;
+}
+contagem(10);
+''',
+    'vetor': '''
+function vetor(n) {
+    const valores = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10];
+    var total = 0;
+    for (var i = 0; i < n; i = i + 1) {
+        for (var k = 0; k < valores.length; k = k + 1) {
+            total = total + valores[k];
+        }
+    }
+    return total;
+}
+vetor(10);
+''',
+    'aninhado': '''
+function aninhado(n) {
+    var total = 0;
+    for (var i = 0; i < n; i = i + 1000) {
+        for (var j = i; j <= i + 999; j = j + 1) {
+            total = total + j;
+        }
+    }
+    return total;
+}
+aninhado(10);
+''',
+}
+
+
+def compiled(source, range_loops):
+    ast = AnalisadorSintaticoJS(AnalisadorLexicoJS().iter_tokens(source)).parse()
+    types = InferenciaDeTipos(ast).run()
+    python_code = GeradorDeCodigoPythonFromJS(ast, range_loops=range_loops, types=types).generate()
+    namespace = {}
+    exec(compile(python_code, '<js>', 'exec'), namespace)
+    return python_code, namespace
+
+
+def best_of(run, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(iterations=200_000):
+    print(f"iterações: {iterations}")
+    for name, source in SOURCES.items():
+        code_while, with_while = compiled(source, False)
+        code_range, with_range = compiled(source, True)
+        assert 'while' not in code_range, code_range
+        assert with_while[name](iterations) == with_range[name](iterations), name
+        while_time = best_of(lambda: with_while[name](iterations))
+        range_time = best_of(lambda: with_range[name](iterations))
+        print(f"{name:10} while {while_time * 1e3:8.1f} ms   range {range_time * 1e3:8.1f} ms"
+              f"   {while_time / range_time:4.1f}x")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,45 @@
+# Custo de preparação do lexer por arquivo: reconstruir as regras PLY a cada
+# instância (comportamento antigo) versus clonar o lexer base compartilhado.
+#
+#   python -m benchmarks.benchLexer [arquivos]
+import sys
+import time
+
+import ply.lex as lex
+
+from analiseLexica import AnalisadorLexicoJS
+
+CODIGO = '''
+function soma(a, b) {
+    return a + b;
+}
+var total = soma(1, 2);
+console.log(total);
+'''
+
+
+def per_file_setup(make_lexer, files):
+    start = time.perf_counter()
+    for _ in range(files):
+        make_lexer().tokenize(CODIGO)
+    return (time.perf_counter() - start) / files
+
+
+def rebuilt_lexer():
+    analisador = object.__new__(AnalisadorLexicoJS)
+    analisador.lexer = lex.lex(module=analisador)
+    return analisador
+
+
+def main(files=500):
+    AnalisadorLexicoJS.build_lexer()
+    before = per_file_setup(rebuilt_lexer, files)
+    after = per_file_setup(AnalisadorLexicoJS, files)
+    print(f"arquivos: {files}")
+    print(f"lex.lex por instância: {before * 1e6:10.1f} us/arquivo")
+    print(f"lexer base clonado:    {after * 1e6:10.1f} us/arquivo")
+    print(f"ganho: {before / after:.1f}x")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
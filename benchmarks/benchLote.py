@@ -0,0 +1,37 @@
+# Transpilação em lote de um corpus gerado (arquivos de tamanhos variados em
+# subdiretórios) com 1 processo e com todos os núcleos, e o ganho entre os
+# dois.
+#
+#   python -m benchmarks.benchLote [arquivos]
+import os
+import sys
+import tempfile
+
+from benchmarks.benchAST import make_source
+from lote import transpile_batch
+
+
+def write_corpus(directory, files):
+    for i in range(files):
+        path = os.path.join(directory, f"modulo{i % 10}", f"arquivo{i}.js")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as output:
+            output.write(make_source(1 + (i * 7) % 40))
+
+
+def main(files=400):
+    with tempfile.TemporaryDirectory() as directory:
+        corpus = os.path.join(directory, 'js')
+        write_corpus(corpus, files)
+        times = {}
+        for workers in sorted({1, os.cpu_count() or 1}):
+            summary = transpile_batch([corpus], os.path.join(directory, f'saida{workers}'), workers)
+            assert not any(result.failure for result in summary.results)
+            times[workers] = summary.seconds
+            print('\n'.join(summary.report(slowest=3)))
+        if len(times) > 1:
+            print(f"ganho com {max(times)} processos: {times[1] / times[max(times)]:.2f}x")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
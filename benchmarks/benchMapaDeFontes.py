@@ -0,0 +1,45 @@
+# Custo dos mapas de fontes: transpilação com e sem source_map, tamanho do
+# mapa por linha gerada, e conferência de que o mapa volta igual depois de
+# codificado em VLQ e de que toda linha gerada tem origem no JS.
+#
+#   python -m benchmarks.benchMapaDeFontes [tamanho] [repeticoes]
+import gc
+import json
+import sys
+import time
+
+from analiseLexica import create_lexer
+from benchmarks.geradorDeCorpus import generate
+from mapaDeFontes import MapaDeFontes
+from transpilador import transpile
+
+
+def best(function, repeats):
+    times = []
+    for _ in range(repeats):
+        gc.collect()
+        gc.disable()
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+        gc.enable()
+    return min(times), result
+
+
+def main(size=200, repeats=5):
+    tokenizer = create_lexer('scanner')
+    for shape in ('funcoes', 'aninhado', 'misto'):
+        source = generate(shape, size)
+        plain, _ = best(lambda: transpile(source, tokenizer), repeats)
+        mapped, result = best(lambda: transpile(source, tokenizer, source_map=True), repeats)
+        source_map = result.source_map
+        lines = result.python_code.count('\n') + 1
+        assert len(source_map.lines) == lines and None not in source_map.lines
+        assert MapaDeFontes.from_dict(json.loads(json.dumps(source_map.as_dict()))).lines == source_map.lines
+        size_bytes = len(json.dumps(source_map.as_dict()))
+        print(f"{shape:10} {lines:6} linhas: {plain * 1e3:8.1f} ms sem mapa, {mapped * 1e3:8.1f} ms com mapa "
+              f"({(mapped / plain - 1) * 100:+.1f}%), {size_bytes / lines:.1f} bytes/linha")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
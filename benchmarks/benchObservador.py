@@ -0,0 +1,77 @@
+# Latência edição → saída do modo de observação num arquivo grande: edições
+# no corpo de uma função (refaz só aquele trecho) e no nível superior (refaz
+# o arquivo inteiro), comparadas com transpile() do arquivo todo.
+#
+#   python -m benchmarks.benchObservador [funcoes] [edicoes]
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.benchAST import make_source
+from observador import ObservadorDeArquivos
+from transpilador import transpile
+
+
+def save(path, source):
+    with open(path, 'w') as output:
+        output.write(source)
+    # Garante um mtime novo mesmo em sistemas de arquivos de baixa resolução
+    now = time.time_ns()
+    os.utime(path, ns=(now, now))
+
+
+def measure(watcher, path, sources):
+    latencies = []
+    for source in sources:
+        save(path, source)
+        change, = watcher.poll()
+        assert not change.failure, change.failure
+        latencies.append((change.latency, change.full, change.regenerated))
+    return latencies
+
+
+def main(functions=500, edits=20):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'programa.js')
+        header = 'var total = 0;\n'
+        body = make_source(functions)
+        save(path, header + body)
+        watcher = ObservadorDeArquivos([path], os.path.join(directory, 'saida'))
+        start = time.perf_counter()
+        watcher.poll()
+        print(f"{functions} funções, {len(header + body) / 1e3:.0f} kB; "
+              f"primeira geração {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+        start = time.perf_counter()
+        expected = transpile(header + body)
+        full = time.perf_counter() - start
+
+        # Cada edição muda o literal de uma função diferente, sobre a anterior
+        sources = []
+        edited = body
+        for edit in range(edits):
+            k = edit * 37 % functions
+            edited = edited.replace(f"i != {k})", f"i != {k + 1000 + edit})")
+            sources.append(header + edited)
+        function_edits = measure(watcher, path, sources)
+        assert all(not full and regenerated == 1 for _, full, regenerated in function_edits)
+        with open(os.path.join(directory, 'saida', 'programa.py')) as output:
+            assert output.read() == transpile(sources[-1]).python_code + '\n'
+
+        sources = [f'var total = {edit};\n' + edited for edit in range(1, edits + 1)]
+        top_level_edits = measure(watcher, path, sources)
+        assert expected.python_code
+
+        function_median = statistics.median(latency for latency, _, _ in function_edits)
+        top_level_median = statistics.median(latency for latency, _, _ in top_level_edits)
+        print(f"transpile() do arquivo inteiro:   {full * 1e3:8.1f} ms")
+        print(f"edição no corpo de uma função:    {function_median * 1e3:8.1f} ms (mediana), "
+              f"máx {max(latency for latency, _, _ in function_edits) * 1e3:.1f} ms")
+        print(f"edição no nível superior:         {top_level_median * 1e3:8.1f} ms (mediana)")
+        print(f"ganho na edição de função: {full / function_median:.1f}x")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
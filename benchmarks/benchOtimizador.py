@@ -0,0 +1,55 @@
+# Tempo de cada passo do Otimizador por nível e o efeito no código gerado:
+# linhas emitidas e tempo de execução do módulo Python resultante.
+#
+#   python -m benchmarks.benchOtimizador [funcoes]
+import sys
+import time
+
+from analiseLexica import AnalisadorLexicoJS
+from analiseSintatica import AnalisadorSintaticoJS
+from geradorDeCodigo import GeradorDeCodigoPythonFromJS
+from otimizador import PASSES_BY_LEVEL, Otimizador
+
+
+def make_source(functions):
+    parts = ['const LIMITE = 200;\nconst PASSO = 2 * 3 - 5;\nconst DEBUG = false;\n']
+    for i in range(functions):
+        parts.append(f'''
+function f{i}(a) {{
+    var total = 0;
+    for (var i = 0; i < LIMITE * 2; i = i + PASSO) {{
+        if (DEBUG && total > 10) {{
+            console.log("f{i}", total);
+        }}
+        total = total + a * (60 * 60 * 24) + i;
+    }}
+    while (DEBUG) {{
+        total = total - 1;
+    }}
+    return total;
+    console.log("inalcançável");
+}}
+f{i}({i});
+''')
+    return ''.join(parts)
+
+
+def main(functions=300):
+    source = make_source(functions)
+    print(f"funções: {functions}")
+    for level in range(len(PASSES_BY_LEVEL)):
+        ast = AnalisadorSintaticoJS(AnalisadorLexicoJS().iter_tokens(source)).parse()
+        optimizer = Otimizador(level)
+        ast = optimizer.optimize(ast)
+        python_code = GeradorDeCodigoPythonFromJS(ast).generate()
+        code = compile(python_code, '<js>', 'exec')
+        start = time.perf_counter()
+        exec(code, {})
+        elapsed = time.perf_counter() - start
+        passes = ', '.join(f"{name} {seconds * 1e3:.1f} ms" for name, seconds in optimizer.timings)
+        print(f"nível {level}: {len(python_code.splitlines()):6} linhas, execução {elapsed * 1e3:7.1f} ms"
+              f"   [{passes or 'sem passos'}]")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,141 @@
+# Suíte de regressão: um corpus gerado com semente fixa (uma forma de
+# programa por entrada, ver geradorDeCorpus) passa pelo pipeline medido etapa
+# por etapa (Instrumentacao, sem tracemalloc) e de ponta a ponta
+# (transpile()). Cada tempo é o menor de várias repetições, com o coletor de
+# lixo desligado como no timeit: o custo dele depende de tudo que o processo
+# tem vivo, não só da etapa medida.
+#
+# --salvar grava os tempos num baseline JSON; --comparar falha (código 1) se
+# alguma etapa ficou mais lenta que o baseline além do limite relativo e de
+# MIN_DELTA, para ruído em etapas curtas não reprovar.
+#
+#   python -m benchmarks.benchRegressao --salvar baseline.json
+#   python -m benchmarks.benchRegressao --comparar baseline.json [--limite 0.25]
+import argparse
+import gc
+import hashlib
+import json
+import platform
+import sys
+import time
+
+from analiseLexica import create_lexer
+from benchmarks.geradorDeCorpus import generate
+from instrumentacao import Instrumentacao
+from transpilador import options_with_defaults, transpile
+
+CORPUS = (('funcoes', 300), ('aninhado', 10), ('expressoes', 40), ('arrays', 10), ('misto', 150))
+MIN_DELTA = 0.001
+
+
+def corpus(seed, scale):
+    for shape, size in CORPUS:
+        yield shape, generate(shape, max(1, int(size * scale)), seed)
+
+
+def measure(source, tokenizer, options, repeats):
+    times = {}
+    for _ in range(repeats):
+        gc.collect()
+        gc.disable()
+        try:
+            timed_run(source, tokenizer, options, times)
+        finally:
+            gc.enable()
+    return times
+
+
+def timed_run(source, tokenizer, options, times):
+    instrumentation = Instrumentacao(memory=False)
+    transpile(source, tokenizer, instrumentation=instrumentation, **options)
+    for stage in instrumentation.stages:
+        times[stage.name] = min(times.get(stage.name, stage.seconds), stage.seconds)
+    start = time.perf_counter()
+    transpile(source, tokenizer, **options)
+    elapsed = time.perf_counter() - start
+    times['total'] = min(times.get('total', elapsed), elapsed)
+
+
+def run(seed, scale, repeats, options):
+    tokenizer = create_lexer(options['lexer'])
+    meta = {'python': platform.python_version(), 'seed': seed, 'scale': scale,
+            'repeats': repeats, 'options': options, 'corpus': {}}
+    results = {}
+    for shape, source in corpus(seed, scale):
+        meta['corpus'][shape] = {
+            'bytes': len(source),
+            'digest': hashlib.sha256(source.encode()).hexdigest()[:16],
+        }
+        results[shape] = measure(source, tokenizer, options, repeats)
+    return {'meta': meta, 'results': results}
+
+
+def compare(baseline, current, limit):
+    # Devolve as linhas do relatório e quantas etapas regrediram
+    lines = [f"{'forma':11} {'etapa':36} {'base ms':>9} {'agora ms':>9} {'razão':>7}"]
+    regressions = 0
+    for shape, stages in current['results'].items():
+        base_stages = baseline['results'].get(shape, {})
+        for stage, seconds in stages.items():
+            base = base_stages.get(stage)
+            if base is None:
+                lines.append(f"{shape:11} {stage:36} {'-':>9} {seconds * 1e3:9.2f}         nova")
+                continue
+            ratio = seconds / base if base else float('inf')
+            mark = ''
+            if ratio > 1 + limit and seconds - base > MIN_DELTA:
+                mark = 'REGRESSÃO'
+                regressions += 1
+            elif ratio < 1 - limit and base - seconds > MIN_DELTA:
+                mark = 'melhora'
+            lines.append(f"{shape:11} {stage:36} {base * 1e3:9.2f} {seconds * 1e3:9.2f} {ratio:7.2f}  {mark}")
+    return lines, regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Tempos por etapa num corpus gerado, contra um baseline.")
+    parser.add_argument('--salvar', metavar='ARQUIVO', help="grava os tempos como baseline")
+    parser.add_argument('--comparar', metavar='ARQUIVO', help="compara com um baseline gravado")
+    parser.add_argument('--limite', type=float, default=0.25, help="piora relativa tolerada (0.25 = 25%%)")
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--escala', type=float, default=1.0, help="multiplica o tamanho de cada forma")
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--nivel', type=int, default=2)
+    parser.add_argument('--lexer', choices=('ply', 'scanner'), default='ply')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    options = options_with_defaults({'lexer': args.lexer, 'level': args.nivel})
+    baseline = None
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as input_file:
+            baseline = json.load(input_file)
+        # O baseline define o corpus e as opções; só o número de repetições pode mudar
+        meta = baseline['meta']
+        args.semente, args.escala, options = meta['seed'], meta['scale'], meta['options']
+    current = run(args.semente, args.escala, args.repeticoes, options)
+    if baseline is not None and baseline['meta']['corpus'] != current['meta']['corpus']:
+        print("O corpus gerado mudou desde o baseline; grave um novo com --salvar", file=sys.stderr)
+        return 2
+    if args.salvar:
+        with open(args.salvar, 'w', encoding='utf-8') as output:
+            json.dump(current, output, indent=1)
+    if baseline is None:
+        for shape, stages in current['results'].items():
+            size = current['meta']['corpus'][shape]['bytes']
+            print(f"{shape} ({size / 1e3:.0f} kB): " +
+                  ', '.join(f"{stage} {seconds * 1e3:.2f} ms" for stage, seconds in stages.items()))
+        return 0
+    lines, regressions = compare(baseline, current, args.limite)
+    print('\n'.join(lines))
+    if regressions:
+        print(f"{regressions} etapa(s) mais lenta(s) que o baseline além de {args.limite:.0%}")
+        return 1
+    print("sem regressões")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
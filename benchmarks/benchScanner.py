@@ -0,0 +1,60 @@
+# Compara o ScannerJS com o AnalisadorLexicoJS (PLY): primeiro confere que os
+# dois produzem exatamente a mesma sequência de tokens, depois mede MB/s.
+#
+#   python -m benchmarks.benchScanner [repeticoes]
+import sys
+import time
+
+from analiseLexica import create_lexer
+
+AMOSTRAS = [
+    'var format = 1; let iffy = format + 2; const returned = "for";',
+    'function forEach(whilst, prompter) { return whilst >= prompter && true || false; }',
+    'console.log("a \\"b\\" c", prompt("x"), myconsole.log, console.logger);',
+    'for (var i = 0; i <= 10; i = i + 1) {\n  if (i != 3) { x[i] = i * 2 / 1 - 4; }\n}\n',
+    'a == b; a = b; a <= b; a < b; !a; a & b; a | b; @ # "aberta',
+]
+
+CODIGO = '''
+function fibonnaci_iterativo(n){
+    let start = 1;
+    let anterior = 0;
+    for (var i = 0; i < n; i = i + 1){
+        start = start + anterior;
+        anterior = start;
+    }
+    console.log("resultado:", start, [1, 2, 3].length);
+}
+'''
+
+
+def signature(tokens):
+    return [(tok.type, tok.value, tok.lineno, tok.lexpos) for tok in tokens]
+
+
+def check_equivalence():
+    ply, scanner = create_lexer('ply'), create_lexer('scanner')
+    for code in AMOSTRAS + [CODIGO]:
+        expected = signature(ply.tokenize(code))
+        got = signature(scanner.tokenize(code))
+        assert got == expected, f"divergência em {code!r}:\n{expected}\n{got}"
+
+
+def throughput(backend, code):
+    lexer = create_lexer(backend)
+    start = time.perf_counter()
+    count = sum(1 for _ in lexer.iter_tokens(code))
+    elapsed = time.perf_counter() - start
+    return len(code.encode()) / elapsed / 1e6, count
+
+
+def main(repeat=2000):
+    check_equivalence()
+    code = CODIGO * repeat
+    for backend in ('ply', 'scanner'):
+        mb_s, count = throughput(backend, code)
+        print(f"{backend:8} {mb_s:7.2f} MB/s ({count} tokens)")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
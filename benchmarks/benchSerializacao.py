@@ -0,0 +1,90 @@
+# AST serializado contra analisar o JS de novo: tamanho, tempo de codificar,
+# de decodificar tudo e de abrir o arquivo com mmap e decodificar um único
+# filho da raiz. Confere a volta completa (tipos, valores, linhas, campos
+# ausentes, kind e bindings) na saída do parser e na árvore já analisada e
+# otimizada, e que o código gerado a partir da árvore decodificada é o mesmo
+# de transpile().
+#
+#   python -m benchmarks.benchSerializacao [escala]
+import os
+import sys
+import tempfile
+import time
+
+from analiseLexica import create_lexer
+from analiseSemantica import AnalisadorSemanticoJS
+from analiseSintatica import AnalisadorSintaticoJS
+from benchmarks.benchAST import make_source
+from benchmarks.geradorDeCorpus import generate
+from otimizador import Otimizador
+from serializacaoAST import decode, dump, encode, load
+from transpilador import transpile, transpile_ast
+
+
+def assert_same(expected, actual):
+    stack = [(expected, actual)]
+    while stack:
+        a, b = stack.pop()
+        assert a.__class__ is b.__class__, (a.__class__, b.__class__)
+        assert (a.type, a.value, a.value.__class__, a.lineno) == (b.type, b.value, b.value.__class__, b.lineno)
+        assert getattr(a, 'kind', None) == getattr(b, 'kind', None)
+        assert getattr(a, 'binding', None) == getattr(b, 'binding', None)
+        for field in getattr(a.__class__, 'fields', ()):
+            assert (getattr(a, field) is None) == (getattr(b, field) is None), field
+        assert len(a.children) == len(b.children)
+        stack.extend(zip(a.children, b.children))
+
+
+def best(function, repeats=3):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def programs(scale):
+    yield 'make_source', make_source(int(500 * scale))
+    for shape, size in (('funcoes', 300), ('aninhado', 10), ('expressoes', 40), ('arrays', 10)):
+        yield shape, generate(shape, max(1, int(size * scale)))
+
+
+def main(scale=1):
+    tokenizer = create_lexer('ply')
+    scanner = create_lexer('scanner')
+    print(f"{'programa':12} {'JS kB':>7} {'bin kB':>7} {'ply+parse':>10} {'scanner':>9} "
+          f"{'codifica':>9} {'decodifica':>10} {'ganho':>6} {'1 trecho':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, source in programs(scale):
+            parse_seconds, ast = best(lambda: AnalisadorSintaticoJS(tokenizer.iter_tokens(source)).parse())
+            scanner_seconds, _ = best(lambda: AnalisadorSintaticoJS(scanner.iter_tokens(source)).parse())
+            encode_seconds, data = best(lambda: encode(ast))
+            decode_seconds, decoded = best(lambda: decode(data))
+            assert_same(ast, decoded)
+
+            # Da árvore decodificada até o código, sem lexer nem parser
+            assert transpile_ast(decoded).python_code == transpile(source).python_code
+
+            analyzed = AnalisadorSintaticoJS(tokenizer.iter_tokens(source)).parse()
+            AnalisadorSemanticoJS(analyzed).visit(analyzed)
+            analyzed = Otimizador().optimize(analyzed)
+            assert_same(analyzed, decode(encode(analyzed)))
+
+            path = os.path.join(directory, f'{name}.jsast')
+            dump(ast, path)
+            middle = len(ast.children) // 2
+
+            def lazy():
+                with load(path) as tree:
+                    return tree.statement(middle)
+
+            lazy_seconds, statement = best(lazy)
+            assert_same(ast.children[middle], statement)
+            print(f"{name:12} {len(source) / 1e3:7.0f} {len(data) / 1e3:7.0f} {parse_seconds * 1e3:8.1f}ms "
+                  f"{scanner_seconds * 1e3:7.1f}ms {encode_seconds * 1e3:7.1f}ms {decode_seconds * 1e3:8.1f}ms "
+                  f"{parse_seconds / decode_seconds:5.1f}x {lazy_seconds * 1e3:7.2f}ms")
+
+
+if __name__ == '__main__':
+    main(*map(float, sys.argv[1:]))
@@ -0,0 +1,135 @@
+# Carga no servidor de transpilação: um processo `main.py --servidor` num
+# socket Unix e vários clientes asyncio, cada um mandando um pedido e
+# esperando a resposta antes do próximo. Mostra latência p50/p99 e pedidos/s,
+# depois um cliente que manda tudo de uma vez (a contrapressão segura a fila),
+# e compara com um interpretador novo por arquivo.
+#
+#   python -m benchmarks.benchServidor [clientes] [pedidos_por_cliente] [processos]
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.benchAST import make_source
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'main.py')
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def client(path, sources, latencies):
+    reader, writer = await asyncio.open_unix_connection(path)
+    for i, source in enumerate(sources):
+        start = time.perf_counter()
+        writer.write(json.dumps({'id': i, 'source': source}).encode() + b'\n')
+        await writer.drain()
+        response = json.loads(await reader.readline())
+        latencies.append(time.perf_counter() - start)
+        assert response['id'] == i and 'python_code' in response, response
+    writer.close()
+    await writer.wait_closed()
+
+
+async def closed_loop(path, clients, requests):
+    latencies = []
+    sources = [make_source(1 + i % 8) for i in range(requests)]
+    start = time.perf_counter()
+    await asyncio.gather(*(client(path, sources, latencies) for _ in range(clients)))
+    return latencies, time.perf_counter() - start
+
+
+async def burst(path, requests):
+    # Escreve todos os pedidos sem esperar; as respostas são lidas em paralelo
+    reader, writer = await asyncio.open_unix_connection(path)
+    source = make_source(4)
+    start = time.perf_counter()
+
+    async def send():
+        for i in range(requests):
+            writer.write(json.dumps({'id': i, 'source': source}).encode() + b'\n')
+            await writer.drain()
+
+    sender = asyncio.create_task(send())
+    seen = set()
+    for _ in range(requests):
+        seen.add(json.loads(await reader.readline())['id'])
+    await sender
+    writer.close()
+    await writer.wait_closed()
+    assert seen == set(range(requests))
+    return time.perf_counter() - start
+
+
+def wait_for_socket(path, server, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(path):
+        if server.poll() is not None or time.monotonic() > deadline:
+            raise RuntimeError("servidor não subiu")
+        time.sleep(0.01)
+
+
+def cold_runs(directory, runs=5):
+    # Um interpretador novo por arquivo: startup, import do ply e tabelas
+    path = os.path.join(directory, 'arquivo.js')
+    with open(path, 'w') as output:
+        output.write(make_source(4))
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, MAIN, path, '-o', os.path.join(directory, 'frio'), '-j', '1'],
+                       check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+async def closed_loop_single(directory):
+    # Latência de um pedido isolado num servidor já aquecido
+    path = os.path.join(directory, 'unico.sock')
+    server = await asyncio.create_subprocess_exec(sys.executable, MAIN, '--servidor', path,
+                                                  stderr=asyncio.subprocess.DEVNULL)
+    try:
+        while not os.path.exists(path):
+            await asyncio.sleep(0.01)
+        latencies = []
+        await client(path, [make_source(4)] * 50, latencies)
+        return statistics.median(latencies)
+    finally:
+        server.terminate()
+        await server.wait()
+
+
+def main(clients=8, requests=200, workers=0):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'servidor.sock')
+        command = [sys.executable, MAIN, '--servidor', path, '--pendentes', '16']
+        if workers:
+            command += ['-j', str(workers)]
+        start = time.perf_counter()
+        server = subprocess.Popen(command, stderr=subprocess.DEVNULL)
+        try:
+            wait_for_socket(path, server)
+            print(f"servidor pronto em {(time.perf_counter() - start) * 1e3:.0f} ms")
+            latencies, seconds = asyncio.run(closed_loop(path, clients, requests))
+            print(f"{clients} clientes x {requests} pedidos: {len(latencies) / seconds:.0f} pedidos/s, "
+                  f"p50 {percentile(latencies, 0.5) * 1e3:.2f} ms, p99 {percentile(latencies, 0.99) * 1e3:.2f} ms")
+            burst_requests = clients * requests
+            seconds = asyncio.run(burst(path, burst_requests))
+            print(f"rajada de {burst_requests} pedidos numa conexão: {burst_requests / seconds:.0f} pedidos/s")
+        finally:
+            server.terminate()
+            server.wait()
+        cold = cold_runs(directory)
+        single = asyncio.run(closed_loop_single(directory))
+        print(f"interpretador novo por arquivo: {cold * 1e3:.0f} ms; "
+              f"pelo servidor, um cliente: {single * 1e3:.2f} ms ({cold / single:.0f}x)")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
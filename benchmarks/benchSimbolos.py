@@ -0,0 +1,59 @@
+# Análise semântica com a tabela de escopos: tempo e pico de memória
+# (tracemalloc) da análise conforme o programa cresce, e o maior número de
+# símbolos locais vivos ao mesmo tempo, que acompanha a profundidade de
+# escopos e não o total de declarações.
+#
+#   python -m benchmarks.benchSimbolos [funcoes]
+import sys
+import time
+import tracemalloc
+
+from analiseLexica import AnalisadorLexicoJS
+from analiseSemantica import BUILTINS, AnalisadorSemanticoJS
+from analiseSintatica import AnalisadorSintaticoJS
+from benchmarks.benchAST import make_source
+from tabelaDeSimbolos import TabelaDeSimbolos
+
+
+class TabelaContada(TabelaDeSimbolos):
+    # Conta os símbolos fora do escopo global a cada declaração
+    max_locals = 0
+
+    def declare(self, name, kind, initialized=False, params=None):
+        symbol = super().declare(name, kind, initialized, params)
+        live = 0
+        scope = self.scope
+        while scope.parent is not None:
+            live += len(scope.names)
+            scope = scope.parent
+        self.max_locals = max(self.max_locals, live)
+        return symbol
+
+
+def max_locals(ast):
+    analyzer = AnalisadorSemanticoJS(ast)
+    analyzer.symbol_table = TabelaContada()
+    for name, kind, params in BUILTINS:
+        analyzer.symbol_table.declare(name, kind, True, params)
+    analyzer.visit(ast)
+    return analyzer.symbol_table.max_locals, len(analyzer.symbol_table.scope.names)
+
+
+def main(functions=2000):
+    for count in (functions // 4, functions):
+        ast = AnalisadorSintaticoJS(AnalisadorLexicoJS().iter_tokens(make_source(count))).parse()
+        analyzer = AnalisadorSemanticoJS(ast)
+        tracemalloc.start()
+        start = time.perf_counter()
+        analyzer.visit(ast)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert not analyzer.errors, analyzer.errors[:3]
+        local_symbols, global_symbols = max_locals(ast)
+        print(f"funções {count:6}: {elapsed * 1e3:7.1f} ms, pico {peak / 1024:8.1f} KiB, "
+              f"{global_symbols} globais, no máximo {local_symbols} locais vivos")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
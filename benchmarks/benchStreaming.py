@@ -0,0 +1,40 @@
+# Pico de memória (tracemalloc) da análise sintática consumindo a lista
+# completa de tokens versus o gerador AnalisadorLexicoJS.iter_tokens.
+#
+#   python -m benchmarks.benchStreaming [declaracoes]
+import sys
+import tracemalloc
+
+from analiseLexica import AnalisadorLexicoJS
+from analiseSintatica import AnalisadorSintaticoJS
+
+
+def make_source(statements):
+    return ''.join(f"console.log({i} + {i} * 2);\n" for i in range(statements))
+
+
+def peak(parse):
+    tracemalloc.start()
+    parse()
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak_bytes
+
+
+def main(statements=20000):
+    code = make_source(statements)
+    lexer = AnalisadorLexicoJS()
+
+    def from_list():
+        AnalisadorSintaticoJS(lexer.tokenize(code)).parse()
+
+    def from_generator():
+        AnalisadorSintaticoJS(lexer.iter_tokens(code)).parse()
+
+    print(f"declarações: {statements} ({len(code) / 1e6:.2f} MB)")
+    print(f"lista de tokens: {peak(from_list) / 1e6:8.2f} MB de pico")
+    print(f"iter_tokens:     {peak(from_generator) / 1e6:8.2f} MB de pico")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,107 @@
+# Tempo de execução do código gerado sem e com a inferência de tipos
+# (opção types do transpilador), e o custo dela na transpilação de um corpus
+# gerado. Sem ela, programas que somam strings e números ou usam o valor de
+# prompt como número levantam TypeError; com ela, a saída confere com a que
+# o programa deve imprimir.
+#
+#   python -m benchmarks.benchTipos [voltas] [repeticoes]
+import gc
+import sys
+import time
+
+from analiseLexica import create_lexer
+from benchmarks.geradorDeCorpus import generate
+from transpilador import transpile
+
+# (programa, resposta de cada prompt); {n} é o número de voltas
+SOURCES = {
+    'testes': ('''
+function conta(n) {
+    var total = 0;
+    var i = 0;
+    while ((i < n) == true) {
+        if ((total > 1000) != true && (i < n / 2) == true) {
+            total = total + i;
+        } else {
+            total = total - 1;
+        }
+        i = i + 1;
+    }
+    return total;
+}
+console.log(conta({n}));
+''', None),
+    'texto': ('''
+var linha = "";
+for (var i = 0; i < {n}; i = i + 1) {
+    linha = "item " + i + ": " + (i * 2) + " par " + (i / 2 == 0);
+}
+console.log(linha);
+''', None),
+    'entrada': ('''
+var voltas = prompt("Quantas voltas?");
+var limite = prompt("Limite?");
+var soma = 0;
+for (var i = 0; i < voltas; i = i + 1) {
+    if (i * 2 < limite) {
+        soma = soma + i;
+    }
+}
+console.log("Soma: " + soma);
+''', '{n}'),
+}
+
+
+def best(function, repeats):
+    times = []
+    for _ in range(repeats):
+        gc.collect()
+        gc.disable()
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+        gc.enable()
+    return min(times), result
+
+
+def execute(code, answer):
+    output = []
+    namespace = {'print': lambda *args: output.append(' '.join(map(str, args))),
+                 'input': lambda message='': answer}
+    try:
+        exec(code, namespace)
+    except Exception as error:
+        return f"{error.__class__.__name__}: {error}"
+    return output
+
+
+def runtime(source, answer, repeats, types):
+    code = compile(transpile(source, types=types).python_code, '<js>', 'exec')
+    return best(lambda: execute(code, answer), repeats)
+
+
+def main(turns=100000, repeats=5):
+    for name, (source, answer) in SOURCES.items():
+        source = source.replace('{n}', str(turns))
+        answer = answer and answer.replace('{n}', str(turns))
+        plain, plain_output = runtime(source, answer, repeats, False)
+        typed, typed_output = runtime(source, answer, repeats, True)
+        assert isinstance(typed_output, list), typed_output
+        if isinstance(plain_output, str):
+            print(f"{name:10} sem tipos: {plain_output}; com tipos: {typed * 1e3:8.1f} ms")
+            continue
+        assert plain_output == typed_output, (plain_output, typed_output)
+        print(f"{name:10} sem tipos: {plain * 1e3:8.1f} ms, com tipos: {typed * 1e3:8.1f} ms "
+              f"({(typed / plain - 1) * 100:+.1f}%)")
+
+    tokenizer = create_lexer('scanner')
+    for shape in ('funcoes', 'misto'):
+        source = generate(shape, 200)
+        plain, _ = best(lambda: transpile(source, tokenizer, types=False), repeats)
+        typed, _ = best(lambda: transpile(source, tokenizer, types=True), repeats)
+        print(f"transpilação {shape:8} sem tipos: {plain * 1e3:8.1f} ms, com tipos: {typed * 1e3:8.1f} ms "
+              f"({(typed / plain - 1) * 100:+.1f}%)")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,57 @@
+# Bytes por token, e tempo da análise sintática: lista de LexToken do PLY
+# versus BufferDeTokens (lido pelo parser sem criar objetos Token).
+#
+#   python -m benchmarks.benchTokens [declaracoes] [repeticoes]
+import gc
+import sys
+import time
+import tracemalloc
+
+from analiseLexica import AnalisadorLexicoJS
+from analiseSintatica import AnalisadorSintaticoJS
+from bufferDeTokens import BufferDeTokens
+
+
+def make_source(statements):
+    return ''.join(f"var v{i % 500} = prompt(\"x\") + {i} * 2;\n" for i in range(statements))
+
+
+def retained(build):
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def best(function, repeats):
+    times = []
+    for _ in range(repeats):
+        gc.collect()
+        gc.disable()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+        gc.enable()
+    return min(times)
+
+
+def main(statements=20000, repeats=5):
+    code = make_source(statements)
+    lexer = AnalisadorLexicoJS()
+    tokens, list_bytes = retained(lambda: lexer.tokenize(code))
+    buffer, buffer_bytes = retained(lambda: BufferDeTokens.from_tokens(lexer.iter_tokens(code)))
+    count = len(buffer)
+    assert count == len(tokens)
+    print(f"tokens: {count}")
+    print(f"lista de LexToken: {list_bytes / count:7.1f} bytes/token")
+    print(f"BufferDeTokens:    {buffer_bytes / count:7.1f} bytes/token")
+    assert repr(AnalisadorSintaticoJS(buffer).parse()) == repr(AnalisadorSintaticoJS(tokens).parse())
+    from_list = best(lambda: AnalisadorSintaticoJS(tokens).parse(), repeats)
+    from_buffer = best(lambda: AnalisadorSintaticoJS(buffer).parse(), repeats)
+    print(f"análise sintática da lista:  {from_list * 1e3:8.1f} ms")
+    print(f"análise sintática do buffer: {from_buffer * 1e3:8.1f} ms ({(from_buffer / from_list - 1) * 100:+.1f}%)")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,60 @@
+# Nós visitados por segundo: despacho pela tabela da classe (VisitanteAST)
+# versus o antigo getattr(self, f'visit_{node.type}') a cada nó.
+#
+#   python -m benchmarks.benchVisitante [funcoes]
+import gc
+import sys
+import time
+from types import GeneratorType
+
+from analiseLexica import AnalisadorLexicoJS
+from analiseSintatica import AnalisadorSintaticoJS
+from benchmarks.benchAST import count_nodes, make_source
+from geradorDeCodigo import GeradorDeCodigoPythonFromJS
+
+
+class GetattrGerador(GeradorDeCodigoPythonFromJS):
+    # Mesmo laço de VisitanteAST.visit, mas resolvendo o método por getattr
+    def visit(self, node, *args):
+        stack = []
+        while True:
+            result = getattr(self, f'visit_{node.type}', self.generic_visit)(node, *args)
+            if result.__class__ is GeneratorType:
+                stack.append(result)
+                result = None
+            while stack:
+                try:
+                    request = stack[-1].send(result)
+                except StopIteration as stop:
+                    stack.pop()
+                    result = stop.value
+                    continue
+                node, args = request[0], request[1:]
+                break
+            else:
+                return result
+
+
+def nodes_per_second(generator_class, ast, nodes, repeat=7):
+    best = float('inf')
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            generator_class(ast).generate()
+            best = min(best, time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return nodes / best
+
+
+def main(functions=2000):
+    ast = AnalisadorSintaticoJS(AnalisadorLexicoJS().iter_tokens(make_source(functions))).parse()
+    nodes = count_nodes(ast)
+    print(f"nós: {nodes}")
+    print(f"getattr por nó:    {nodes_per_second(GetattrGerador, ast, nodes):12,.0f} nós/s")
+    print(f"tabela de despacho:{nodes_per_second(GeradorDeCodigoPythonFromJS, ast, nodes):12,.0f} nós/s")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
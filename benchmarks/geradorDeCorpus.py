@@ -0,0 +1,279 @@
+# Gerador de programas JS sintéticos para os benchmarks, na gramática que o
+# AnalisadorSintaticoJS aceita. A mesma semente gera sempre o mesmo texto.
+# Os programas passam pela análise semântica sem erros: todo nome é usado
+# só depois de declarado e inicializado, no escopo em que foi declarado, e
+# toda chamada tem o número certo de argumentos. Não são feitos para rodar.
+#
+# Formas:
+#   funcoes     muitas funções pequenas com laços, ifs e chamadas entre si
+#   aninhado    torres de blocos if/while/for aninhados
+#   expressoes  cadeias longas de operadores e parênteses
+#   arrays      literais de array enormes e acessos a eles
+#   misto       um pouco de cada
+#
+#   python -m benchmarks.geradorDeCorpus forma tamanho [semente]
+import random
+import sys
+
+ARITHMETIC = ('+', '-', '*', '/')
+COMPARISONS = ('==', '!=', '<', '<=', '>', '>=')
+LOGICAL = ('&&', '||')
+
+class GeradorDeProgramas:
+    def __init__(self, seed=0, nesting=40, chain=200, elements=2000):
+        self.random = random.Random(seed)
+        self.nesting = nesting
+        self.chain = chain
+        self.elements = elements
+        self.lines = []
+        self.counter = 0
+        self.scopes = [[]]  # nomes numéricos visíveis, um nível por bloco
+        self.arrays = [[]]  # nomes de arrays visíveis, idem
+        self.functions = []  # (nome, aridade) das funções de nível superior já declaradas
+        self.read_only = set()  # constantes e contadores de laço: lidos, nunca atribuídos
+
+    def program(self, shape, size):
+        self.lines = []
+        generate = SHAPES[shape]
+        self.declare_globals()
+        for _ in range(size):
+            generate(self)
+        return '\n'.join(self.lines) + '\n'
+
+    # Nomes e escopos
+
+    def fresh(self, prefix):
+        self.counter += 1
+        return f'{prefix}{self.counter}'
+
+    def emit(self, indent, line):
+        self.lines.append('    ' * indent + line)
+
+    def enter(self):
+        self.scopes.append([])
+        self.arrays.append([])
+
+    def exit(self):
+        self.scopes.pop()
+        self.arrays.pop()
+
+    def visible(self):
+        return [name for scope in self.scopes for name in scope]
+
+    def visible_arrays(self):
+        return [name for scope in self.arrays for name in scope]
+
+    def declare(self, indent, expression=None):
+        name = self.fresh('v')
+        kind = self.random.choice(('var', 'let', 'const'))
+        self.emit(indent, f'{kind} {name} = {expression or self.expression()};')
+        self.scopes[-1].append(name)
+        if kind == 'const':
+            self.read_only.add(name)
+        return name
+
+    def loop_counter(self, prefix):
+        name = self.fresh(prefix)
+        self.read_only.add(name)
+        return name
+
+    def assignable(self):
+        return [name for name in self.visible() if name not in self.read_only]
+
+    def declare_globals(self):
+        for value in (3, 7, 11):
+            self.scopes[0].append(self.fresh('g'))
+            self.emit(0, f'var {self.scopes[0][-1]} = {value};')
+        name = self.fresh('lista')
+        self.emit(0, f'var {name} = [{", ".join(str(self.random.randrange(100)) for _ in range(8))}];')
+        self.arrays[0].append(name)
+
+    # Expressões
+
+    def operand(self):
+        roll = self.random.random()
+        names = self.visible()
+        arrays = self.visible_arrays()
+        if roll < 0.35 and names:
+            return self.random.choice(names)
+        if roll < 0.45 and arrays:
+            return f'{self.random.choice(arrays)}[{self.random.randrange(8)}]'
+        if roll < 0.5 and arrays:
+            return f'{self.random.choice(arrays)}.length'
+        if roll < 0.6 and self.functions:
+            name, arity = self.random.choice(self.functions)
+            return f'{name}({", ".join(self.atom() for _ in range(arity))})'
+        return self.atom()
+
+    def atom(self):
+        names = self.visible()
+        if names and self.random.random() < 0.5:
+            return self.random.choice(names)
+        return str(self.random.randrange(1, 100))
+
+    def expression(self, depth=2):
+        roll = self.random.random()
+        if depth == 0 or roll < 0.3:
+            return self.operand()
+        if roll < 0.4:
+            return f'({self.expression(depth - 1)})'
+        return f'{self.expression(depth - 1)} {self.random.choice(ARITHMETIC)} {self.expression(depth - 1)}'
+
+    def condition(self):
+        test = f'{self.expression(1)} {self.random.choice(COMPARISONS)} {self.expression(1)}'
+        roll = self.random.random()
+        if roll < 0.3:
+            test += f' {self.random.choice(LOGICAL)} {self.operand()} {self.random.choice(COMPARISONS)} {self.atom()}'
+        elif roll < 0.4:
+            test = f'({test}) {self.random.choice(("==", "!="))} {self.random.choice(("true", "false"))}'
+        return test
+
+    # Declarações
+
+    def simple_statement(self, indent):
+        roll = self.random.random()
+        targets = self.assignable()
+        if roll < 0.4 or not targets:
+            self.declare(indent)
+        elif roll < 0.8:
+            self.emit(indent, f'{self.random.choice(targets)} = {self.expression()};')
+        else:
+            self.emit(indent, f'console.log("{self.fresh("msg")}", {self.expression(1)});')
+
+    def compound_statement(self, indent, body):
+        # Um if/else, while ou for cujo corpo é gerado por body(indent + 1)
+        roll = self.random.random()
+        if roll < 0.4:
+            self.emit(indent, f'if ({self.condition()}) {{')
+            self.block(indent, body)
+            if self.random.random() < 0.5:
+                self.emit(indent, '} else {')
+                self.block(indent, body)
+            self.emit(indent, '}')
+        elif roll < 0.7:
+            counter = self.loop_counter('w')
+            self.emit(indent, f'var {counter} = 0;')
+            self.scopes[-1].append(counter)
+            self.emit(indent, f'while ({counter} < {self.random.randrange(2, 10)}) {{')
+            self.block(indent, body, f'{counter} = {counter} + 1;')
+            self.emit(indent, '}')
+        else:
+            index = self.loop_counter('i')
+            self.emit(indent, f'for (var {index} = 0; {index} < {self.operand()}; {index} = {index} + 1) {{')
+            self.enter()
+            self.scopes[-1].append(index)
+            body(indent + 1)
+            self.exit()
+            self.emit(indent, '}')
+
+    def block(self, indent, body, last=None):
+        self.enter()
+        body(indent + 1)
+        if last is not None:
+            self.emit(indent + 1, last)
+        self.exit()
+
+    def statements(self, indent, count):
+        for _ in range(count):
+            if self.random.random() < 0.25:
+                self.compound_statement(indent, lambda inner: self.statements(inner, 2))
+            else:
+                self.simple_statement(indent)
+
+    # Formas
+
+    def function(self):
+        name = self.fresh('f')
+        arity = self.random.randrange(4)
+        params = [self.fresh('p') for _ in range(arity)]
+        self.emit(0, f'function {name}({", ".join(params)}) {{')
+        # O corpo só vê os globais, os parâmetros e o que declarar
+        saved = self.scopes, self.arrays
+        self.scopes, self.arrays = [list(saved[0][0]), params], [list(saved[1][0])]
+        self.statements(1, self.random.randrange(3, 8))
+        self.emit(1, f'return {self.expression()};')
+        self.scopes, self.arrays = saved
+        self.emit(0, '}')
+        self.functions.append((name, arity))
+
+    def nested(self):
+        # Uma torre de self.nesting blocos, iterativa: a profundidade pode
+        # passar do limite de recursão do gerador
+        closings = []
+        for depth in range(self.nesting):
+            self.simple_statement(depth)
+            roll = self.random.random()
+            if roll < 0.5:
+                self.emit(depth, f'if ({self.condition()}) {{')
+                closings.append((depth, None))
+            elif roll < 0.75:
+                counter = self.loop_counter('w')
+                self.emit(depth, f'var {counter} = 0;')
+                self.scopes[-1].append(counter)
+                self.emit(depth, f'while ({counter} < 3) {{')
+                closings.append((depth, f'{counter} = {counter} + 1;'))
+            else:
+                index = self.loop_counter('i')
+                self.emit(depth, f'for (var {index} = 0; {index} < 3; {index} = {index} + 1) {{')
+                closings.append((depth, None))
+                self.enter()
+                self.scopes[-1].append(index)
+                continue
+            self.enter()
+        self.simple_statement(self.nesting)
+        for depth, last in reversed(closings):
+            if last is not None:
+                self.emit(depth + 1, last)
+            self.exit()
+            self.emit(depth, '}')
+
+    def expression_chain(self):
+        terms = [self.atom()]
+        open_parens = 0
+        for _ in range(self.chain):
+            roll = self.random.random()
+            if roll < 0.1:
+                terms.append(f' {self.random.choice(ARITHMETIC)} (' + self.atom())
+                open_parens += 1
+            elif roll < 0.2 and open_parens:
+                terms.append(f') {self.random.choice(ARITHMETIC)} ' + self.atom())
+                open_parens -= 1
+            else:
+                terms.append(f' {self.random.choice(ARITHMETIC)} ' + self.operand())
+        self.declare(0, ''.join(terms) + ')' * open_parens)
+        if self.random.random() < 0.3:
+            comparisons = [f'{self.atom()} {self.random.choice(COMPARISONS)} {self.atom()}'
+                           for _ in range(self.chain // 10 + 1)]
+            self.declare(0, f' {self.random.choice(LOGICAL)} '.join(comparisons))
+
+    def array(self):
+        name = self.fresh('lista')
+        self.emit(0, f'var {name} = [{", ".join(self.atom() for _ in range(self.elements))}];')
+        self.arrays[0].append(name)
+        index = self.loop_counter('i')
+        self.emit(0, f'for (var {index} = 0; {index} < {name}.length; {index} = {index} + 1) {{')
+        self.emit(1, f'console.log({name}[{index}]);')
+        self.emit(0, '}')
+
+    def mixed(self):
+        generate = self.random.choice((GeradorDeProgramas.function, GeradorDeProgramas.function,
+                                       GeradorDeProgramas.top_level))
+        generate(self)
+
+    def top_level(self):
+        self.statements(0, 5)
+
+SHAPES = {
+    'funcoes': GeradorDeProgramas.function,
+    'aninhado': GeradorDeProgramas.nested,
+    'expressoes': GeradorDeProgramas.expression_chain,
+    'arrays': GeradorDeProgramas.array,
+    'misto': GeradorDeProgramas.mixed,
+}
+
+def generate(shape, size, seed=0, **parameters):
+    return GeradorDeProgramas(seed, **parameters).program(shape, size)
+
+if __name__ == '__main__':
+    shape, size, *seed = sys.argv[1:]
+    sys.stdout.write(generate(shape, int(size), *map(int, seed)))
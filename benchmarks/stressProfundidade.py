@@ -0,0 +1,43 @@
+# Estresse de profundidade: cadeias de 100k operadores, 100k parênteses
+# aninhados e 100k atribuições encadeadas passam por parser, análise
+# semântica, otimizador e gerador de código sem RecursionError. O repr é
+# conferido numa profundidade menor, já que sua saída indentada cresce com o
+# quadrado dela.
+#
+#   python -m benchmarks.stressProfundidade [profundidade]
+import sys
+import time
+
+from analiseSemantica import AnalisadorSemanticoJS
+from analiseSintatica import AnalisadorSintaticoJS
+from geradorDeCodigo import GeradorDeCodigoPythonFromJS
+from otimizador import Otimizador
+from scannerJS import ScannerJS
+
+
+def cases(depth):
+    yield 'cadeia +', 'var a = 1;\nvar b = ' + ' + '.join(['a'] * depth) + ';\n', 'b = ' + ' + '.join(['a'] * depth)
+    yield 'parênteses', 'var b = ' + '(' * depth + '1' + ')' * depth + ';\n', 'b = 1'
+    yield 'atribuições', 'var a = 1;\n' + ' = '.join(['a'] * depth) + ' = 2;\n', ' = '.join(['a'] * depth) + ' = 2'
+    yield 'cadeia mista', 'var a = 1;\nvar b = ' + ' - '.join(['a * a'] * depth) + ';\n', 'b = ' + ' - '.join(['a * a'] * depth)
+
+
+def main(depth=100_000):
+    for name, code, expected_last_line in cases(depth):
+        start = time.perf_counter()
+        ast = AnalisadorSintaticoJS(ScannerJS().iter_tokens(code)).parse()
+        analyzer = AnalisadorSemanticoJS(ast)
+        analyzer.visit(ast)
+        ast = Otimizador().optimize(ast)
+        python_code = GeradorDeCodigoPythonFromJS(ast).generate()
+        elapsed = time.perf_counter() - start
+        assert not analyzer.errors, analyzer.errors[:3]
+        assert python_code.splitlines()[-1] == expected_last_line, name
+        print(f"{name:14} profundidade {depth}: {elapsed:6.2f} s")
+
+    _, code, _ = next(cases(5 * sys.getrecursionlimit()))
+    repr(AnalisadorSintaticoJS(ScannerJS().iter_tokens(code)).parse())
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
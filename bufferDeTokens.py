@@ -0,0 +1,61 @@
+from array import array
+
+from analiseLexica import AnalisadorLexicoJS
+from scannerJS import Token
+
+# Tipo inteiro de cada token: o índice do nome em AnalisadorLexicoJS.tokens.
+# O AnalisadorSintaticoJS compara esses inteiros; END marca o fim do input
+TOKEN_NAMES = AnalisadorLexicoJS.tokens
+TOKEN_KINDS = {name: kind for kind, name in enumerate(TOKEN_NAMES)}
+END = len(TOKEN_NAMES)
+
+class BufferDeTokens:
+    # Tokens em "struct of arrays": tipo como inteiro em array('B'), posições em
+    # array('I') e valores internados numa tabela lateral.
+    def __init__(self):
+        self.kinds = array('B')
+        self.offsets = array('I')
+        self.lines = array('I')
+        self.value_ids = array('I')
+        self.values = []
+        self.value_index = {}
+
+    @classmethod
+    def from_tokens(cls, tokens):
+        buffer = cls()
+        for tok in tokens:
+            buffer.append(tok.type, tok.value, tok.lineno, tok.lexpos)
+        return buffer
+
+    def append(self, type, value, lineno, lexpos):
+        value_id = self.value_index.get(value)
+        if value_id is None:
+            value_id = self.value_index[value] = len(self.values)
+            self.values.append(value)
+        self.kinds.append(TOKEN_KINDS[type])
+        self.offsets.append(lexpos)
+        self.lines.append(lineno)
+        self.value_ids.append(value_id)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def kind(self, index):
+        return self.kinds[index]
+
+    def type(self, index):
+        return TOKEN_NAMES[self.kinds[index]]
+
+    def value(self, index):
+        return self.values[self.value_ids[index]]
+
+    def __getitem__(self, index):
+        return Token(TOKEN_NAMES[self.kinds[index]], self.values[self.value_ids[index]],
+                     self.lines[index], self.offsets[index])
+
+    def __iter__(self):
+        # Materializa um Token por vez, para quem precisa de objetos; o
+        # AnalisadorSintaticoJS lê os arrays direto
+        names, values = TOKEN_NAMES, self.values
+        for kind, value_id, lineno, lexpos in zip(self.kinds, self.value_ids, self.lines, self.offsets):
+            yield Token(names[kind], values[value_id], lineno, lexpos)
@@ -0,0 +1,223 @@
+import contextlib
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+import time
+import zlib
+
+from analiseLexica import create_lexer
+from diagnosticos import Diagnostico
+from mapaDeFontes import MapaDeFontes
+from transpilador import VERSION, ResultadoTranspilacao, options_with_defaults, transpile
+
+# Cache em disco endereçado pelo conteúdo: a chave é o sha256 da versão do
+# transpilador, das opções e do código JS. Cada entrada é um arquivo
+# comprimido com zlib em entries/ab/cdef...; o arquivo index guarda um
+# cabeçalho com contadores e um registro de tamanho fixo por entrada
+# (chave, bytes, último acesso), que é procurado direto no mmap. Com
+# diagnósticos a chave muda (o resultado também) e a entrada guarda os
+# registros, que um acerto devolve ao Diagnosticos de quem pediu.
+#
+# Escritas de entradas são atômicas (arquivo temporário + os.replace) e o
+# índice só é lido ou alterado com flock exclusivo no arquivo lock, então
+# vários processos podem usar o mesmo diretório. Quando o total passa de
+# max_bytes, as entradas acessadas há mais tempo são removidas.
+MAGIC = b'JSPYC\x00\x00\x01'
+HEADER = struct.Struct('<8sQQQ')  # magic, acertos, faltas, bytes das entradas
+RECORD = struct.Struct('<32sQQ')  # chave, bytes da entrada, último acesso (ns)
+ACCESSED = struct.Struct('<Q')
+ACCESSED_OFFSET = RECORD.size - ACCESSED.size
+# Depois de uma remoção o cache fica nesta fração de max_bytes, para não
+# remover a cada escrita
+LOW_WATER = 0.9
+
+class CacheDeTranspilacao:
+    def __init__(self, directory, max_bytes=64 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.entries_directory = os.path.join(directory, 'entries')
+        self.index_path = os.path.join(directory, 'index')
+        self.lock_path = os.path.join(directory, 'lock')
+        os.makedirs(self.entries_directory, exist_ok=True)
+        self.lexers = {}
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, source, options, diagnostics=None):
+        digest = hashlib.sha256()
+        digest.update(VERSION.encode())
+        digest.update(json.dumps(options, sort_keys=True).encode())
+        if diagnostics is not None:
+            digest.update(f'diagnostics:{diagnostics.limit}'.encode())
+        digest.update(source.encode('utf-8', 'surrogatepass'))
+        return digest.digest()
+
+    def entry_path(self, key):
+        name = key.hex()
+        return os.path.join(self.entries_directory, name[:2], name[2:])
+
+    def transpile(self, source, diagnostics=None, **options):
+        # Num acerto nenhuma etapa do transpilador roda
+        options = options_with_defaults(options)
+        key = self.key(source, options, diagnostics)
+        result = self.get(key, diagnostics)
+        if result is not None:
+            self.hits += 1
+            with self.index() as index:
+                index.touch(key, self.entry_size(key))
+            return result
+        self.misses += 1
+        tokenizer = self.lexers.get(options['lexer'])
+        if tokenizer is None:
+            tokenizer = self.lexers[options['lexer']] = create_lexer(options['lexer'])
+        start = len(diagnostics) if diagnostics is not None else 0
+        result = transpile(source, tokenizer, diagnostics=diagnostics, **options)
+        self.put(key, result, diagnostics.records[start:] if diagnostics is not None else ())
+        return result
+
+    def get(self, key, diagnostics=None):
+        try:
+            with open(self.entry_path(key), 'rb') as entry:
+                data = json.loads(zlib.decompress(entry.read()))
+        except (OSError, zlib.error, ValueError):
+            return None
+        if diagnostics is not None:
+            diagnostics.extend(Diagnostico.from_dict(record) for record in data['diagnostics'])
+        source_map = data.get('source_map')
+        if source_map is not None:
+            source_map = MapaDeFontes.from_dict(source_map)
+        return ResultadoTranspilacao(data['python_code'], data['errors'], source_map)
+
+    def entry_size(self, key):
+        try:
+            return os.path.getsize(self.entry_path(key))
+        except OSError:
+            return 0
+
+    def put(self, key, result, records=()):
+        data = zlib.compress(json.dumps(
+            {'python_code': result.python_code, 'errors': result.errors,
+             'diagnostics': [record.as_dict() for record in records],
+             'source_map': result.source_map.as_dict() if result.source_map is not None else None}).encode())
+        path = self.entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(descriptor, 'wb') as entry:
+                entry.write(data)
+            os.replace(temporary, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(temporary)
+            raise
+        with self.index() as index:
+            index.insert(key, len(data))
+            if index.total_bytes > self.max_bytes:
+                index.evict(int(self.max_bytes * LOW_WATER), self.entry_path)
+
+    @contextlib.contextmanager
+    def index(self):
+        with open(self.lock_path, 'a+b') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                with IndiceDoCache(self.index_path) as index:
+                    yield index
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def stats(self):
+        with self.index() as index:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'total_hits': index.hits,
+                'total_misses': index.misses,
+                'entries': index.count,
+                'bytes': index.total_bytes,
+            }
+
+class IndiceDoCache:
+    # O arquivo index aberto e mapeado; só é usado com o lock tomado
+    def __init__(self, path):
+        self.path = path
+        descriptor = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self.file = os.fdopen(descriptor, 'r+b')
+        header = self.file.read(HEADER.size)
+        if len(header) < HEADER.size or header[:len(MAGIC)] != MAGIC:
+            # Índice novo ou de outro formato: recomeça vazio
+            self.file.seek(0)
+            self.file.truncate()
+            self.file.write(HEADER.pack(MAGIC, 0, 0, 0))
+            self.file.flush()
+        self.map = mmap.mmap(self.file.fileno(), 0)
+        _, self.hits, self.misses, self.total_bytes = HEADER.unpack_from(self.map)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def count(self):
+        return (len(self.map) - HEADER.size) // RECORD.size
+
+    def close(self):
+        if self.map is not None:
+            HEADER.pack_into(self.map, 0, MAGIC, self.hits, self.misses, self.total_bytes)
+            self.map.close()
+            self.map = None
+        self.file.close()
+
+    def find(self, key):
+        position = self.map.find(key, HEADER.size)
+        while position >= 0 and (position - HEADER.size) % RECORD.size:
+            position = self.map.find(key, position + 1)
+        return position
+
+    def touch(self, key, size):
+        self.hits += 1
+        position = self.find(key)
+        if position < 0:
+            # Entrada gravada por um processo que morreu antes de indexá-la
+            self.append(key, size)
+        else:
+            ACCESSED.pack_into(self.map, position + ACCESSED_OFFSET, time.time_ns())
+
+    def insert(self, key, size):
+        self.misses += 1
+        position = self.find(key)
+        if position < 0:
+            self.append(key, size)
+        else:
+            # Outro processo gravou a mesma chave antes
+            _, old_size, _ = RECORD.unpack_from(self.map, position)
+            self.total_bytes += size - old_size
+            RECORD.pack_into(self.map, position, key, size, time.time_ns())
+
+    def append(self, key, size):
+        self.total_bytes += size
+        end = len(self.map)
+        self.map.resize(end + RECORD.size)
+        RECORD.pack_into(self.map, end, key, size, time.time_ns())
+
+    def evict(self, target_bytes, entry_path):
+        records = sorted(
+            (RECORD.unpack_from(self.map, position)
+             for position in range(HEADER.size, len(self.map), RECORD.size)),
+            key=lambda record: record[2])
+        kept = []
+        for key, size, accessed in records:
+            if self.total_bytes > target_bytes:
+                self.total_bytes -= size
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(entry_path(key))
+            else:
+                kept.append((key, size, accessed))
+        self.map.resize(HEADER.size + len(kept) * RECORD.size)
+        for i, record in enumerate(kept):
+            RECORD.pack_into(self.map, HEADER.size + i * RECORD.size, *record)
@@ -0,0 +1,94 @@
+import json
+
+# Diagnósticos estruturados de um arquivo: código, severidade, mensagem,
+# linha e coluna. Os analisadores léxico, sintático e semântico registram num
+# Diagnosticos em vez de imprimir ou parar no primeiro erro, quando recebem
+# um; sem ele, o comportamento antigo continua.
+#
+# Códigos: JS1xx léxicos, JS2xx sintáticos, JS3xx semânticos, JS900 limite
+# atingido.
+ERROR = 'erro'
+FATAL = 'fatal'
+
+# Erros por arquivo antes de a análise ser interrompida: uma entrada
+# patológica não pode gastar tempo e memória sem limite
+MAX_DIAGNOSTICS = 100
+
+class LimiteDeDiagnosticos(Exception):
+    pass
+
+class Diagnostico:
+    __slots__ = ('code', 'severity', 'message', 'line', 'column')
+
+    def __init__(self, code, severity, message, line=None, column=None):
+        self.code = code
+        self.severity = severity
+        self.message = message
+        self.line = line
+        self.column = column
+
+    def as_dict(self):
+        return {'code': self.code, 'severity': self.severity, 'message': self.message,
+                'line': self.line, 'column': self.column}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['code'], data['severity'], data['message'], data['line'], data['column'])
+
+    def format(self, path=''):
+        # caminho:linha:coluna: severidade código: mensagem, sem as partes que faltam
+        location = ':'.join(str(part) for part in (path, self.line, self.column) if part not in (None, ''))
+        return f"{location + ': ' if location else ''}{self.severity} {self.code}: {self.message}"
+
+    def __repr__(self):
+        return f"Diagnostico({self.format()!r})"
+
+class Diagnosticos:
+    # Coletor de um arquivo. source é o texto, quando ele está inteiro em
+    # memória: dá a coluna a partir do lexpos
+    def __init__(self, source=None, limit=MAX_DIAGNOSTICS):
+        self.source = source
+        self.limit = limit
+        self.records = []
+
+    def report(self, code, message, line=None, position=None, severity=ERROR):
+        column = None
+        if position is not None and self.source is not None:
+            column = position - self.source.rfind('\n', 0, position)
+        if len(self.records) >= self.limit:
+            self.records.append(Diagnostico(
+                'JS900', FATAL, f"Limite de {self.limit} diagnósticos atingido; análise interrompida", line, column))
+            raise LimiteDeDiagnosticos(self.limit)
+        self.records.append(Diagnostico(code, severity, message, line, column))
+
+    def shifted(self, lines, position):
+        # Visão para um trecho do texto que começa depois de lines quebras de
+        # linha e position caracteres (analiseLexicaEmBlocos)
+        return DiagnosticosDeslocados(self, lines, position)
+
+    def extend(self, records):
+        self.records.extend(records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __len__(self):
+        return len(self.records)
+
+class DiagnosticosDeslocados:
+    __slots__ = ('target', 'lines', 'position')
+
+    def __init__(self, target, lines, position):
+        self.target = target
+        self.lines = lines
+        self.position = position
+
+    def report(self, code, message, line=None, position=None, severity=ERROR):
+        self.target.report(code, message, None if line is None else line + self.lines,
+                           None if position is None else position + self.position, severity)
+
+def write_report(diagnostics_by_path, path):
+    # {caminho: [Diagnostico, ...]} num arquivo JSON
+    with open(path, 'w', encoding='utf-8') as output:
+        json.dump({'files': [{'path': file_path, 'diagnostics': [record.as_dict() for record in records]}
+                             for file_path, records in diagnostics_by_path.items()]}, output, indent=1)
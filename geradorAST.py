@@ -0,0 +1,252 @@
+import ast
+
+from analiseDeLacos import find_counted_loops
+from inferenciaDeTipos import BOOLEAN
+from tabelaDeSimbolos import hoisted, outer_assignments
+from visitanteAST import VisitanteAST
+
+# Contextos e operadores não têm estado nem posição; uma instância de cada é
+# compartilhada pela árvore toda, como o próprio CPython faz
+LOAD, STORE = ast.Load(), ast.Store()
+BINARY_OPERATORS = {'+': ast.Add(), '-': ast.Sub(), '*': ast.Mult(), '/': ast.Div()}
+COMPARISON_OPERATORS = {
+    '==': ast.Eq(), '!=': ast.NotEq(), '<': ast.Lt(), '<=': ast.LtE(), '>': ast.Gt(), '>=': ast.GtE(),
+}
+AND, OR, NOT = ast.And(), ast.Or(), ast.Not()
+ADD, SUB = BINARY_OPERATORS['+'], BINARY_OPERATORS['-']
+BUILTINS = {'console.log': 'print', 'prompt': 'input'}
+
+class GeradorDeASTPythonFromJS(VisitanteAST):
+    # Segundo backend: monta direto um ast.Module do Python a partir do AST JS,
+    # sem gerar texto para o CPython analisar de novo. As linhas dos nós Python
+    # são as linhas JS de onde vieram.
+    def __init__(self, ast_js, range_loops=True, types=None):
+        # types: um TiposInferidos (inferenciaDeTipos.py); dele vêm as mesmas
+        # especializações do gerador de texto: str() nas somas com strings,
+        # int() nos usos numéricos de prompt, x == true reduzido a x e os
+        # nomes inteiros nos limites de range()
+        self.ast = ast_js
+        self.range_loops = range_loops
+        self.types = types
+        self.counted_loops = {}
+        self.function_depth = 0
+        self.module = None
+
+    def generate(self):
+        if self.module is None:
+            if self.range_loops:
+                self.counted_loops = find_counted_loops(self.ast, types=self.types)
+            self.module = self.visit(self.ast)
+        return self.module
+
+    def compile(self, filename='<js>'):
+        return compile(self.generate(), filename, 'exec')
+
+    def unparse(self):
+        return ast.unparse(self.generate())
+
+    def located(self, py_node, js_node):
+        py_node.lineno = py_node.end_lineno = js_node.lineno or 1
+        py_node.col_offset = py_node.end_col_offset = 0
+        return py_node
+
+    def store(self, target):
+        target.ctx = STORE
+        return target
+
+    def call(self, name, args, js_node):
+        function = self.located(ast.Name(name, LOAD), js_node)
+        return self.located(ast.Call(function, args, []), js_node)
+
+    def operand(self, py_node, parent, js_node):
+        # Conversões de um operando pedidas pela inferência de tipos
+        if self.types is None:
+            return py_node
+        conversion = self.types.string_operand(parent, js_node)
+        if conversion is not None:
+            text = self.call('str', [py_node], js_node)
+            if conversion == BOOLEAN:
+                lower = self.located(ast.Attribute(text, 'lower', LOAD), js_node)
+                text = self.located(ast.Call(lower, [], []), js_node)
+            return text
+        if self.types.numeric_use(js_node):
+            return self.call('int', [py_node], js_node)
+        return py_node
+
+    def visit_Program(self, node):
+        body = []
+        for child in hoisted(node.children):
+            body.extend((yield child))
+        # Todo nó com posição já passou por located(), então não é preciso
+        # ast.fix_missing_locations (que percorre a árvore inteira em Python)
+        return ast.Module(body=body, type_ignores=[])
+
+    def visit_Block(self, node):
+        body = []
+        for child in hoisted(node.children):
+            body.extend((yield child))
+        return body or [self.located(ast.Pass(), node)]
+
+    def visit_VarDeclaration(self, node):
+        identifier = node.children[0]
+        if len(node.children) > 1:
+            value = yield node.children[1]
+        else:
+            value = self.located(ast.Constant(None), node)
+        target = self.located(ast.Name(identifier.value, STORE), identifier)
+        return [self.located(ast.Assign(targets=[target], value=value), node)]
+
+    def visit_FunctionDeclaration(self, node):
+        identifier, params, body = node.children
+        arguments = ast.arguments(
+            posonlyargs=[], args=[self.located(ast.arg(param.value), param) for param in params.children],
+            vararg=None, kwonlyargs=[], kw_defaults=[], kwarg=None, defaults=[])
+        self.function_depth += 1
+        declarations = []
+        global_names, nonlocal_names = outer_assignments(body, self.function_depth)
+        if global_names:
+            declarations.append(self.located(ast.Global(global_names), node))
+        if nonlocal_names:
+            declarations.append(self.located(ast.Nonlocal(nonlocal_names), node))
+        statements = yield body
+        self.function_depth -= 1
+        function = ast.FunctionDef(name=identifier.value, args=arguments, body=declarations + statements,
+                                   decorator_list=[], returns=None)
+        if 'type_params' in ast.FunctionDef._fields:
+            function.type_params = []
+        return [self.located(function, node)]
+
+    def visit_ExpressionStatement(self, node):
+        expression = node.children[0]
+        if expression.type == 'AssignmentExpression':
+            return [(yield from self.assignment_statement(expression))]
+        return [self.located(ast.Expr((yield expression)), node)]
+
+    def assignment_statement(self, node):
+        # a = b = c vira um único ast.Assign com vários alvos
+        statement = node
+        targets = []
+        while node.type == 'AssignmentExpression':
+            target, node = node.children
+            targets.append(self.store((yield target)))
+        return self.located(ast.Assign(targets=targets, value=(yield node)), statement)
+
+    def visit_ReturnStatement(self, node):
+        value = (yield node.children[0]) if node.children else None
+        return [self.located(ast.Return(value), node)]
+
+    def visit_IfStatement(self, node):
+        test = yield node.children[0]
+        body = yield node.children[1]
+        orelse = (yield node.children[2]) if len(node.children) > 2 else []
+        return [self.located(ast.If(test, body, orelse), node)]
+
+    def visit_WhileStatement(self, node):
+        test = yield node.children[0]
+        body = yield node.children[1]
+        return [self.located(ast.While(test, body, []), node)]
+
+    def visit_ForStatement(self, node):
+        # Mesma tradução do gerador de texto: inicialização, while e incremento
+        # no fim do corpo
+        loop = self.counted_loops.get(node)
+        if loop is not None:
+            return [self.located(ast.For(
+                target=self.located(ast.Name(loop.variable, STORE), node),
+                iter=(yield from self.range_call(loop, node)),
+                body=(yield node.children[3]), orelse=[]), node)]
+        init, test, update, body = node.children
+        statements = yield init
+        loop_body = list((yield body))
+        if update.type == 'AssignmentExpression':
+            loop_body.append((yield from self.assignment_statement(update)))
+        else:
+            loop_body.append(self.located(ast.Expr((yield update)), update))
+        statements.append(self.located(ast.While((yield test), loop_body, []), node))
+        return statements
+
+    def range_call(self, loop, node):
+        start = yield loop.start
+        stop = yield loop.stop
+        if loop.offset:
+            if loop.stop.type == 'Number':
+                stop = self.located(ast.Constant(loop.stop.value + loop.offset), loop.stop)
+            else:
+                one = self.located(ast.Constant(1), loop.stop)
+                stop = self.located(ast.BinOp(stop, ADD if loop.offset > 0 else SUB, one), loop.stop)
+        if loop.step != 1:
+            args = [start, stop, self.located(ast.Constant(loop.step), node)]
+        elif loop.start.type == 'Number' and loop.start.value == 0:
+            args = [stop]
+        else:
+            args = [start, stop]
+        function = self.located(ast.Name('range', LOAD), node)
+        return self.located(ast.Call(function, args, []), node)
+
+    def visit_AssignmentExpression(self, node):
+        # Atribuição dentro de expressão: a := b (só alvos simples)
+        target, value = node.children
+        target = self.store((yield target))
+        return self.located(ast.NamedExpr(target, (yield value)), node)
+
+    def visit_BinaryExpression(self, node):
+        if self.types is not None:
+            # x == true é o próprio x quando x já é booleano
+            test = self.types.boolean_test(node)
+            if test is not None:
+                operand, negate = test
+                operand = yield operand
+                return self.located(ast.UnaryOp(NOT, operand), node) if negate else operand
+        left_node, right_node = node.children
+        left = self.operand((yield left_node), node, left_node)
+        right = self.operand((yield right_node), node, right_node)
+        if node.value in COMPARISON_OPERATORS:
+            return self.located(ast.Compare(left, [COMPARISON_OPERATORS[node.value]], [right]), node)
+        return self.located(ast.BinOp(left, BINARY_OPERATORS[node.value], right), node)
+
+    def visit_LogicalExpression(self, node):
+        left, right = node.children
+        operator = AND if node.value == '&&' else OR
+        return self.located(ast.BoolOp(operator, [(yield left), (yield right)]), node)
+
+    def visit_FunctionCall(self, node):
+        args = []
+        for arg in node.children:
+            args.append((yield arg))
+        func = self.located(ast.Name(BUILTINS.get(node.value, node.value), LOAD), node)
+        return self.located(ast.Call(func, args, []), node)
+
+    def visit_ArrayLiteral(self, node):
+        elements = []
+        for child in node.children:
+            elements.append((yield child))
+        return self.located(ast.List(elements, LOAD), node)
+
+    def visit_ArrayAccess(self, node):
+        array, index = node.children
+        array = yield array
+        return self.located(ast.Subscript(array, self.operand((yield index), node, index), LOAD), node)
+
+    def visit_PropertyAccess(self, node):
+        if node.value == "length":
+            return self.call('len', [(yield node.children[0])], node)
+        else:
+            raise NotImplementedError(f"Propriedade não suportada: {node.value}")
+
+    def visit_Identifier(self, node):
+        return self.located(ast.Name(node.value, LOAD), node)
+
+    def visit_Number(self, node):
+        return self.located(ast.Constant(node.value), node)
+
+    def visit_String(self, node):
+        # O texto guardado é o conteúdo cru entre aspas; as sequências de escape
+        # são interpretadas como no literal que o gerador de texto emite
+        try:
+            value = ast.literal_eval(f'"{node.value}"')
+        except SyntaxError:
+            value = node.value
+        return self.located(ast.Constant(value), node)
+
+    def visit_Boolean(self, node):
+        return self.located(ast.Constant(bool(node.value)), node)
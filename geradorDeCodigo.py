@@ -1,36 +1,139 @@
-class GeradorDeCodigoPythonFromJS:
-    def __init__(self, ast):
+import io
+
+from analiseDeLacos import find_counted_loops
+from inferenciaDeTipos import BOOLEAN
+from tabelaDeSimbolos import hoisted, outer_assignments
+from visitanteAST import VisitanteAST
+
+# Precedência dos operadores no AST (maior liga mais forte); usada para
+# decidir onde o código Python gerado precisa de parênteses
+PRECEDENCE = {
+    '=': 1,
+    '||': 2,
+    '&&': 3,
+    '==': 4, '!=': 4, '<': 4, '<=': 4, '>': 4, '>=': 4,
+    '+': 5, '-': 5,
+    '*': 6, '/': 6,
+}
+ATOM = 7
+COMPARISON = 4
+OPERATOR_NODES = ('BinaryExpression', 'LogicalExpression', 'AssignmentExpression')
+PYTHON_OPERATORS = {'&&': 'and', '||': 'or'}
+
+def precedence(node):
+    return PRECEDENCE[node.value] if node.type in OPERATOR_NODES else ATOM
+
+def parenthesize(code, node, level, strict=False):
+    # Parênteses quando o filho liga mais fraco que o operador pai (ou igual,
+    # do lado direito e em comparações, que o Python encadeia)
+    child_level = precedence(node)
+    if child_level < level or (strict and child_level == level):
+        return f"({code})"
+    return code
+
+def to_string(code, type):
+    # Lado número ou booleano de um + de strings: o JS converte sozinho, e
+    # escreve booleanos em minúsculas
+    if type == BOOLEAN:
+        return f"str({code}).lower()"
+    return f"str({code})"
+
+def range_call(loop, start, stop):
+    # i <= b vira range(a, b + 1); com limite numérico o ajuste já sai somado
+    if loop.offset:
+        if loop.stop.type == 'Number':
+            stop = str(loop.stop.value + loop.offset)
+        else:
+            stop = f"{stop} {'+' if loop.offset > 0 else '-'} 1"
+    if loop.step != 1:
+        return f"range({start}, {stop}, {loop.step})"
+    if start == '0':
+        return f"range({stop})"
+    return f"range({start}, {stop})"
+
+INDENTS = ['']
+
+def indentation(level):
+    # Prefixos de indentação calculados uma vez por nível
+    while len(INDENTS) <= level:
+        INDENTS.append('    ' * len(INDENTS))
+    return INDENTS[level]
+
+class GeradorDeCodigoPythonFromJS(VisitanteAST):
+    def __init__(self, ast, range_loops=True, outside_names=(), source_map=None, types=None):
+        # outside_names: nomes lidos fora de laços no resto do programa, quando
+        # ast é só um trecho dele (ver find_counted_loops). source_map: um
+        # MapaDeFontes (mapaDeFontes.py) que recebe a origem de cada linha.
+        # types: um TiposInferidos (inferenciaDeTipos.py) para especializar
+        # prompt, concatenações e comparações com true/false, e para provar
+        # inteiros os nomes nos limites de range()
         self.ast = ast
-        self.code = []
+        self.source_map = source_map
+        self.types = types
+        self.range_loops = range_loops
+        self.outside_names = outside_names
+        self.counted_loops = {}
+        self.code = []  # linhas da declaração de nível superior em andamento
+        self.stream = None
+        self.lines_written = 0
+        self.function_depth = 0
 
     def generate(self):
+        buffer = io.StringIO()
+        self.generate_to(buffer)
+        return buffer.getvalue()
+
+    def generate_to(self, stream):
+        # Escreve o código em qualquer stream de texto; cada filho do Program é
+        # despejado assim que termina, então só as linhas da maior declaração
+        # de nível superior ficam em memória
+        self.stream = stream
+        if self.range_loops:
+            self.counted_loops = find_counted_loops(self.ast, self.outside_names, self.types)
         self.visit(self.ast)
-        return '\n'.join([line for line in self.code if line is not None])
+        self.flush()
 
-    def visit(self, node, indent=0):
-        method_name = f'visit_{node.type}'
-        visitor = getattr(self, method_name, self.generic_visit)
-        return visitor(node, indent)
+    def emit(self, indent, line, node):
+        # node: o nó JS de onde a linha vem
+        self.code.append(indentation(indent) + line)
+        if self.source_map is not None:
+            # Uma string JS com quebra de linha ocupa mais de uma linha aqui
+            for _ in range(line.count('\n') + 1):
+                self.source_map.add(node.lineno, node.position)
+
+    def flush(self):
+        if self.code:
+            if self.lines_written:
+                self.stream.write('\n')
+            self.stream.write('\n'.join(self.code))
+            self.lines_written += len(self.code)
+            self.code.clear()
 
     def generic_visit(self, node, indent=0):
         for child in node.children:
-            self.visit(child, indent)
+            yield (child, indent)
 
     def visit_Program(self, node, indent=0):
-        self.generic_visit(node, indent)
+        for child in hoisted(node.children):
+            yield (child, indent)
+            self.flush()
 
     def visit_ArrayLiteral(self, node, indent=0):
-        elements = [self.visit(child, indent) for child in node.children]
+        elements = []
+        for child in node.children:
+            elements.append((yield (child, indent)))
         return f"[{', '.join(elements)}]"
 
     def visit_ArrayAccess(self, node, indent=0):
-        array_name = self.visit(node.children[0], indent)
-        index = self.visit(node.children[1], indent)
+        array_name = yield (node.children[0], indent)
+        index = yield (node.children[1], indent)
+        if self.types is not None and self.types.numeric_use(node.children[1]):
+            index = f"int({index})"
         return f"{array_name}[{index}]"
 
     def visit_PropertyAccess(self, node, indent=0):
         if node.value == "length":
-            array_name = self.visit(node.children[0], indent)
+            array_name = yield (node.children[0], indent)
             return f"len({array_name})"
         else:
             raise NotImplementedError(f"Propriedade não suportada: {node.value}")
@@ -38,32 +141,39 @@ class GeradorDeCodigoPythonFromJS:
     def visit_VarDeclaration(self, node, indent=0):
         identifier = node.children[0].value
         if len(node.children) > 1:  # Se houver inicialização
-            value = self.visit(node.children[1], indent)
-            self.code.append(f"{'    ' * indent}{identifier} = {value}")
+            value = yield (node.children[1], indent)
+            self.emit(indent, f"{identifier} = {value}", node)
         else:
-            self.code.append(f"{'    ' * indent}{identifier} = None")
+            self.emit(indent, f"{identifier} = None", node)
 
     def visit_FunctionDeclaration(self, node, indent=0):
         identifier = node.children[0].value
         params = ', '.join(child.value for child in node.children[1].children)
-        self.code.append(f"{'    ' * indent}def {identifier}({params}):")
-        self.visit_Block(node.children[2], indent + 1)
+        self.emit(indent, f"def {identifier}({params}):", node)
+        # Atribuições a variáveis de fora, pelos bindings da análise semântica
+        self.function_depth += 1
+        global_names, nonlocal_names = outer_assignments(node.children[2], self.function_depth)
+        if global_names:
+            self.emit(indent + 1, f"global {', '.join(global_names)}", node)
+        if nonlocal_names:
+            self.emit(indent + 1, f"nonlocal {', '.join(nonlocal_names)}", node)
+        yield from self.visit_Block(node.children[2], indent + 1)
+        self.function_depth -= 1
 
     def visit_Block(self, node, indent=0):
-        block_code = self.generate_block_code(node, indent)
-        self.code.extend(block_code)
-
-    def generate_block_code(self, node, indent=0):
-        block_code = []
-        for child in node.children:
-            result = self.visit(child, indent)
+        if not node.children:
+            self.emit(indent, "pass", node)
+        for child in hoisted(node.children):
+            result = yield (child, indent)
             if result is not None:
-                block_code.append(f"{'    ' * indent}{result}")
-        return block_code
+                self.emit(indent, result, child)
 
     def visit_FunctionCall(self, node, indent=0):
         function_name = node.value
-        args = ', '.join(self.visit(arg, indent) for arg in node.children)
+        args = []
+        for arg in node.children:
+            args.append((yield (arg, indent)))
+        args = ', '.join(args)
         if function_name == "console.log":
             return f"print({args})"
         elif function_name == "prompt":
@@ -84,49 +194,98 @@ class GeradorDeCodigoPythonFromJS:
         return 'True' if node.value else 'False'
 
     def visit_AssignmentExpression(self, node, indent=0):
-        left = self.visit(node.children[0], indent)
-        right = self.visit(node.children[1], indent)
-        return f"{left} = {right}"
+        # a = b = c chega como a = (b = c); a cadeia é percorrida pela direita
+        # num laço para não aninhar um nível de visita por atribuição
+        targets = []
+        while node.type == 'AssignmentExpression':
+            target, node = node.children
+            targets.append((yield (target, indent)))
+        targets.append(parenthesize((yield (node, indent)), node, PRECEDENCE['=']))
+        return ' = '.join(targets)
 
     def visit_ReturnStatement(self, node, indent=0):
-        return f"return {self.visit(node.children[0], indent)}"
+        if not node.children:
+            return "return"
+        return f"return {(yield (node.children[0], indent))}"
 
     def visit_BinaryExpression(self, node, indent=0):
-        left = self.visit(node.children[0], indent)
-        right = self.visit(node.children[1], indent)
-        return f"{left} {node.value} {right}"
+        if self.types is not None:
+            # x == true é o próprio x quando x já é booleano
+            test = self.types.boolean_test(node)
+            if test is not None:
+                operand, negate = test
+                code = parenthesize((yield (operand, indent)), operand, COMPARISON)
+                return f"not {code}" if negate else code
+        return (yield from self.operator_chain(node, indent))
 
     def visit_LogicalExpression(self, node, indent=0):
-        left = self.visit(node.children[0], indent)
-        right = self.visit(node.children[1], indent)
-        operator = 'and' if node.value == '&&' else 'or'
-        return f"{left} {operator} {right}"
+        return (yield from self.operator_chain(node, indent))
+
+    def operator_chain(self, node, indent):
+        # a + b + c + ... chega como ((a + b) + c) + ...; desce pela esquerda
+        # enquanto o operador tiver a mesma precedência e junta tudo de uma vez,
+        # evitando recursão e concatenações quadráticas em cadeias longas
+        level = precedence(node)
+        types = self.types
+        spine = [node]
+        while level != COMPARISON:
+            left = spine[-1].children[0]
+            if left.type not in OPERATOR_NODES or precedence(left) != level:
+                break
+            # 1 + 2 + "a": a soma numérica fica inteira dentro do str()
+            if types is not None and types.string_operand(spine[-1], left) is not None:
+                break
+            spine.append(left)
+        first = spine[-1].children[0]
+        parts = [self.operand((yield (first, indent)), spine[-1], first, level, level == COMPARISON)]
+        for link in reversed(spine):
+            right = link.children[1]
+            parts.append(PYTHON_OPERATORS.get(link.value, link.value))
+            parts.append(self.operand((yield (right, indent)), link, right, level, True))
+        return ' '.join(parts)
+
+    def operand(self, code, link, node, level, strict):
+        if self.types is not None:
+            conversion = self.types.string_operand(link, node)
+            if conversion is not None:
+                return to_string(code, conversion)
+            # Valor de prompt usado como número
+            if self.types.numeric_use(node):
+                return f"int({code})"
+        return parenthesize(code, node, level, strict)
 
     def visit_IfStatement(self, node, indent=0):
-        condition = self.visit(node.children[0], indent)
-        self.code.append(f"{'    ' * indent}if {condition}:")
-        self.visit_Block(node.children[1], indent + 1)
+        condition = yield (node.children[0], indent)
+        self.emit(indent, f"if {condition}:", node)
+        yield from self.visit_Block(node.children[1], indent + 1)
         if len(node.children) > 2:
-            self.code.append(f"{'    ' * indent}else:")
-            self.visit_Block(node.children[2], indent + 1)
+            self.emit(indent, "else:", node.children[2])
+            yield from self.visit_Block(node.children[2], indent + 1)
 
     def visit_WhileStatement(self, node, indent=0):
-        condition = self.visit(node.children[0], indent)
-        self.code.append(f"{'    ' * indent}while {condition}:")
-        self.visit_Block(node.children[1], indent + 1)
+        condition = yield (node.children[0], indent)
+        self.emit(indent, f"while {condition}:", node)
+        yield from self.visit_Block(node.children[1], indent + 1)
 
     def visit_ForStatement(self, node, indent=0):
-        init = self.visit(node.children[0], indent)
-        condition = self.visit(node.children[1], indent)
-        increment = self.visit(node.children[2], indent)
+        loop = self.counted_loops.get(node)
+        if loop is not None:
+            start = yield (loop.start, indent)
+            stop = yield (loop.stop, indent)
+            self.emit(indent, f"for {loop.variable} in {range_call(loop, start, stop)}:", node)
+            yield from self.visit_Block(node.children[3], indent + 1)
+            return
+        init = yield (node.children[0], indent)
+        condition = yield (node.children[1], indent)
+        increment = yield (node.children[2], indent)
         if init is not None:
-            self.code.append(f"{'    ' * indent}{init}")
-        self.code.append(f"{'    ' * indent}while {condition}:")
-        self.visit_Block(node.children[3], indent + 1)
+            self.emit(indent, init, node.children[0])
+        self.emit(indent, f"while {condition}:", node)
+        yield from self.visit_Block(node.children[3], indent + 1)
         if increment is not None:
-            self.code.append(f"{'    ' * (indent + 1)}{increment}")
+            self.emit(indent + 1, increment, node.children[2])
 
     def visit_ExpressionStatement(self, node, indent=0):
-        expr = self.visit(node.children[0], indent)
+        expr = yield (node.children[0], indent)
         if expr:
-            self.code.append(f"{'    ' * indent}{expr}")
+            self.emit(indent, expr, node)
@@ -0,0 +1,500 @@
+import collections
+
+from arenaSintatica import ArenaNode
+from visitanteAST import VisitanteAST
+
+# Inferência de tipos sobre o AST já otimizado, antes da geração de código.
+# Os tipos vêm dos literais, das declarações e atribuições, dos parâmetros
+# (a junção dos argumentos de todas as chamadas) e dos return de cada função.
+#
+# Dentro de uma função (ou do programa) a análise segue o fluxo: depois de
+# `x = 1`, x é número até a próxima escrita; os dois lados de um if são
+# juntados no fim dele. Variáveis escritas dentro de um laço, escritas por
+# funções aninhadas ou lidas de fora da função atual usam o resumo da
+# variável: a junção de tudo o que é atribuído a ela no programa. Resumos e
+# tipos de retorno dependem uns dos outros: cada unidade (o nível superior
+# ou o corpo de uma função) guarda os resumos que leu, e a mudança de um
+# resumo põe de novo na fila só as unidades que o leram, até nada mudar.
+#
+# prompt devolve string, mas um valor dele usado como número (operando de
+# - * /, comparado com número, índice de array) é convertido com int() ali,
+# no uso: o JS faria essa conversão, o Python levantaria TypeError. Os
+# outros usos do mesmo valor continuam vendo a string.
+#
+# Números inteiros têm tipo próprio, INTEGER, abaixo de NUMBER: literais
+# inteiros, .length, valor de prompt convertido e + - * entre inteiros; /
+# dá NUMBER.
+# range() (analiseDeLacos) só aceita limites inteiros.
+#
+# Os fatos ficam num TiposInferidos: o tipo de cada expressão, o resumo de
+# cada variável e função, e as expressões convertidas com int(), para a geração
+# de código e para passos que queiram usá-los.
+INTEGER = 'integer'
+NUMBER = 'number'
+STRING = 'string'
+BOOLEAN = 'boolean'
+ARRAY = 'array'
+UNKNOWN = 'unknown'
+
+# Um valor é (tipo, origens): origens são as chamadas a prompt de onde ele
+# pode ter vindo. Tipo None: nenhum valor chegou ainda
+NO_ORIGINS = frozenset()
+NOTHING = (None, NO_ORIGINS)
+ANY = (UNKNOWN, NO_ORIGINS)
+NUMBERS = (INTEGER, NUMBER)
+NUMERIC = (INTEGER, NUMBER, BOOLEAN)
+NUMERIC_OPERATORS = ('-', '*', '/')
+# Resumo dos elementos de todos os arrays do programa: tudo o que aparece
+# num literal de array ou é atribuído a um elemento. Um resumo só, então
+# dois nomes para o mesmo array não confundem nada
+ELEMENTS = '[]'
+
+def join_types(a, b):
+    if a is None or a == b:
+        return b
+    if b is None:
+        return a
+    if a in NUMBERS and b in NUMBERS:
+        return NUMBER
+    return UNKNOWN
+
+def join(a, b):
+    if a == b:
+        return a
+    return join_types(a[0], b[0]), a[1] | b[1]
+
+def variable_key(identifier, frames):
+    # (função dona, slot) pelo binding da análise semântica; nomes sem
+    # binding (os criados pelo otimizador) valem pelo próprio nome
+    binding = identifier.binding
+    if binding is None or binding[0] >= len(frames):
+        return identifier.value
+    return frames[binding[0]], binding[1]
+
+def program_facts(ast):
+    # Uma passada antes da análise: funções por nome (None quando o nome é
+    # declarado mais de uma vez), variáveis escritas por funções aninhadas e
+    # as variáveis escritas em cada laço
+    # Tuplas na pilha marcam onde as funções e os laços em volta mudam
+    functions = {}
+    captured = set()
+    loop_writes = {}
+    frames = (ast,)
+    loops = ()
+    stack = [ast]
+    while stack:
+        node = stack.pop()
+        if node.__class__ is tuple:
+            frames, loops = node
+            continue
+        type = node.type
+        if type == 'FunctionDeclaration':
+            name = node.identifier.value
+            functions[name] = None if name in functions else node
+            stack.append((frames, loops))
+            stack.append(node.body)
+            stack.append((frames + (node,), ()))
+            continue
+        if type in ('WhileStatement', 'ForStatement'):
+            written = loop_writes[node] = set()
+            children = node.children
+            stack.append((frames, loops))
+            if type == 'ForStatement' and node.init is not None:
+                # A inicialização roda uma vez, fora do laço
+                children = children[1:]
+                stack.extend(children)
+                stack.append((frames, loops + (written,)))
+                stack.append(node.init)
+            else:
+                stack.extend(children)
+                stack.append((frames, loops + (written,)))
+            continue
+        if type in ('VarDeclaration', 'AssignmentExpression'):
+            target = node.children[0]
+            if target.type == 'Identifier':
+                key = variable_key(target, frames)
+                for written in loops:
+                    written.add(key)
+                if type == 'AssignmentExpression' and target.binding is not None and \
+                        target.binding[0] < len(frames) - 1:
+                    captured.add(key)
+        stack.extend(node.children)
+    return functions, captured, loop_writes
+
+class TiposInferidos:
+    # types: nó de expressão -> tipo; variables: (função, nome) -> tipo, com
+    # função None no nível do programa; returns: nome da função -> tipo de
+    # retorno; numeric_uses: expressões com valor de prompt usadas como
+    # número, convertidas com int() onde aparecem
+    __slots__ = ('types', 'variables', 'returns', 'numeric_uses')
+
+    def __init__(self, types, variables, returns, numeric_uses):
+        self.types = types
+        self.variables = variables
+        self.returns = returns
+        self.numeric_uses = numeric_uses
+
+    def type_of(self, node):
+        return self.types.get(node) or UNKNOWN
+
+    def numeric_use(self, node):
+        return node in self.numeric_uses
+
+    def integer(self, node):
+        return self.types.get(node) == INTEGER
+
+    def string_operand(self, node, operand):
+        # Tipo do operando de um + de strings que precisa de str() (número
+        # ou booleano), ou None
+        if node.value != '+' or self.types.get(node) != STRING:
+            return None
+        operand_type = self.types.get(operand)
+        return operand_type if operand_type in NUMERIC else None
+
+    def boolean_test(self, node):
+        # x == true, x != false (e o literal à esquerda) com x booleano:
+        # (x, se precisa de not), ou None
+        if node.value not in ('==', '!='):
+            return None
+        left, right = node.left, node.right
+        if right.type == 'Boolean':
+            operand, literal = left, right
+        elif left.type == 'Boolean':
+            operand, literal = right, left
+        else:
+            return None
+        if self.types.get(operand) != BOOLEAN:
+            return None
+        return operand, literal.value != (node.value == '==')
+
+    def decisions(self, ast):
+        # O que a geração de código consulta nos nós de ast, numa ordem fixa:
+        # a mesma árvore com as mesmas decisões gera o mesmo código
+        result = []
+        stack = [ast]
+        while stack:
+            node = stack.pop()
+            if node.type == 'BinaryExpression':
+                test = self.boolean_test(node)
+                result.append((self.string_operand(node, node.left), self.string_operand(node, node.right),
+                               None if test is None else test[1],
+                               node.left in self.numeric_uses, node.right in self.numeric_uses))
+            elif node.type == 'ArrayAccess':
+                result.append(node.index in self.numeric_uses)
+            elif node.type == 'ForStatement':
+                # Os limites de range() só valem com nomes inteiros
+                header = [child for child in (node.init, node.test) if child is not None]
+                integers = []
+                while header:
+                    child = header.pop()
+                    if child.type == 'Identifier':
+                        integers.append(self.integer(child))
+                    header.extend(child.children)
+                result.append(tuple(integers))
+            stack.extend(node.children)
+        return tuple(result)
+
+class InferenciaDeTipos(VisitanteAST):
+    def __init__(self, ast):
+        if isinstance(ast, ArenaNode):
+            # A análise lê os campos com nome dos nós tipados; os fatos valem
+            # para os nós de self.ast, a árvore convertida
+            ast = ast.arena.to_tree(ast.index)
+        self.ast = ast
+
+    def run(self):
+        self.functions, self.captured, self.loop_writes = program_facts(self.ast)
+        self.numeric_uses = set()
+        self.variables = {}
+        self.returns = {}
+        self.names = {}
+        self.types = {}
+        self.readers = {}  # resumo -> unidades que o leram
+        self.units = {self.ast: ()}  # unidade -> quadros das funções que a envolvem
+        self.queue = collections.deque()
+        self.queued = set()
+        self.schedule(self.ast)
+        while self.queue:
+            unit = self.queue.popleft()
+            if unit is self.ast and self.queue:
+                # O nível superior costuma ler o retorno de muitas
+                # funções: espera a fila delas esvaziar
+                self.queue.append(unit)
+                continue
+            self.queued.discard(unit)
+            self.analyze(unit)
+        return TiposInferidos(self.types, self.summary(), {
+            function.identifier.value: self.returns.get(function, NOTHING)[0] or UNKNOWN
+            for function in self.functions.values() if function is not None
+        }, frozenset(self.numeric_uses))
+
+    def summary(self):
+        variables = {}
+        for key, name in self.names.items():
+            function = None
+            if key.__class__ is tuple and key[0].type == 'FunctionDeclaration':
+                function = key[0].identifier.value
+            type = self.variables.get(key, NOTHING)[0] or UNKNOWN
+            variables[function, name] = join_types(variables.get((function, name)), type)
+        return variables
+
+    # Unidades, resumos, ambiente e escritas
+
+    def schedule(self, unit):
+        if unit not in self.queued:
+            self.queued.add(unit)
+            self.queue.append(unit)
+
+    def analyze(self, unit):
+        self.unit = unit
+        self.frames = self.units[unit] + (unit,)
+        self.env = {}
+        self.log = []
+        self.branches = 0
+        if unit is self.ast:
+            self.function = None
+            self.visit(unit)
+        else:
+            self.function = unit
+            self.visit(unit.body)
+
+    def depend(self, key):
+        readers = self.readers.get(key)
+        if readers is None:
+            readers = self.readers[key] = set()
+        readers.add(self.unit)
+
+    def record(self, summary, key, value):
+        old = summary.get(key, NOTHING)
+        new = join(old, value)
+        if new != old:
+            summary[key] = new
+            for reader in self.readers.get(key, ()):
+                self.schedule(reader)
+
+    def set_local(self, key, value):
+        # None tira a variável do ambiente (vale o resumo). Dentro de um ramo,
+        # o valor anterior vai para o log, para o fim do ramo desfazer
+        if self.branches:
+            self.log.append((key, self.env.get(key)))
+        if value is None:
+            self.env.pop(key, None)
+        else:
+            self.env[key] = value
+
+    def undo(self, start):
+        # Desfaz as escritas no ambiente desde start; devolve o valor de cada
+        # variável escrita no fim do ramo
+        changes = {}
+        log = self.log
+        env = self.env
+        for index in range(len(log) - 1, start - 1, -1):
+            key, previous = log[index]
+            if key not in changes:
+                changes[key] = env.get(key)
+            if previous is None:
+                env.pop(key, None)
+            else:
+                env[key] = previous
+        del log[start:]
+        return changes
+
+    def lookup(self, identifier):
+        # (chave, se a variável segue o fluxo na unidade atual)
+        binding = identifier.binding
+        frames = self.frames
+        if binding is None or binding[0] >= len(frames):
+            return identifier.value, False
+        key = frames[binding[0]], binding[1]
+        return key, binding[0] == len(frames) - 1 and key not in self.captured
+
+    def write(self, identifier, value):
+        key, local = self.lookup(identifier)
+        self.names[key] = identifier.value
+        self.types[identifier] = value[0]
+        if local:
+            self.set_local(key, value)
+        self.record(self.variables, key, value)
+
+    def demand(self, node, value, numeric=True):
+        # node é usado como número: se o valor pode vir de prompt, ele é
+        # convertido ali e vale como inteiro. Uma unidade analisada de novo
+        # refaz a decisão
+        if not numeric or not value[1]:
+            self.numeric_uses.discard(node)
+            return value
+        self.numeric_uses.add(node)
+        return INTEGER, NO_ORIGINS
+
+    def result(self, node, value):
+        self.types[node] = value[0]
+        return value
+
+    # Declarações
+
+    def visit_FunctionDeclaration(self, node):
+        # O corpo é outra unidade, analisada depois do código que a declara,
+        # como na análise semântica: o que vem de fora é lido pelos resumos
+        if node not in self.units:
+            self.units[node] = self.frames
+            self.schedule(node)
+
+    def visit_VarDeclaration(self, node):
+        value = ANY if node.init is None else (yield node.init)
+        self.write(node.identifier, value)
+
+    def visit_ExpressionStatement(self, node):
+        yield node.expression
+
+    def visit_ReturnStatement(self, node):
+        value = ANY if node.argument is None else (yield node.argument)
+        if self.function is not None:
+            self.record(self.returns, self.function, value)
+
+    def visit_IfStatement(self, node):
+        yield node.test
+        start = len(self.log)
+        self.branches += 1
+        yield node.consequent
+        consequent = self.undo(start)
+        if node.alternate is not None:
+            yield node.alternate
+        alternate = self.undo(start)
+        self.branches -= 1
+        env = self.env
+        for key in consequent.keys() | alternate.keys():
+            before = env.get(key)
+            a = consequent[key] if key in consequent else before
+            b = alternate[key] if key in alternate else before
+            self.set_local(key, None if a is None or b is None else join(a, b))
+
+    def enter_loop(self, node):
+        # O que o laço escreve pode ter qualquer valor de qualquer volta
+        for key in self.loop_writes.get(node, ()):
+            self.set_local(key, None)
+
+    def visit_WhileStatement(self, node):
+        self.enter_loop(node)
+        yield node.test
+        yield node.body
+
+    def visit_ForStatement(self, node):
+        if node.init is not None:
+            yield node.init
+        self.enter_loop(node)
+        for child in (node.test, node.update, node.body):
+            if child is not None:
+                yield child
+
+    # Expressões
+
+    def visit_Number(self, node):
+        # O otimizador pode dobrar 5 / 2 num literal float
+        return self.result(node, (INTEGER if node.value.__class__ is int else NUMBER, NO_ORIGINS))
+
+    def visit_String(self, node):
+        return self.result(node, (STRING, NO_ORIGINS))
+
+    def visit_Boolean(self, node):
+        return self.result(node, (BOOLEAN, NO_ORIGINS))
+
+    def visit_Identifier(self, node):
+        key, local = self.lookup(node)
+        value = self.env.get(key) if local else None
+        if value is None:
+            self.depend(key)
+            value = self.variables.get(key, NOTHING)
+        self.types[node] = value[0]
+        return value
+
+    def visit_ArrayLiteral(self, node):
+        for child in node.children:
+            self.record(self.variables, ELEMENTS, (yield child))
+        return self.result(node, (ARRAY, NO_ORIGINS))
+
+    def visit_ArrayAccess(self, node):
+        array = yield node.array
+        self.demand(node.index, (yield node.index))
+        if array[0] == ARRAY:
+            self.depend(ELEMENTS)
+            return self.result(node, self.variables.get(ELEMENTS, NOTHING))
+        # Índice numa string dá um caractere
+        return self.result(node, (STRING, NO_ORIGINS) if array[0] == STRING else ANY)
+
+    def visit_PropertyAccess(self, node):
+        yield node.object
+        return self.result(node, (INTEGER, NO_ORIGINS) if node.value == 'length' else ANY)
+
+    def visit_AssignmentExpression(self, node):
+        target = node.left
+        if target.type != 'Identifier':
+            yield target
+            value = yield node.right
+            if target.type == 'ArrayAccess':
+                self.record(self.variables, ELEMENTS, value)
+            return self.result(node, value)
+        value = yield node.right
+        self.write(target, value)
+        return self.result(node, value)
+
+    def visit_BinaryExpression(self, node):
+        left = yield node.left
+        right = yield node.right
+        operator = node.value
+        if operator == '+':
+            left_type, right_type = left[0], right[0]
+            if left_type == STRING or right_type == STRING:
+                type = STRING
+            elif left_type is None or right_type is None:
+                type = None
+            elif left_type == INTEGER and right_type == INTEGER:
+                type = INTEGER
+            elif left_type in NUMERIC and right_type in NUMERIC:
+                type = NUMBER
+            else:
+                type = UNKNOWN
+        elif operator in NUMERIC_OPERATORS:
+            left = self.demand(node.left, left)
+            right = self.demand(node.right, right)
+            if left[0] is None or right[0] is None:
+                type = None
+            elif operator != '/' and left[0] == INTEGER and right[0] == INTEGER:
+                type = INTEGER
+            else:
+                type = NUMBER
+        else:
+            # Comparação com número: o JS converte o outro lado
+            self.demand(node.right, right, left[0] in NUMBERS)
+            self.demand(node.left, left, right[0] in NUMBERS)
+            type = BOOLEAN
+        return self.result(node, (type, NO_ORIGINS))
+
+    def visit_LogicalExpression(self, node):
+        # a && b e a || b valem a ou b; o lado direito pode não rodar
+        left = yield node.left
+        start = len(self.log)
+        self.branches += 1
+        right = yield node.right
+        changes = self.undo(start)
+        self.branches -= 1
+        for key, value in changes.items():
+            before = self.env.get(key)
+            self.set_local(key, None if value is None or before is None else join(before, value))
+        return self.result(node, join(left, right))
+
+    def visit_FunctionCall(self, node):
+        args = []
+        for child in node.children:
+            args.append((yield child))
+        name = node.value
+        if name == 'prompt':
+            return self.result(node, (STRING, frozenset((node,))))
+        function = self.functions.get(name)
+        if function is None:
+            return self.result(node, ANY)
+        for param, value in zip(function.params.children, args):
+            key = param.value if param.binding is None else (function, param.binding[1])
+            self.names[key] = param.value
+            self.record(self.variables, key, value)
+        self.depend(function)
+        return self.result(node, self.returns.get(function, NOTHING))
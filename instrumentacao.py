@@ -0,0 +1,203 @@
+import collections
+import contextlib
+import json
+import os
+import time
+import tracemalloc
+
+from visitanteAST import VisitanteAST
+
+# Instrumentação opcional do pipeline: tempo de parede, pico de memória
+# (tracemalloc) e contagens de cada etapa (tokens, nós por tipo, chamadas de
+# visit por tipo de nó). Só entra em ação quando transpile() recebe uma
+# Instrumentacao; sem ela o caminho normal não muda em nada.
+#
+# O pipeline é o próprio transpilador.transpile: cada etapa dele roda dentro
+# de um gancho stage(nome, worker), um gerenciador de contexto que entrega à
+# etapa um objeto onde ela deixa seu resultado em result. O gancho padrão,
+# no_stage, não faz nada; Instrumentacao.stage mede. No caminho medido a
+# análise léxica roda inteira antes da sintática, para que cada uma tenha
+# seu tempo; com memory=True os tempos incluem a sobrecarga do tracemalloc.
+
+class EtapaSemMedida:
+    # O que no_stage entrega à etapa: só guarda o resultado
+    __slots__ = ('result',)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+def no_stage(name, worker=None):
+    return EtapaSemMedida()
+
+class DespachoContado(dict):
+    # Tabela de despacho de um visitante que conta as consultas por tipo de
+    # nó; VisitanteAST.visit faz uma consulta por nó visitado
+    __slots__ = ('visits',)
+
+    def __init__(self, dispatch, visits):
+        super().__init__(dispatch)
+        self.visits = visits
+
+    def get(self, type, default=None):
+        self.visits[type] += 1
+        return dict.get(self, type, default)
+
+class Etapa:
+    # start em ns de time.perf_counter_ns, comparável entre processos; result,
+    # o que a etapa produziu, só até as contagens serem feitas
+    __slots__ = ('name', 'start', 'seconds', 'peak_bytes', 'counts', 'visits', 'result')
+
+    def __init__(self, name, start):
+        self.name = name
+        self.start = start
+        self.seconds = 0.0
+        self.peak_bytes = None
+        self.counts = {}
+        self.visits = collections.Counter()
+        self.result = None
+
+    def as_dict(self):
+        return {
+            'name': self.name,
+            'seconds': self.seconds,
+            'peak_bytes': self.peak_bytes,
+            'counts': self.counts,
+            'visits': dict(self.visits.most_common()),
+        }
+
+class Instrumentacao:
+    # Medições de uma transpilação (um arquivo); label identifica o arquivo
+    # nas exportações
+    def __init__(self, label='', memory=True):
+        self.label = label
+        self.memory = memory
+        self.pid = os.getpid()
+        self.stages = []
+        self.start = None
+        self.seconds = 0.0
+        self.source_bytes = None
+
+    @contextlib.contextmanager
+    def stage(self, name, worker=None):
+        # Gancho de etapa de transpilador.transpile; worker é quem faz a
+        # etapa (parser, visitante), quando há um
+        if self.memory:
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+        stage = Etapa(name, time.perf_counter_ns())
+        if isinstance(worker, VisitanteAST):
+            worker.dispatch = DespachoContado(worker.dispatch, stage.visits)
+        try:
+            yield stage
+        finally:
+            stage.seconds = (time.perf_counter_ns() - stage.start) / 1e9
+            if self.memory:
+                stage.peak_bytes = max(0, tracemalloc.get_traced_memory()[1] - current)
+            self.stages.append(stage)
+            # O resultado não fica guardado: a Instrumentacao volta dos
+            # processos de trabalho por pickle
+            result, stage.result = stage.result, None
+        self.count(stage, worker, result)
+
+    def count(self, stage, worker, result):
+        # Contagens de uma etapa que terminou, fora do tempo dela
+        name, counts = stage.name, stage.counts
+        if name == 'lexica':
+            counts['tokens'] = len(result)
+            counts['bytes'] = self.source_bytes
+        elif name == 'sintatica':
+            counts.update(node_counts(result))
+            if worker.syntax_errors:
+                counts['syntax_errors'] = worker.syntax_errors
+        elif name == 'semantica':
+            counts['errors'] = len(worker.errors)
+        elif name.startswith('otimizacao.'):
+            counts.update(node_counts(result))
+        elif name == 'tipos':
+            counts['numeric_uses'] = len(result.numeric_uses)
+        elif name == 'geracao':
+            counts['lines'] = result.count('\n') + 1 if result else 0
+            counts['bytes'] = len(result)
+
+    def transpile(self, source, tokenizer, options, diagnostics=None):
+        # transpilador.transpile com self.stage em cada etapa
+        from transpilador import transpile
+        started_tracing = self.memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        self.source_bytes = len(source)
+        self.start = time.perf_counter_ns()
+        try:
+            return transpile(source, tokenizer, diagnostics=diagnostics, stage=self.stage, **options)
+        finally:
+            self.seconds = (time.perf_counter_ns() - self.start) / 1e9
+            if started_tracing:
+                tracemalloc.stop()
+
+    def as_dict(self):
+        return {
+            'label': self.label,
+            'seconds': self.seconds,
+            'stages': [stage.as_dict() for stage in self.stages],
+        }
+
+    def trace_events(self, tid=0):
+        # Eventos completos ('X') do formato de trace do Chrome, em µs; as
+        # etapas ficam aninhadas no evento do arquivo
+        if self.start is None:
+            return []
+        events = [{
+            'name': self.label or 'transpile', 'cat': 'arquivo', 'ph': 'X',
+            'ts': self.start / 1e3, 'dur': self.seconds * 1e6,
+            'pid': self.pid, 'tid': tid,
+        }]
+        for stage in self.stages:
+            events.append({
+                'name': stage.name, 'cat': 'etapa', 'ph': 'X',
+                'ts': stage.start / 1e3, 'dur': stage.seconds * 1e6,
+                'pid': self.pid, 'tid': tid,
+                'args': {**stage.counts, 'peak_bytes': stage.peak_bytes, 'visits': sum(stage.visits.values())},
+            })
+        return events
+
+    def summary_lines(self):
+        lines = [f"{'etapa':36} {'ms':>9} {'pico kB':>9} {'visitas':>8}  contagens"]
+        for stage in self.stages:
+            peak = '-' if stage.peak_bytes is None else f"{stage.peak_bytes / 1e3:.1f}"
+            counts = ', '.join(f"{name}={value}" for name, value in stage.counts.items()
+                               if not name.startswith('nodes.'))
+            lines.append(f"{stage.name:36} {stage.seconds * 1e3:9.3f} {peak:>9} "
+                         f"{sum(stage.visits.values()):8}  {counts}")
+        lines.append(f"{'total':36} {self.seconds * 1e3:9.3f}")
+        return lines
+
+def node_counts(ast):
+    # Total de nós e quantos de cada tipo, em 'nodes' e 'nodes.<tipo>'
+    counts = collections.Counter()
+    stack = [ast]
+    while stack:
+        node = stack.pop()
+        counts[node.type] += 1
+        stack.extend(node.children)
+    result = {'nodes': sum(counts.values())}
+    for type, count in counts.most_common():
+        result[f'nodes.{type}'] = count
+    return result
+
+def write_json(records, path):
+    with open(path, 'w', encoding='utf-8') as output:
+        json.dump({'files': [record.as_dict() for record in records]}, output, indent=1)
+
+def write_chrome_trace(records, path):
+    # Abre em chrome://tracing ou no Perfetto; um processo de trabalho por pid
+    events = []
+    for record in records:
+        events.extend(record.trace_events())
+    for pid in sorted({record.pid for record in records}):
+        events.append({'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+                       'args': {'name': f'transpilador {pid}'}})
+    with open(path, 'w', encoding='utf-8') as output:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, output)
@@ -0,0 +1,207 @@
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from analiseLexica import create_lexer
+from diagnosticos import MAX_DIAGNOSTICS, Diagnosticos
+from transpilador import options_with_defaults, transpile, transpile_file
+
+# Transpilação em lote: os arquivos .js são agrupados em lotes por tamanho e
+# distribuídos num ProcessPoolExecutor. Cada processo monta o analisador
+# léxico uma vez (no initializer) e grava a saída ele mesmo, então só o
+# resumo de cada arquivo volta pelo pipe. Os erros de cada arquivo (léxicos,
+# de sintaxe e semânticos) são coletados como diagnósticos, com recuperação
+# no parser, em vez de impressos ou de pararem no primeiro.
+CHUNK_BYTES = 256 * 1024
+CHUNK_FILES = 64
+# A partir deste tamanho o arquivo é lido em blocos por transpile_file em vez
+# de inteiro numa str (sem cache nem instrumentação, que precisam do texto)
+LARGE_FILE_BYTES = 16 * 1024 * 1024
+
+class ArquivoFonte:
+    __slots__ = ('path', 'target', 'size')
+
+    def __init__(self, path, target, size):
+        self.path = path
+        self.target = target
+        self.size = size
+
+class ResultadoArquivo:
+    # failure é a mensagem quando o arquivo não pôde ser transpilado;
+    # diagnostics, os Diagnostico do arquivo; instrumentation, a
+    # Instrumentacao do arquivo quando pedida
+    __slots__ = ('path', 'size', 'seconds', 'errors', 'failure', 'instrumentation', 'diagnostics')
+
+    def __init__(self, path, size, seconds, errors, failure=None, instrumentation=None, diagnostics=()):
+        self.path = path
+        self.size = size
+        self.seconds = seconds
+        self.errors = errors
+        self.failure = failure
+        self.instrumentation = instrumentation
+        self.diagnostics = diagnostics
+
+def collect(inputs, output_directory):
+    # Diretórios são percorridos atrás de .js; globs são expandidos. A saída
+    # espelha o caminho relativo ao diretório (ou à parte fixa do glob)
+    files = []
+    seen = set()
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            root = pattern
+            paths = glob.glob(os.path.join(glob.escape(pattern), '**', '*.js'), recursive=True)
+        elif glob.has_magic(pattern):
+            root = fixed_prefix(pattern)
+            paths = glob.glob(pattern, recursive=True)
+        else:
+            root = os.path.dirname(pattern)
+            paths = [pattern]
+        for path in sorted(paths):
+            real = os.path.realpath(path)
+            if real in seen or not os.path.isfile(path):
+                continue
+            seen.add(real)
+            relative = os.path.relpath(path, root or '.')
+            target = os.path.join(output_directory, os.path.splitext(relative)[0] + '.py')
+            files.append(ArquivoFonte(path, target, os.path.getsize(path)))
+    return files
+
+def fixed_prefix(pattern):
+    parts = []
+    for part in pattern.split(os.sep):
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    return os.sep.join(parts)
+
+def chunks(files, workers=1):
+    # Maiores primeiro, para os arquivos grandes não ficarem para o fim;
+    # arquivos pequenos viajam juntos até CHUNK_BYTES ou CHUNK_FILES, com
+    # pelo menos uns quatro lotes por processo para equilibrar a carga
+    limit = min(CHUNK_BYTES, sum(source.size for source in files) // (4 * workers) + 1)
+    chunk, chunk_bytes = [], 0
+    for source in sorted(files, key=lambda source: source.size, reverse=True):
+        chunk.append(source)
+        chunk_bytes += source.size
+        if chunk_bytes >= limit or len(chunk) >= CHUNK_FILES:
+            yield chunk
+            chunk, chunk_bytes = [], 0
+    if chunk:
+        yield chunk
+
+# (analisador léxico, cache ou None, opções, memória da instrumentação ou
+# None sem instrumentação, limite de diagnósticos por arquivo) deste processo
+_worker = None
+
+def init_worker(options, cache_directory=None, instrument_memory=None, max_diagnostics=MAX_DIAGNOSTICS):
+    global _worker
+    cache = None
+    if cache_directory is not None:
+        from cacheTranspilacao import CacheDeTranspilacao
+        cache = CacheDeTranspilacao(cache_directory)
+    _worker = (create_lexer(options['lexer']), cache, options, instrument_memory, max_diagnostics)
+
+def transpile_source(source, diagnostics, instrumentation=None):
+    # Instrumentado, o cache fica de fora: um acerto não mediria nada
+    tokenizer, cache, options, _, _ = _worker
+    if instrumentation is not None:
+        return transpile(source, tokenizer, instrumentation=instrumentation, diagnostics=diagnostics, **options)
+    if cache is not None:
+        return cache.transpile(source, diagnostics, **options)
+    return transpile(source, tokenizer, diagnostics=diagnostics, **options)
+
+def transpile_path(source, instrumentation=None):
+    # Devolve o resultado e os diagnósticos do arquivo
+    tokenizer, cache, options, _, max_diagnostics = _worker
+    if source.size >= LARGE_FILE_BYTES and cache is None and instrumentation is None:
+        diagnostics = Diagnosticos(limit=max_diagnostics)
+        return transpile_file(source.path, tokenizer, diagnostics=diagnostics, **options), diagnostics
+    with open(source.path, encoding='utf-8') as input_file:
+        text = input_file.read()
+    diagnostics = Diagnosticos(text, max_diagnostics)
+    return transpile_source(text, diagnostics, instrumentation), diagnostics
+
+def transpile_chunk(chunk):
+    instrument_memory = _worker[3]
+    results = []
+    for source in chunk:
+        start = time.perf_counter()
+        instrumentation = None
+        if instrument_memory is not None:
+            from instrumentacao import Instrumentacao
+            instrumentation = Instrumentacao(source.path, instrument_memory)
+        try:
+            result, diagnostics = transpile_path(source, instrumentation)
+            if result.python_code is None:
+                results.append(ResultadoArquivo(source.path, source.size, time.perf_counter() - start,
+                                                result.errors, f"{len(diagnostics)} erro(s); código não gerado",
+                                                instrumentation, diagnostics.records))
+                continue
+            os.makedirs(os.path.dirname(source.target) or '.', exist_ok=True)
+            with open(source.target, 'w', encoding='utf-8') as output:
+                output.write(result.python_code)
+                output.write('\n')
+            if result.source_map is not None:
+                result.source_map.write(source.target + '.map', os.path.basename(source.target),
+                                        os.path.relpath(source.path, os.path.dirname(source.target) or '.'))
+        except Exception as error:
+            # Qualquer erro fica no resultado do arquivo: um arquivo que
+            # derruba uma etapa não pode levar junto o resto do lote
+            results.append(ResultadoArquivo(source.path, source.size, time.perf_counter() - start, [],
+                                            f"{error.__class__.__name__}: {error}", instrumentation))
+            continue
+        results.append(ResultadoArquivo(source.path, source.size, time.perf_counter() - start, result.errors,
+                                        instrumentation=instrumentation, diagnostics=diagnostics.records))
+    return results
+
+class ResumoDoLote:
+    def __init__(self, results, seconds, workers):
+        self.results = results
+        self.seconds = seconds
+        self.workers = workers
+
+    def report(self, slowest=5):
+        total_bytes = sum(result.size for result in self.results)
+        failures = [result for result in self.results if result.failure]
+        with_errors = [result for result in self.results if result.errors]
+        seconds = self.seconds or 1e-9
+        lines = [
+            f"{len(self.results)} arquivos, {total_bytes / 1e6:.2f} MB em {self.seconds:.2f} s "
+            f"com {self.workers} processo(s): {len(self.results) / seconds:.1f} arquivos/s, "
+            f"{total_bytes / 1e6 / seconds:.2f} MB/s",
+            f"{len(with_errors)} com erros semânticos, {len(failures)} com falha",
+        ]
+        if self.results:
+            lines.append("mais lentos:")
+            for result in sorted(self.results, key=lambda result: result.seconds, reverse=True)[:slowest]:
+                lines.append(f"  {result.seconds * 1e3:8.1f} ms  {result.size:9} bytes  {result.path}")
+        return lines
+
+def transpile_batch(inputs, output_directory, workers=None, cache_directory=None,
+                    instrument_memory=None, max_diagnostics=MAX_DIAGNOSTICS, **options):
+    # instrument_memory: None sem instrumentação; senão, se ela usa o tracemalloc
+    options = options_with_defaults(options)
+    files = collect(inputs, output_directory)
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    results = []
+    if workers == 1:
+        init_worker(options, cache_directory, instrument_memory, max_diagnostics)
+        for chunk in chunks(files):
+            results.extend(transpile_chunk(chunk))
+    else:
+        with ProcessPoolExecutor(workers, initializer=init_worker,
+                                 initargs=(options, cache_directory, instrument_memory, max_diagnostics)) as executor:
+            pending = [executor.submit(transpile_chunk, chunk) for chunk in chunks(files, workers)]
+            for future in as_completed(pending):
+                results.extend(future.result())
+    return ResumoDoLote(results, time.perf_counter() - start, workers)
+
+def print_problems(summary, stream=sys.stderr):
+    for result in summary.results:
+        if result.failure:
+            print(f"{result.path}: {result.failure}", file=stream)
+        for record in result.diagnostics:
+            print(record.format(result.path), file=stream)
@@ -1,7 +1,19 @@
-from analiseLexica import AnalisadorLexicoJS
+import argparse
+import sys
+
+from analiseLexica import create_lexer
 from analiseSintatica import AnalisadorSintaticoJS
 from analiseSemantica import AnalisadorSemanticoJS
+from diagnosticos import MAX_DIAGNOSTICS, write_report
 from geradorDeCodigo import GeradorDeCodigoPythonFromJS
+from inferenciaDeTipos import InferenciaDeTipos
+from instrumentacao import Instrumentacao, write_chrome_trace, write_json
+from mapaDeFontes import load_maps, remap_collapsed, remap_profile
+from lote import print_problems, transpile_batch
+from observador import ObservadorDeArquivos
+from otimizador import Otimizador
+from servidor import ServidorDeTranspilacao
+from transpilador import transpile
 
 example01 = '''
 var a = prompt("Digite um número");
@@ -73,24 +85,147 @@ function fibonnaci_iterativo(n){
 
 '''
 
-code = example07
-
-# Analise Léxica
-lexer = AnalisadorLexicoJS()
-tokens = lexer.tokenize(code)
-print("Tokens:", tokens)
-
-# Analise Sintática
-parser = AnalisadorSintaticoJS(tokens)
-ast = parser.parse()
-print("AST:", ast)
-
-# Analise Semântica
-analyzer = AnalisadorSemanticoJS(ast)
-analyzer.analyze()
- 
-# Gerador de Código
-generator = GeradorDeCodigoPythonFromJS(ast)
-python_code = generator.generate()
-print("Python Code:")
-print(python_code)
+EXAMPLES = [example01, example02, example03, example04, example05, example06, example07]
+
+def run_example(code, level=2, lexer='ply', types=True):
+    # Mostra cada etapa do pipeline para um trecho de código
+    # Analise Léxica
+    tokens = create_lexer(lexer).tokenize(code)
+    print("Tokens:", tokens)
+
+    # Analise Sintática
+    parser = AnalisadorSintaticoJS(tokens)
+    ast = parser.parse()
+    print("AST:", ast)
+
+    # Analise Semântica
+    analyzer = AnalisadorSemanticoJS(ast)
+    analyzer.analyze()
+
+    # Otimização (nível 0 desliga)
+    optimizer = Otimizador(level)
+    ast = optimizer.optimize(ast)
+    for pass_name, elapsed in optimizer.timings:
+        print(f"Otimização {pass_name}: {elapsed * 1e3:.3f} ms")
+
+    # Inferência de Tipos
+    facts = None
+    if types:
+        facts = InferenciaDeTipos(ast).run()
+        for (function, name), type in facts.variables.items():
+            print(f"Tipo de {name}{f' em {function}' if function else ''}: {type}")
+        for function, type in facts.returns.items():
+            print(f"Retorno de {function}: {type}")
+
+    # Gerador de Código
+    generator = GeradorDeCodigoPythonFromJS(ast, types=facts)
+    python_code = generator.generate()
+    print("Python Code:")
+    print(python_code)
+
+def instrument_example(code, args):
+    # O exemplo de novo, pelo caminho instrumentado, com a tabela por etapa
+    instrumentation = Instrumentacao('exemplo', not args.sem_memoria)
+    transpile(code, instrumentation=instrumentation, lexer=args.lexer, level=args.nivel, types=not args.sem_tipos)
+    for line in instrumentation.summary_lines():
+        print(line)
+    write_instrumentation([instrumentation], args)
+
+def write_instrumentation(records, args):
+    if args.instrumentar:
+        write_json(records, args.instrumentar)
+    if args.trace:
+        write_chrome_trace(records, args.trace)
+
+def print_profile(args, limit=30):
+    import pstats
+    rows = remap_profile(pstats.Stats(args.perfil), load_maps(args.saida))
+    print(f"{'local no JS':40} {'função':24} {'chamadas':>9} {'próprio s':>10} {'acumulado s':>12}")
+    for location, function, calls, own, cumulative in rows[:limit]:
+        print(f"{location:40} {function:24} {calls:9} {own:10.4f} {cumulative:12.4f}")
+
+def print_stacks(args):
+    with open(args.pilhas, encoding='utf-8') as input_file:
+        for line in remap_collapsed(input_file, load_maps(args.saida)):
+            sys.stdout.write(line)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Transpila JavaScript para Python. Sem entradas, mostra as etapas para um exemplo.")
+    parser.add_argument('entradas', nargs='*', help="arquivos .js, diretórios ou globs")
+    parser.add_argument('-o', '--saida', default='saida_python', help="diretório que espelha as entradas")
+    parser.add_argument('-j', '--processos', type=int, default=None,
+                        help="processos de trabalho (padrão: número de CPUs)")
+    parser.add_argument('--nivel', type=int, default=2, help="nível de otimização (0 desliga)")
+    parser.add_argument('--lexer', choices=('ply', 'scanner'), default='ply')
+    parser.add_argument('--sem-tipos', action='store_true',
+                        help="gera o código sem a inferência de tipos (sem int() em prompt, str() em "
+                             "concatenações, comparações com true/false simplificadas nem range() "
+                             "com limites em variáveis)")
+    parser.add_argument('--cache', metavar='DIRETORIO', help="cache de transpilação em disco")
+    parser.add_argument('--observar', action='store_true',
+                        help="continua observando as entradas e refaz só o que mudar a cada gravação")
+    parser.add_argument('--intervalo', type=float, default=0.25,
+                        help="segundos entre verificações no modo --observar")
+    parser.add_argument('--servidor', nargs='?', const='-', metavar='SOCKET',
+                        help="atende pedidos JSON-lines num socket Unix (ou na entrada padrão, com '-')")
+    parser.add_argument('--pendentes', type=int, default=64,
+                        help="pedidos em andamento no modo --servidor antes de parar de ler")
+    parser.add_argument('--instrumentar', metavar='ARQUIVO',
+                        help="grava em JSON tempo, memória e contagens de cada etapa por arquivo")
+    parser.add_argument('--trace', metavar='ARQUIVO',
+                        help="grava as etapas no formato de trace do Chrome (chrome://tracing, Perfetto)")
+    parser.add_argument('--sem-memoria', action='store_true',
+                        help="instrumenta sem o tracemalloc, que pesa nos tempos")
+    parser.add_argument('--max-erros', type=int, default=MAX_DIAGNOSTICS,
+                        help="diagnósticos por arquivo antes de interromper a análise dele")
+    parser.add_argument('--diagnosticos', metavar='ARQUIVO',
+                        help="grava em JSON os diagnósticos de cada arquivo")
+    parser.add_argument('--mapas', action='store_true',
+                        help="grava ao lado de cada .py um .py.map com as posições no JS de cada linha")
+    parser.add_argument('--perfil', metavar='PSTATS',
+                        help="mostra um perfil do cProfile do código gerado em -o pelas posições no JS")
+    parser.add_argument('--pilhas', metavar='ARQUIVO',
+                        help="reescreve pilhas colapsadas (py-spy --format raw) do código gerado em -o "
+                             "com as posições no JS")
+    parser.add_argument('--exemplo', type=int, choices=range(1, len(EXAMPLES) + 1), default=len(EXAMPLES),
+                        help="exemplo mostrado quando não há entradas")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.perfil:
+        print_profile(args)
+        return 0
+    if args.pilhas:
+        print_stacks(args)
+        return 0
+    if args.servidor:
+        ServidorDeTranspilacao(args.processos, args.pendentes, args.cache,
+                               lexer=args.lexer, level=args.nivel, types=not args.sem_tipos).run(args.servidor)
+        return 0
+    instrument = bool(args.instrumentar or args.trace)
+    if not args.entradas:
+        run_example(EXAMPLES[args.exemplo - 1], args.nivel, args.lexer, not args.sem_tipos)
+        if instrument:
+            instrument_example(EXAMPLES[args.exemplo - 1], args)
+        return 0
+    if args.observar:
+        ObservadorDeArquivos(args.entradas, args.saida, args.intervalo,
+                             lexer=args.lexer, level=args.nivel, types=not args.sem_tipos).run()
+        return 0
+    summary = transpile_batch(args.entradas, args.saida, args.processos, args.cache,
+                              not args.sem_memoria if instrument else None, args.max_erros,
+                              lexer=args.lexer, level=args.nivel, source_map=args.mapas,
+                              types=not args.sem_tipos)
+    if instrument:
+        write_instrumentation([result.instrumentation for result in summary.results], args)
+    if args.diagnosticos:
+        write_report({result.path: result.diagnostics for result in summary.results}, args.diagnosticos)
+    print_problems(summary)
+    for line in summary.report():
+        print(line)
+    return 1 if any(result.failure for result in summary.results) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
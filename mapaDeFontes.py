@@ -0,0 +1,174 @@
+import bisect
+import json
+import os
+import re
+
+# Mapas de fontes: para cada linha do Python gerado, a linha e a coluna do JS
+# de onde ela veio (a declaração ou expressão que o gerador estava emitindo).
+# Gravados no formato dos source maps do JS, versão 3: um segmento VLQ em
+# base64 por linha gerada, com coluna gerada 0 e linha/coluna de origem
+# relativas ao segmento anterior; linhas sem origem ficam vazias.
+#
+# Com o texto JS em memória, linha e coluna saem do lexpos do nó (linhas de
+# verdade, contando quebras dentro de strings); sem ele (transpile_file),
+# a linha é o lineno do nó e a coluna fica em 1.
+#
+# Linhas e colunas são contadas a partir de 1 na API, como nos diagnósticos;
+# só o texto do formato usa a contagem a partir de 0.
+BASE64 = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+BASE64_VALUES = {char: value for value, char in enumerate(BASE64)}
+
+def encode_vlq(value):
+    # Sinal no bit menos significativo, grupos de 5 bits com bit de continuação
+    vlq = (-value << 1) | 1 if value < 0 else value << 1
+    digits = []
+    while True:
+        digit = vlq & 31
+        vlq >>= 5
+        if vlq:
+            digit |= 32
+        digits.append(BASE64[digit])
+        if not vlq:
+            return ''.join(digits)
+
+def decode_vlq(segment):
+    values = []
+    value = shift = 0
+    for char in segment:
+        digit = BASE64_VALUES[char]
+        value += (digit & 31) << shift
+        if digit & 32:
+            shift += 5
+        else:
+            values.append(-(value >> 1) if value & 1 else value >> 1)
+            value = shift = 0
+    return values
+
+def line_starts(source):
+    starts = [0]
+    position = source.find('\n')
+    while position >= 0:
+        starts.append(position + 1)
+        position = source.find('\n', position + 1)
+    return starts
+
+class MapaDeFontes:
+    # lines[i] é (linha, coluna) do JS para a linha i + 1 do Python, ou None
+    def __init__(self, source=None):
+        self.lines = []
+        self.starts = None if source is None else line_starts(source)
+
+    def add(self, lineno, position):
+        # Origem da próxima linha gerada
+        if position is not None and self.starts is not None:
+            index = bisect.bisect_right(self.starts, position) - 1
+            self.lines.append((index + 1, position - self.starts[index] + 1))
+        elif lineno is not None:
+            self.lines.append((lineno, 1))
+        else:
+            self.lines.append(None)
+
+    def lookup(self, line):
+        # (linha, coluna) do JS para uma linha do Python; linhas sem origem
+        # própria herdam a da linha anterior mais próxima
+        index = min(line, len(self.lines)) - 1
+        while index >= 0:
+            if self.lines[index] is not None:
+                return self.lines[index]
+            index -= 1
+        return None
+
+    def mappings(self):
+        # Coluna gerada e índice da fonte são sempre 0: 'AA'
+        segments = []
+        previous_line = previous_column = 0
+        for position in self.lines:
+            if position is None:
+                segments.append('')
+                continue
+            line, column = position[0] - 1, position[1] - 1
+            segments.append('AA' + encode_vlq(line - previous_line) + encode_vlq(column - previous_column))
+            previous_line, previous_column = line, column
+        return ';'.join(segments)
+
+    def as_dict(self, file=None, source=None):
+        return {'version': 3, 'file': file, 'sources': [source], 'names': [], 'mappings': self.mappings()}
+
+    @classmethod
+    def from_dict(cls, data):
+        source_map = cls()
+        line = column = 0
+        for segments in data['mappings'].split(';'):
+            position = None
+            for segment in filter(None, segments.split(',')):
+                # Só o primeiro segmento de cada linha conta; os campos de
+                # origem são relativos mesmo entre segmentos descartados
+                values = decode_vlq(segment)
+                if len(values) >= 4:
+                    line += values[2]
+                    column += values[3]
+                    if position is None:
+                        position = (line + 1, column + 1)
+            source_map.lines.append(position)
+        return source_map
+
+    def write(self, path, file=None, source=None):
+        with open(path, 'w', encoding='utf-8') as output:
+            json.dump(self.as_dict(file, source), output)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as input_file:
+            return cls.from_dict(json.load(input_file))
+
+# Reatribuição de perfis do código gerado ao JS
+
+def load_maps(directory):
+    # {caminho absoluto do .py: (MapaDeFontes, caminho do .js)} para os .map
+    # gravados ao lado da saída (main.py --mapas)
+    maps = {}
+    for root, _, names in os.walk(directory):
+        for name in names:
+            if not name.endswith('.py.map'):
+                continue
+            path = os.path.join(root, name)
+            with open(path, encoding='utf-8') as input_file:
+                data = json.load(input_file)
+            source = data['sources'][0]
+            if source is not None:
+                source = os.path.normpath(os.path.join(root, source))
+            maps[os.path.abspath(path[:-len('.map')])] = (MapaDeFontes.from_dict(data), source)
+    return maps
+
+def js_location(maps, path, line):
+    # 'arquivo.js:linha:coluna' para uma linha de um .py gerado, ou None
+    entry = maps.get(os.path.abspath(path))
+    if entry is None:
+        return None
+    source_map, source = entry
+    position = source_map.lookup(line)
+    if position is None:
+        return None
+    return f"{source}:{position[0]}:{position[1]}"
+
+def remap_profile(stats, maps):
+    # Linhas (local no JS, função, chamadas, tempo próprio, tempo acumulado)
+    # de um pstats.Stats, só das funções do código gerado, mais caras primeiro
+    rows = []
+    for (path, line, function), (_, calls, own, cumulative, _) in stats.stats.items():
+        location = js_location(maps, path, line)
+        if location is not None:
+            rows.append((location, function, calls, own, cumulative))
+    rows.sort(key=lambda row: row[3], reverse=True)
+    return rows
+
+PY_SPY_FRAME = re.compile(r'\(([^()]+\.py):(\d+)\)')
+
+def remap_collapsed(lines, maps):
+    # Pilhas no formato colapsado (py-spy record --format raw, flamegraph):
+    # cada '(arquivo.py:linha)' de código gerado vira o local no JS
+    def replace(match):
+        location = js_location(maps, match.group(1), int(match.group(2)))
+        return f"({location})" if location is not None else match.group(0)
+    for line in lines:
+        yield PY_SPY_FRAME.sub(replace, line)
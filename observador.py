@@ -0,0 +1,496 @@
+import hashlib
+import os
+import sys
+import time
+
+from analiseLexica import create_lexer
+from analiseSemantica import AnalisadorSemanticoJS
+from analiseDeLacos import loop_reads
+from analiseSintatica import AnalisadorSintaticoJS
+from arvoreSintatica import Program
+from geradorDeCodigo import GeradorDeCodigoPythonFromJS
+from inferenciaDeTipos import InferenciaDeTipos
+from lote import collect
+from otimizador import ContextoExterno, Otimizador, constant_candidates, declaration_facts, hoisting_names
+from transpilador import options_with_defaults
+
+# Modo de observação: os arquivos são verificados por mtime a cada intervalo
+# e só o arquivo salvo passa de novo pelo analisador léxico. Os tokens são
+# cortados em trechos (declarações de nível superior consecutivas) e cada
+# trecho é identificado pelo hash dos seus tokens; trechos com o mesmo hash
+# mantêm a subárvore e o Python gerados da última vez. Do texto salvo, só a
+# região entre o último trecho inteiro antes da primeira diferença e o
+# primeiro trecho inteiro depois da última volta ao analisador léxico; os
+# tokens dos outros trechos são reaproveitados, com linha e posição
+# deslocadas.
+#
+# A saída de um trecho depende também do resto do programa: globais vistas
+# pela análise semântica, constantes propagadas, nomes lidos fora de laços,
+# nomes criados para invariantes e os tipos inferidos (a inferência roda sobre
+# o programa todo a cada geração; um trecho que não foi editado mas passaria a
+# ser especializado de outro jeito refaz o arquivo inteiro). Quando só corpos
+# de funções de nível superior mudam, cada função alterada é refeita sozinha,
+# com esse contexto montado a partir do que os outros trechos registraram; se
+# ela passa a contribuir de forma diferente para o contexto (outra constante,
+# outro nome lido fora de laços, ...), o arquivo inteiro é refeito. Qualquer
+# outra mudança também refaz o arquivo inteiro. A saída é sempre a mesma de
+# transpile().
+OPENING = ('LPAREN', 'LBRACE', 'LBRACKET')
+CLOSING = ('RPAREN', 'RBRACE', 'RBRACKET')
+
+def advance(depth, type):
+    # Profundidade depois de um token e se ele termina uma declaração de
+    # nível superior: ';' ou '}' fora de parênteses, colchetes e chaves (um
+    # '}' seguido de else não termina, o que fica a cargo de quem chama)
+    if type in OPENING:
+        return depth + 1, False
+    if type in CLOSING:
+        depth -= 1
+        if type == 'RBRACE' and depth <= 0:
+            return 0, True
+        return depth, False
+    if type == 'SEMICOLON' and depth <= 0:
+        return 0, True
+    return depth, False
+
+def split_statements(tokens):
+    # Intervalos [início, fim) de tokens de declarações de nível superior
+    ranges = []
+    start = 0
+    depth = 0
+    last = len(tokens) - 1
+    for i, token in enumerate(tokens):
+        depth, ends = advance(depth, token.type)
+        if ends and not (token.type == 'RBRACE' and i < last and tokens[i + 1].type == 'ELSE'):
+            ranges.append((start, i + 1))
+            start = i + 1
+    if start < len(tokens):
+        ranges.append((start, len(tokens)))
+    return ranges
+
+def common_prefix(a, b):
+    # Busca binária sobre fatias: cada comparação roda em C
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+def token_digest(tokens):
+    # Só tipo e valor: mudar linhas não muda o trecho
+    digest = hashlib.blake2b(digest_size=16)
+    for token in tokens:
+        digest.update(f"{token.type}\x00{token.value}\x01".encode('utf-8', 'surrogatepass'))
+    return digest.digest()
+
+def stage_facts(ast, fields):
+    # O que um trecho contribui para os campos de ContextoExterno que um passo
+    # consulta, no estado em que a árvore está antes dele
+    facts = {}
+    if 'candidates' in fields:
+        facts['candidates'] = declaration_facts(ast)
+    if 'free_names' in fields:
+        candidates, free_names = loop_reads(ast)
+        facts['free_names'] = ({node.init.identifier.value for node in candidates}, free_names)
+    if 'names' in fields:
+        facts['names'] = hoisting_names(ast)
+    return facts
+
+def shared_context(chunk_facts):
+    # Os campos de ContextoExterno iguais para todos os trechos. Dos nomes
+    # lidos fora de laços só interessam os que são variáveis de algum for
+    shared = {}
+    if not chunk_facts:
+        return shared
+    fields = chunk_facts[0].keys()
+    if 'candidates' in fields:
+        shared['candidates'] = constant_candidates([facts['candidates'] for facts in chunk_facts])
+    if 'free_names' in fields:
+        variables = set()
+        free_names = set()
+        for facts in chunk_facts:
+            variables |= facts['free_names'][0]
+            free_names |= facts['free_names'][1]
+        shared['free_names'] = free_names & variables
+    if 'names' in fields:
+        shared['names'] = set().union(*(facts['names'] for facts in chunk_facts))
+    return shared
+
+def exports_key(exports):
+    # Para comparar: nós literais não têm __eq__, e 1 == 1.0 mas o código
+    # gerado é diferente
+    constants, names = exports
+    return {name: (node.type, repr(node.value)) for name, node in constants.items()}, names
+
+class AnaliseDeTrechos(AnalisadorSemanticoJS):
+    # Separa os erros do corpo de cada função de nível superior, que é
+    # analisado depois de todo o nível superior, para poder refazer um corpo
+    # sozinho sobre os nomes globais da última análise do arquivo
+    def __init__(self, ast, global_names=None):
+        super().__init__(ast)
+        if global_names is not None:
+            self.symbol_table.scope.names = dict(global_names)
+        self.body_errors = {}
+
+    def function_body(self, node):
+        top_level = self.symbol_table.scope.parent is None
+        start = len(self.errors)
+        yield from super().function_body(node)
+        if top_level:
+            self.body_errors[node] = self.errors[start:]
+            del self.errors[start:]
+
+class Trecho:
+    # Declarações de nível superior consecutivas de um arquivo. signature é
+    # (nome, parâmetros) quando o trecho é uma função só; facts e exports são,
+    # por passo de otimização, o que ele contribui para o contexto dos outros;
+    # type_decisions, o que a geração consultou nos tipos inferidos
+    __slots__ = ('tokens', 'digest', 'ast', 'signature', 'code', 'body_errors', 'facts', 'exports',
+                 'final_facts', 'type_decisions')
+
+    def __init__(self, tokens, digest, ast):
+        self.tokens = tokens
+        self.digest = digest
+        self.ast = ast
+        self.signature = None
+        if len(ast.children) == 1 and ast.children[0].type == 'FunctionDeclaration':
+            identifier, params, _ = ast.children[0].children
+            self.signature = (identifier.value, tuple(param.value for param in params.children))
+        self.code = ''
+        self.body_errors = []
+        self.facts = []
+        self.exports = []
+        self.final_facts = None
+        self.type_decisions = None
+
+class ArquivoObservado:
+    # Estado de um arquivo depois da última geração: texto, trechos, erros
+    # fora de corpos de funções, nomes globais da análise semântica e o
+    # contexto comum de cada passo (o último é o da geração de código)
+    __slots__ = ('source', 'mtime', 'size', 'text', 'chunks', 'errors', 'global_names', 'shared')
+
+    def __init__(self, source, mtime, size):
+        self.source = source
+        self.mtime = mtime
+        self.size = size
+        self.text = ''
+        self.chunks = []
+        self.errors = []
+        self.global_names = {}
+        self.shared = []
+
+    @property
+    def python_code(self):
+        # Os trechos de funções primeiro, como na geração do arquivo inteiro
+        # (tabelaDeSimbolos.hoisted)
+        chunks = [chunk for chunk in self.chunks if chunk.signature is not None]
+        chunks += [chunk for chunk in self.chunks if chunk.signature is None]
+        return '\n'.join(chunk.code for chunk in chunks if chunk.code)
+
+    @property
+    def all_errors(self):
+        return self.errors + [error for chunk in self.chunks for error in chunk.body_errors]
+
+class MudancaObservada:
+    # seconds: da detecção até a saída gravada; latency: da modificação do
+    # arquivo (mtime) até a saída gravada
+    __slots__ = ('path', 'chunks', 'regenerated', 'full', 'seconds', 'latency', 'errors', 'failure')
+
+    def __init__(self, path, chunks, regenerated, full, seconds, latency, errors, failure=None):
+        self.path = path
+        self.chunks = chunks
+        self.regenerated = regenerated
+        self.full = full
+        self.seconds = seconds
+        self.latency = latency
+        self.errors = errors
+        self.failure = failure
+
+    def report(self):
+        if self.failure:
+            return f"{self.path}: {self.failure}"
+        scope = "arquivo inteiro" if self.full else f"{self.regenerated} de {self.chunks} trechos"
+        line = (f"{self.path}: {scope} em {self.seconds * 1e3:.1f} ms, "
+                f"edição → saída {self.latency * 1e3:.1f} ms")
+        if self.errors:
+            line += f", {len(self.errors)} erro(s) semântico(s)"
+        return line
+
+class ObservadorDeArquivos:
+    def __init__(self, inputs, output_directory, interval=0.25, **options):
+        self.inputs = inputs
+        self.output_directory = output_directory
+        self.interval = interval
+        self.options = options_with_defaults(options)
+        self.tokenizer = create_lexer(self.options['lexer'])
+        self.passes = Otimizador(self.options['level']).passes
+        self.files = {}  # caminho -> ArquivoObservado
+        self.failed = {}  # caminho -> (mtime, tamanho) da versão que falhou
+
+    def poll(self):
+        changes = []
+        seen = set()
+        for source in collect(self.inputs, self.output_directory):
+            seen.add(source.path)
+            try:
+                stat = os.stat(source.path)
+            except OSError:
+                continue
+            state = self.files.get(source.path)
+            if state is not None and state.mtime == stat.st_mtime_ns and state.size == stat.st_size:
+                continue
+            if self.failed.get(source.path) == (stat.st_mtime_ns, stat.st_size):
+                continue
+            changes.append(self.update(source, stat, state))
+        for path in self.files.keys() - seen:
+            del self.files[path]
+        for path in self.failed.keys() - seen:
+            del self.failed[path]
+        return changes
+
+    def run(self, stream=sys.stdout, polls=None):
+        # polls limita o número de verificações (None observa até Ctrl+C)
+        try:
+            while polls is None or polls > 0:
+                for change in self.poll():
+                    print(change.report(), file=stream)
+                    for error in change.errors:
+                        print(f"{change.path}: Erro Semântico: {error}", file=stream)
+                    stream.flush()
+                if polls is not None:
+                    polls -= 1
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            pass
+
+    def update(self, source, stat, previous):
+        start = time.perf_counter()
+        state = ArquivoObservado(source, stat.st_mtime_ns, stat.st_size)
+        try:
+            with open(source.path, encoding='utf-8') as input_file:
+                state.text = input_file.read()
+            pieces = self.relex(state.text, previous)
+            tokens = [chunk_tokens for chunk_tokens, _ in pieces]
+            digests = [chunk.digest if chunk is not None else token_digest(chunk_tokens)
+                       for chunk_tokens, chunk in pieces]
+            regenerated = self.incremental(state, previous, tokens, digests)
+            full = regenerated is None
+            if full:
+                self.rebuild(state, tokens, digests)
+                regenerated = len(state.chunks)
+            if regenerated or previous is None:
+                os.makedirs(os.path.dirname(source.target) or '.', exist_ok=True)
+                with open(source.target, 'w', encoding='utf-8') as output:
+                    output.write(state.python_code)
+                    output.write('\n')
+        except Exception as error:
+            # Arquivos salvos no meio da digitação chegam a qualquer etapa
+            # malformados; o erro vai para o relatório e a observação segue
+            self.files.pop(source.path, None)
+            self.failed[source.path] = (stat.st_mtime_ns, stat.st_size)
+            return MudancaObservada(source.path, 0, 0, True, time.perf_counter() - start, 0.0, [],
+                                    f"{error.__class__.__name__}: {error}")
+        self.files[source.path] = state
+        self.failed.pop(source.path, None)
+        seconds = time.perf_counter() - start
+        latency = max(time.time_ns() - stat.st_mtime_ns, 0) / 1e9
+        return MudancaObservada(source.path, len(state.chunks), regenerated, full, seconds, latency,
+                                state.all_errors)
+
+    def relex(self, text, previous):
+        # Tokens de cada trecho, com o Trecho anterior quando ele foi
+        # reaproveitado sem passar pelo analisador léxico
+        if previous is not None and previous.chunks:
+            pieces = self.relex_changed(text, previous)
+            if pieces is not None:
+                return pieces
+        tokens = list(self.tokenizer.iter_tokens(text))
+        return [(tokens[begin:end], None) for begin, end in split_statements(tokens)]
+
+    def relex_changed(self, text, previous):
+        old = previous.text
+        chunks = previous.chunks
+        prefix = common_prefix(old, text)
+        suffix = min(common_prefix(old[::-1], text[::-1]), min(len(old), len(text)) - prefix)
+        delta = len(text) - len(old)
+        # Trechos inteiros antes da primeira diferença (';' e '}' não se
+        # juntam ao que vier depois deles)
+        first = 0
+        while first < len(chunks):
+            last = chunks[first].tokens[-1]
+            if last.type not in ('SEMICOLON', 'RBRACE') or last.lexpos + 1 > prefix:
+                break
+            first += 1
+        start = chunks[first - 1].tokens[-1].lexpos + 1 if first else 0
+        # Onde o texto volta a ser o antigo, um trecho que começa ali começa
+        # com os mesmos tokens de antes
+        resync = {}
+        for j in range(first, len(chunks)):
+            position = chunks[j].tokens[0].lexpos
+            if position >= len(old) - suffix:
+                resync[position + delta] = j
+        line = text.count('\n', 0, start)
+        middle = []
+        depth, ends = 0, True
+        j = len(chunks)
+        for token in self.tokenizer.iter_tokens(text[start:]):
+            token.lexpos += start
+            token.lineno += line
+            if token.type == 'ELSE' and first and not middle:
+                # Um else logo depois do '}' de um trecho anterior
+                return None
+            if ends and token.lexpos in resync and token.type != 'ELSE':
+                j = resync[token.lexpos]
+                break
+            middle.append(token)
+            depth, ends = advance(depth, token.type)
+        pieces = [(chunk.tokens, chunk) for chunk in chunks[:first]]
+        pieces.extend((middle[begin:end], None) for begin, end in split_statements(middle))
+        if j < len(chunks):
+            line_delta = token.lineno - chunks[j].tokens[0].lineno
+            if line_delta or delta:
+                for chunk in chunks[j:]:
+                    for moved in chunk.tokens:
+                        moved.lineno += line_delta
+                        moved.lexpos += delta
+            pieces.extend((chunk.tokens, chunk) for chunk in chunks[j:])
+        return pieces
+
+    def parse(self, tokens):
+        return AnalisadorSintaticoJS(tokens).program()
+
+    def rebuild(self, state, tokens, digests):
+        try:
+            state.chunks = [Trecho(chunk_tokens, digest, self.parse(chunk_tokens))
+                            for chunk_tokens, digest in zip(tokens, digests)]
+        except SyntaxError:
+            # O corte não bateu com a gramática: o arquivo vira um trecho só
+            # (e o erro, se houver, é o do arquivo inteiro)
+            tokens = [token for chunk_tokens in tokens for token in chunk_tokens]
+            state.chunks = [Trecho(tokens, token_digest(tokens), self.parse(tokens))]
+        chunks = state.chunks
+        program = Program(lineno=1)
+        program.children = [statement for chunk in chunks for statement in chunk.ast.children]
+        analyzer = AnaliseDeTrechos(program)
+        analyzer.visit(program)
+        state.errors = analyzer.errors
+        state.global_names = analyzer.symbol_table.scope.names
+        for chunk in chunks:
+            chunk.body_errors = [error for statement in chunk.ast.children
+                                 for error in analyzer.body_errors.get(statement, ())]
+
+        for pass_class in self.passes:
+            for chunk in chunks:
+                chunk.facts.append(stage_facts(chunk.ast, pass_class.context_fields))
+            shared = shared_context([chunk.facts[-1] for chunk in chunks])
+            state.shared.append(shared)
+            constants = {}
+            names = []
+            for chunk in chunks:
+                step = pass_class(self.context(shared, constants, names))
+                chunk.ast = step.run(chunk.ast)
+                exports = step.exported()
+                chunk.exports.append(exports)
+                constants.update(exports[0])
+                names.extend(exports[1])
+
+        for chunk in chunks:
+            chunk.final_facts = stage_facts(chunk.ast, ('free_names',))
+        shared = shared_context([chunk.final_facts for chunk in chunks])
+        state.shared.append(shared)
+        types = self.infer(chunks)
+        for chunk in chunks:
+            if types is not None:
+                chunk.type_decisions = types.decisions(chunk.ast)
+            chunk.code = self.generate(chunk, shared, types)
+
+    def context(self, shared, constants, names):
+        if not shared:
+            return None
+        return ContextoExterno(shared.get('candidates', frozenset()), constants,
+                               shared.get('free_names', frozenset()),
+                               shared['names'].union(names) if 'names' in shared else frozenset())
+
+    def infer(self, chunks):
+        # Tipos de retorno, de parâmetros e de globais atravessam os trechos:
+        # a inferência vê o programa inteiro
+        if not self.options['types']:
+            return None
+        program = Program([statement for chunk in chunks for statement in chunk.ast.children], lineno=1)
+        return InferenciaDeTipos(program).run()
+
+    def generate(self, chunk, shared, types=None):
+        return GeradorDeCodigoPythonFromJS(chunk.ast, outside_names=shared.get('free_names', ()),
+                                           types=types).generate()
+
+    def incremental(self, state, previous, tokens, digests):
+        # Devolve quantos trechos foram refeitos, ou None se o arquivo inteiro
+        # precisa ser refeito
+        if previous is None or len(previous.chunks) != len(tokens):
+            return None
+        old_chunks = previous.chunks
+        chunks = list(old_chunks)
+        changed = []
+        for i, chunk in enumerate(old_chunks):
+            if chunk.digest != digests[i]:
+                changed.append(i)
+            else:
+                # Mesmos tokens, talvez em outras posições
+                chunk.tokens = tokens[i]
+        fresh = {}
+        for i in changed:
+            try:
+                chunk = Trecho(tokens[i], digests[i], self.parse(tokens[i]))
+            except SyntaxError:
+                return None
+            if chunk.signature is None or chunk.signature != old_chunks[i].signature:
+                return None
+            function = chunk.ast.children[0]
+            analyzer = AnaliseDeTrechos(Program(lineno=1), previous.global_names)
+            analyzer.symbol_table.scope.pending.append(function)
+            analyzer.visit(analyzer.ast)
+            chunk.body_errors = analyzer.body_errors[function]
+            chunks[i] = fresh[i] = chunk
+
+        for index, pass_class in enumerate(self.passes):
+            for i, chunk in fresh.items():
+                chunk.facts.append(stage_facts(chunk.ast, pass_class.context_fields))
+            shared = previous.shared[index]
+            if fresh and shared_context([chunk.facts[index] for chunk in chunks]) != shared:
+                return None
+            constants = {}
+            names = []
+            for i, chunk in enumerate(chunks):
+                if i in fresh:
+                    step = pass_class(self.context(shared, constants, names))
+                    chunk.ast = step.run(chunk.ast)
+                    exports = step.exported()
+                    if exports_key(exports) != exports_key(old_chunks[i].exports[index]):
+                        return None
+                    chunk.exports.append(exports)
+                exports = old_chunks[i].exports[index]
+                constants.update(exports[0])
+                names.extend(exports[1])
+
+        shared = previous.shared[-1]
+        for chunk in fresh.values():
+            chunk.final_facts = stage_facts(chunk.ast, ('free_names',))
+        if fresh and shared_context([chunk.final_facts for chunk in chunks]) != shared:
+            return None
+        types = self.infer(chunks)
+        if types is not None:
+            for i, chunk in enumerate(chunks):
+                decisions = types.decisions(chunk.ast)
+                if i not in fresh and decisions != chunk.type_decisions:
+                    return None
+                chunk.type_decisions = decisions
+        for chunk in fresh.values():
+            chunk.code = self.generate(chunk, shared, types)
+        state.chunks = chunks
+        state.errors = previous.errors
+        state.global_names = previous.global_names
+        state.shared = previous.shared
+        return len(fresh)
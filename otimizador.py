@@ -0,0 +1,393 @@
+import time
+
+from analiseDeLacos import body_effects, find_counted_loops
+from arenaSintatica import ArenaNode
+from arvoreSintatica import Boolean, FixedNode, Identifier, Number, String, VarDeclaration
+from instrumentacao import no_stage
+from visitanteAST import VisitanteAST
+
+# Passos de otimização entre a análise semântica e a geração de código. Cada
+# passo é um visitante que reescreve a árvore no lugar e devolve o nó que
+# substitui o visitado: o próprio nó, outro nó, uma lista de declarações (que
+# é espalhada no Block ou Program pai) ou [] para remover a declaração.
+#
+# As dobras seguem a semântica do Python gerado, não a do JS: só operandos do
+# mesmo tipo são dobrados, como o CPython faria ao executar o código.
+LITERALS = {'Number': Number, 'String': String, 'Boolean': Boolean}
+ARITHMETIC = {
+    '+': lambda a, b: a + b,
+    '-': lambda a, b: a - b,
+    '*': lambda a, b: a * b,
+    '/': lambda a, b: a / b,
+}
+COMPARISONS = {
+    '==': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+}
+# Operadores dobráveis por tipo dos dois operandos
+FOLDABLE = {
+    'Number': {**ARITHMETIC, **COMPARISONS},
+    'String': {'+': ARITHMETIC['+']},
+    'Boolean': {'==': COMPARISONS['=='], '!=': COMPARISONS['!=']},
+}
+
+def is_literal(node):
+    return node.type in LITERALS
+
+def literal(value, lineno, position=None):
+    # bool antes de int: True também é instância de int
+    if isinstance(value, bool):
+        return Boolean(value, lineno, position)
+    if isinstance(value, str):
+        return String(value, lineno, position)
+    return Number(value, lineno, position)
+
+class ContextoExterno:
+    # O que o resto do programa contribui quando os passos rodam sobre uma
+    # parte dele só (um trecho de nível superior, no modo de observação):
+    # candidatos e constantes já registradas para a propagação, nomes lidos
+    # fora de laços (find_counted_loops) e nomes que os nomes novos do
+    # movimento de invariantes precisam evitar
+    __slots__ = ('candidates', 'constants', 'free_names', 'names')
+
+    def __init__(self, candidates=frozenset(), constants=None, free_names=frozenset(), names=frozenset()):
+        self.candidates = candidates
+        self.constants = constants if constants is not None else {}
+        self.free_names = free_names
+        self.names = names
+
+class PassoDeOtimizacao(VisitanteAST):
+    prune_after_return = False
+    # Campos do ContextoExterno que o passo consulta
+    context_fields = ()
+
+    def __init__(self, context=None):
+        self.context = context
+
+    def run(self, ast):
+        return self.visit(ast)
+
+    def exported(self):
+        # O que esta execução acrescenta ao contexto das partes seguintes do
+        # programa: (constantes registradas, nomes criados)
+        return {}, ()
+
+    def generic_visit(self, node):
+        if isinstance(node, FixedNode):
+            for field in node.fields:
+                child = getattr(node, field)
+                if child is not None:
+                    setattr(node, field, (yield child))
+        elif node.children:
+            node.children = yield from self.statements(node.children)
+        return node
+
+    def statements(self, children):
+        # Visita uma lista de filhos espalhando as listas devolvidas; depois de
+        # um return só as declarações de função, içadas, continuam valendo
+        result = []
+        unreachable = False
+        for child in children:
+            if unreachable and child.type != 'FunctionDeclaration':
+                continue
+            replacement = yield child
+            if replacement.__class__ is list:
+                result.extend(replacement)
+            else:
+                result.append(replacement)
+            if result and result[-1].type == 'ReturnStatement' and self.prune_after_return:
+                unreachable = True
+        return result
+
+    def keep(self, node):
+        return node
+
+    # Folhas não têm filhos: funções comuns evitam criar um gerador por folha
+    visit_Identifier = visit_Number = visit_String = visit_Boolean = keep
+
+class PassoDeDeclaracoes(PassoDeOtimizacao):
+    # Passos que só reescrevem declarações não descem nas expressões
+    visit_BinaryExpression = visit_LogicalExpression = visit_AssignmentExpression = \
+        visit_FunctionCall = visit_ArrayLiteral = visit_ArrayAccess = visit_PropertyAccess = \
+        PassoDeOtimizacao.keep
+
+class DobraDeConstantes(PassoDeOtimizacao):
+    # 2 * 5 vira 10, "a" + "b" vira "ab", 1 < 2 vira true; && e || com o lado
+    # esquerdo literal viram um dos dois lados
+    def visit_BinaryExpression(self, node):
+        left = node.left = yield node.left
+        right = node.right = yield node.right
+        if not (is_literal(left) and left.type == right.type):
+            return node
+        operation = FOLDABLE[left.type].get(node.value)
+        if operation is None or (node.value == '/' and right.value == 0):
+            return node
+        try:
+            value = operation(left.value, right.value)
+        except ArithmeticError:
+            return node
+        # Inteiros enormes nem cabem no str() do gerador de texto
+        if value.__class__ is int and value.bit_length() > 256:
+            return node
+        return literal(value, node.lineno, node.position)
+
+    def visit_LogicalExpression(self, node):
+        left = node.left = yield node.left
+        right = node.right = yield node.right
+        if not is_literal(left):
+            return node
+        # a && b é a se a for falso, senão b; a || b é a se a for verdadeiro
+        if bool(left.value) == (node.value == '||'):
+            return left
+        return right
+
+class PropagacaoDeConstantes(DobraDeConstantes):
+    # Troca leituras de `const x = <literal>` pelo literal e dobra o que ficar
+    # constante na mesma passada, então const b = a + 1 também propaga. Só
+    # nomes declarados uma única vez no programa, nunca atribuídos e que não
+    # sejam parâmetros nem funções, para não confundir escopos diferentes com
+    # o mesmo nome.
+    context_fields = ('candidates', 'constants')
+
+    def run(self, ast):
+        if self.context is None:
+            self.candidates = self.find_candidates(ast)
+            self.constants = {}
+        else:
+            self.candidates = self.context.candidates
+            self.constants = dict(self.context.constants)
+        self.inherited = len(self.constants)
+        return self.visit(ast)
+
+    def find_candidates(self, ast):
+        return constant_candidates([declaration_facts(ast)])
+
+    def exported(self):
+        # Cada candidato é declarado uma vez só: o que foi registrado aqui
+        # está depois das constantes herdadas
+        return dict(list(self.constants.items())[self.inherited:]), ()
+
+    def visit_VarDeclaration(self, node):
+        # O identificador declarado não é uma leitura
+        if node.init is None:
+            return node
+        init = node.init = yield node.init
+        if node.identifier.value in self.candidates and is_literal(init):
+            self.constants[node.identifier.value] = init
+        return node
+
+    def visit_Identifier(self, node):
+        value = self.constants.get(node.value)
+        if value is None:
+            return node
+        return LITERALS[value.type](value.value, node.lineno, node.position)
+
+def declaration_facts(ast):
+    # Declarações (nome, tipo) de uma árvore e os nomes que ela impede de
+    # propagar: atribuídos, parâmetros e nomes de funções
+    declarations = []
+    excluded = set()
+    stack = [ast]
+    while stack:
+        node = stack.pop()
+        type = node.type
+        if type == 'VarDeclaration':
+            declarations.append((node.children[0].value, node.kind))
+        elif type == 'AssignmentExpression':
+            target = node.children[0]
+            if target.type == 'Identifier':
+                excluded.add(target.value)
+        elif type == 'FunctionDeclaration':
+            identifier, params, _ = node.children
+            excluded.add(identifier.value)
+            excluded.update(param.value for param in params.children)
+        stack.extend(node.children)
+    return declarations, excluded
+
+def constant_candidates(facts):
+    # Junta os declaration_facts das partes do programa: nomes declarados uma
+    # única vez, como const, e não excluídos por nenhuma parte
+    kinds = {}
+    excluded = set()
+    for declarations, names in facts:
+        excluded |= names
+        for name, kind in declarations:
+            if name in kinds:
+                excluded.add(name)
+            kinds[name] = kind
+    return {name for name, kind in kinds.items() if kind == 'const' and name not in excluded}
+
+class EliminacaoDeCodigoMorto(PassoDeDeclaracoes):
+    # if/while com condição literal e declarações depois de return
+    prune_after_return = True
+
+    def visit_IfStatement(self, node):
+        test = node.test = yield node.test
+        if not is_literal(test):
+            node.consequent = yield node.consequent
+            if node.alternate is not None:
+                node.alternate = yield node.alternate
+            return node
+        branch = node.consequent if test.value else node.alternate
+        if branch is None:
+            return []
+        return (yield from self.statements(branch.children))
+
+    def visit_WhileStatement(self, node):
+        test = node.test = yield node.test
+        if is_literal(test) and not test.value:
+            return []
+        node.body = yield node.body
+        return node
+
+class MovimentoDeInvariantes(PassoDeDeclaracoes):
+    # Tira da condição de while/for as subexpressões que não mudam durante o
+    # laço (arr.length, n * 2, ...) para uma constante antes dele, já que a
+    # condição é avaliada a cada volta. Invariante: literais, variáveis que o
+    # laço não escreve, .length e operadores sobre eles; acesso a elemento
+    # não entra. Só posições que a condição sempre avalia (não o lado direito
+    # de && e ||) e só laços sem chamadas a funções do usuário, que poderiam
+    # mudar as variáveis por fora. Laços que viram range() ficam como estão.
+    context_fields = ('free_names', 'names')
+
+    def run(self, ast):
+        # Laços contados e nomes em uso só são levantados se houver laço
+        self.ast = ast
+        self.counted_loops = None
+        self.names = None
+        self.fresh = []
+        return self.visit(ast)
+
+    def exported(self):
+        return {}, tuple(self.fresh)
+
+    def visit_WhileStatement(self, node):
+        node = yield from self.generic_visit(node)
+        return self.hoist(node, node.children)
+
+    def visit_ForStatement(self, node):
+        node = yield from self.generic_visit(node)
+        return self.hoist(node, node.children)
+
+    def hoist(self, node, parts):
+        if self.counted_loops is None:
+            context = self.context
+            self.counted_loops = find_counted_loops(self.ast, context.free_names if context else ())
+            self.names = hoisting_names(self.ast)
+            if context is not None:
+                self.names |= context.names
+        if node in self.counted_loops:
+            return node
+        written = set()
+        for part in parts:
+            part_written, calls = body_effects(part)
+            if part_written is None or calls:
+                return node
+            written |= part_written
+        if node.type == 'ForStatement' and has_calls(node.init):
+            return node
+        if has_calls(node.test):
+            return node
+        hoisted = []
+        stack = [(node, 'test')]
+        while stack:
+            parent, field = stack.pop()
+            expression = getattr(parent, field)
+            if expression.type in LITERALS or expression.type == 'Identifier':
+                continue
+            if is_invariant(expression, written):
+                name = self.fresh_name(expression)
+                hoisted.append(VarDeclaration(Identifier(name, node.lineno, position=node.position), expression,
+                                              'const', node.lineno, node.position))
+                setattr(parent, field, Identifier(name, expression.lineno, position=expression.position))
+            elif expression.type == 'LogicalExpression':
+                stack.append((expression, 'left'))
+            elif expression.type in ('BinaryExpression', 'ArrayAccess', 'PropertyAccess'):
+                stack.extend((expression, child) for child in expression.fields)
+        if not hoisted:
+            return node
+        hoisted.append(node)
+        return hoisted
+
+    def fresh_name(self, expression):
+        if expression.type == 'PropertyAccess' and expression.object.type == 'Identifier':
+            base = f"_{expression.object.value}_{expression.value}"
+        else:
+            base = "_invariant"
+        name, suffix = base, 1
+        while name in self.names:
+            suffix += 1
+            name = f"{base}{suffix}"
+        self.names.add(name)
+        self.fresh.append(name)
+        return name
+
+def hoisting_names(ast):
+    # Os nomes criados por fresh_name sempre começam com _; só identificadores
+    # assim podem colidir com eles
+    names = set()
+    stack = [ast]
+    while stack:
+        node = stack.pop()
+        if node.type == 'Identifier' and node.value[:1] == '_':
+            names.add(node.value)
+        stack.extend(node.children)
+    return names
+
+def has_calls(node):
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node.type == 'FunctionCall':
+            return True
+        stack.extend(node.children)
+    return False
+
+def is_invariant(node, written):
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        type = node.type
+        if type in LITERALS:
+            continue
+        if type == 'Identifier':
+            if node.value in written:
+                return False
+        elif type in ('BinaryExpression', 'LogicalExpression') or (
+                type == 'PropertyAccess' and node.value == 'length'):
+            stack.extend(node.children)
+        else:
+            return False
+    return True
+
+PASSES_BY_LEVEL = (
+    (),
+    (DobraDeConstantes, EliminacaoDeCodigoMorto),
+    (PropagacaoDeConstantes, EliminacaoDeCodigoMorto, MovimentoDeInvariantes),
+)
+
+class Otimizador:
+    # Roda os passos do nível escolhido (0 desliga) ou uma lista própria de
+    # classes de passo, guardando o tempo de cada um em timings
+    def __init__(self, level=2, passes=None):
+        if passes is None:
+            passes = PASSES_BY_LEVEL[min(level, len(PASSES_BY_LEVEL) - 1)]
+        self.passes = list(passes)
+        self.timings = []
+
+    def optimize(self, ast, stage=no_stage):
+        # stage: gancho de etapa de transpilador.transpile, um por passo
+        if isinstance(ast, ArenaNode):
+            # A arena é somente leitura; os passos reescrevem nós tipados
+            ast = ast.arena.to_tree(ast.index)
+        for pass_class in self.passes:
+            start = time.perf_counter()
+            optimization = pass_class()
+            with stage(f'otimizacao.{pass_class.__name__}', optimization) as measured:
+                ast = measured.result = optimization.run(ast)
+            self.timings.append((pass_class.__name__, time.perf_counter() - start))
+        return ast
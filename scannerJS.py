@@ -0,0 +1,115 @@
+import re
+
+from analiseLexica import AnalisadorLexicoJS, report_illegal, reserved
+
+class Token:
+    __slots__ = ('type', 'value', 'lineno', 'lexpos')
+
+    def __init__(self, type, value, lineno, lexpos):
+        self.type = type
+        self.value = value
+        self.lineno = lineno
+        self.lexpos = lexpos
+
+    def __repr__(self):
+        return f"Token({self.type},{self.value!r},{self.lineno},{self.lexpos})"
+
+_IDENTIFIER_TAIL = re.compile(r'[a-zA-Z_0-9]*')
+_DIGITS = re.compile(r'\d+')
+_STRING = re.compile(r'"([^"\\]*(\\.[^"\\]*)*)"')
+_BLANKS = re.compile(r'[ \t]+')
+_NEWLINES = re.compile(r'\n+')
+
+_SINGLE = {
+    '+': 'PLUS', '-': 'MINUS', '*': 'TIMES', '/': 'DIVIDE',
+    '(': 'LPAREN', ')': 'RPAREN', ';': 'SEMICOLON', '=': 'ASSIGN',
+    '{': 'LBRACE', '}': 'RBRACE', ',': 'COMMA', '.': 'DOT',
+    '[': 'LBRACKET', ']': 'RBRACKET', '<': 'LT', '>': 'GT',
+}
+_DOUBLE = {'==': 'EQ', '!=': 'NEQ', '<=': 'LE', '>=': 'GE', '&&': 'AND', '||': 'OR'}
+
+# Classes de caractere usadas na tabela de despacho
+OTHER, BLANK, NEWLINE, LETTER, DIGIT, QUOTE, OPERATOR = range(7)
+
+_CLASSES = [OTHER] * 128
+for _c in ' \t':
+    _CLASSES[ord(_c)] = BLANK
+_CLASSES[ord('\n')] = NEWLINE
+for _c in 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_':
+    _CLASSES[ord(_c)] = LETTER
+for _c in '0123456789':
+    _CLASSES[ord(_c)] = DIGIT
+_CLASSES[ord('"')] = QUOTE
+for _c in set(_SINGLE) | {c for op in _DOUBLE for c in op}:
+    _CLASSES[ord(_c)] = OPERATOR
+
+
+class ScannerJS:
+    # Alternativa ao AnalisadorLexicoJS: uma passada sobre a string, despacho
+    # pela classe do primeiro caractere e palavras reservadas via dicionário.
+    tokens = AnalisadorLexicoJS.tokens
+
+    def iter_tokens(self, code, diagnostics=None):
+        classes = _CLASSES
+        make_token = Token
+        keyword = reserved.get
+        match_tail = _IDENTIFIER_TAIL.match
+        match_blanks = _BLANKS.match
+        single, double = _SINGLE, _DOUBLE
+        length = len(code)
+        lineno = 1
+        pos = 0
+        while pos < length:
+            char = code[pos]
+            code_point = ord(char)
+            kind = classes[code_point] if code_point < 128 else OTHER
+
+            if kind == BLANK:
+                pos = match_blanks(code, pos).end()
+            elif kind == NEWLINE:
+                end = _NEWLINES.match(code, pos).end()
+                lineno += end - pos
+                pos = end
+            elif kind == LETTER:
+                end = match_tail(code, pos + 1).end()
+                value = code[pos:end]
+                if (value == 'console' and code.startswith('.log', end)
+                        and match_tail(code, end + 4).end() == end + 4):
+                    yield make_token('CONSOLE_LOG', 'console.log', lineno, pos)
+                    end += 4
+                else:
+                    yield make_token(keyword(value, 'IDENTIFIER'), value, lineno, pos)
+                pos = end
+            elif kind == DIGIT:
+                end = _DIGITS.match(code, pos).end()
+                yield make_token('NUMBER', int(code[pos:end]), lineno, pos)
+                pos = end
+            elif kind == OPERATOR:
+                pair = code[pos:pos + 2]
+                if pair in double:
+                    yield make_token(double[pair], pair, lineno, pos)
+                    pos += 2
+                elif char in single:
+                    yield make_token(single[char], char, lineno, pos)
+                    pos += 1
+                else:
+                    pos += self.error(code, pos, lineno, diagnostics)
+            elif kind == QUOTE:
+                match = _STRING.match(code, pos)
+                if match:
+                    yield make_token('STRING', match.group(1), lineno, pos)
+                    pos = match.end()
+                else:
+                    pos += self.error(code, pos, lineno, diagnostics)
+            else:
+                pos += self.error(code, pos, lineno, diagnostics)
+
+    def tokenize(self, code):
+        return list(self.iter_tokens(code))
+
+    def error(self, code, pos, lineno, diagnostics):
+        # Devolve quantos caracteres pular
+        if diagnostics is None:
+            print(f"Illegal character '{code[pos]}'")
+            return 1
+        return report_illegal(diagnostics, code, pos, lineno)
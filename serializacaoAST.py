@@ -0,0 +1,421 @@
+import mmap
+import os
+import struct
+import tempfile
+
+from arenaSintatica import ArenaNode
+from arvoreSintatica import (ASTNode, FunctionCall, Leaf, ListNode, NODE_CLASSES,
+                             OperatorNode, PropertyAccess, VarDeclaration)
+from tabelaDeSimbolos import binding
+
+# Formato binário do AST, para guardar a saída do parser (ou de qualquer
+# etapa seguinte) e recomeçar dali sem analisar o JS de novo.
+#
+#   cabeçalho  MAGIC, deslocamentos da tabela, do índice e dos nós
+#   tabela     nomes dos tipos de nó e valores internados (str, int, float,
+#              bool), cada um uma vez
+#   índice     número de filhos da raiz e, para cada um, onde sua subárvore
+#              começa no fluxo de nós e a linha do nó anterior a ela
+#              (uint64 de largura fixa, para acesso direto no mmap)
+#   nós        a árvore toda em pré-ordem: a raiz e depois cada filho dela
+#
+# Cada nó do fluxo é um byte de cabeçalho (tipo nos 5 bits baixos; bits de
+# valor, linha e binding presentes) seguido de varints: índice do valor na
+# tabela, linha, (profundidade, slot) do binding e, fora as folhas, o número
+# de filhos. Sem o bit de linha, o nó está na mesma linha do anterior; com
+# ele, 0 é linha nenhuma e n a diferença zigzag n - 1 para a anterior. Para
+# nós de campos fixos (IfStatement, ForStatement...) esse número é uma
+# máscara dos campos presentes, então um campo None no meio volta no lugar
+# certo. Com a linha de partida do índice, cada filho da raiz pode ser
+# decodificado sozinho.
+MAGIC = b'JSAST\x00\x00\x01'
+HEADER = struct.Struct('<8sQQQ')
+COUNT = struct.Struct('<Q')
+ENTRY = struct.Struct('<QQ')  # deslocamento no fluxo de nós, linha anterior
+MAX_TYPES = 32
+HAS_VALUE, NEW_LINE, HAS_BINDING = 0x20, 0x40, 0x80
+TYPE_MASK = MAX_TYPES - 1
+STRING, INTEGER, FLOAT, FALSE, TRUE = range(5)
+DOUBLE = struct.Struct('<d')
+LEAF, LIST, CALL, FIXED, OPERATOR, GENERIC = range(6)
+
+def shape(type):
+    # Como os filhos de um nó do tipo são gravados e reconstruídos
+    cls = NODE_CLASSES.get(type)
+    if cls is None:
+        return GENERIC, ASTNode
+    if issubclass(cls, Leaf):
+        return LEAF, cls
+    if cls is FunctionCall:
+        return CALL, cls
+    if issubclass(cls, ListNode):
+        return LIST, cls
+    if issubclass(cls, (OperatorNode, PropertyAccess)):
+        return OPERATOR, cls
+    return FIXED, cls
+
+SHAPES = {type: shape(type) for type in NODE_CLASSES}
+
+def spread(size, mask, children):
+    # Argumentos posicionais dos campos, com None nos ausentes da máscara
+    arguments = [None] * size
+    children = iter(children)
+    for bit in range(size):
+        if mask >> bit & 1:
+            arguments[bit] = next(children)
+    return arguments
+
+def node_builder(type):
+    # Função (valor, linha, máscara, filhos) -> nó que chama direto o
+    # construtor da classe do tipo
+    mode, cls = SHAPES.get(type, (GENERIC, ASTNode))
+    if mode == LIST:
+        return lambda value, lineno, mask, children: cls(children, lineno)
+    if mode == CALL:
+        return lambda value, lineno, mask, children: cls(value, children, lineno)
+    if mode in (LEAF, GENERIC):
+        return lambda value, lineno, mask, children: ASTNode(type, value, children, lineno)
+    size = len(cls.fields)
+    full = (1 << size) - 1
+    if mode == OPERATOR:
+        def build(value, lineno, mask, children):
+            if mask == full:
+                return cls(value, *children, lineno=lineno)
+            return cls(value, *spread(size, mask, children), lineno=lineno)
+    elif cls is VarDeclaration:
+        def build(value, lineno, mask, children):
+            if mask != full:
+                children = spread(size, mask, children)
+            return cls(*children, kind=value or 'var', lineno=lineno)
+    else:
+        def build(value, lineno, mask, children):
+            if mask != full:
+                children = spread(size, mask, children)
+            return cls(*children, lineno=lineno)
+    return build
+
+def write_varint(out, number):
+    while number >= 0x80:
+        out.append(number & 0x7F | 0x80)
+        number >>= 7
+    out.append(number)
+
+def read_varint(data, position):
+    byte = data[position]
+    if byte < 0x80:
+        return byte, position + 1
+    number = byte & 0x7F
+    shift = 7
+    while True:
+        position += 1
+        byte = data[position]
+        number |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return number, position + 1
+        shift += 7
+
+def zigzag(number):
+    return number << 1 if number >= 0 else (-number << 1) - 1
+
+def unzigzag(number):
+    return number >> 1 if not number & 1 else -((number + 1) >> 1)
+
+class CodificadorAST:
+    def __init__(self):
+        self.type_names = []
+        self.type_index = {}
+        self.values = []
+        self.value_index = {}
+        self.nodes = bytearray()
+        self.entries = []
+        self.line = 0
+
+    def encode(self, ast):
+        if isinstance(ast, ArenaNode):
+            ast = ast.arena.to_tree(ast.index)
+        self.line, children = self.write_node(ast, 0)
+        for child in children:
+            self.entries.append((len(self.nodes), self.line))
+            self.write_tree(child)
+        return self.assemble()
+
+    def type_id(self, type):
+        type_id = self.type_index.get(type)
+        if type_id is None:
+            if len(self.type_names) == MAX_TYPES:
+                raise ValueError(f"Mais de {MAX_TYPES} tipos de nó num AST")
+            type_id = self.type_index[type] = len(self.type_names)
+            self.type_names.append(type)
+        return type_id
+
+    def value_id(self, value):
+        # bool e int se confundem como chave de dicionário (True == 1)
+        key = (value.__class__, value)
+        value_id = self.value_index.get(key)
+        if value_id is None:
+            value_id = self.value_index[key] = len(self.values)
+            self.values.append(value)
+        return value_id
+
+    def write_node(self, node, line):
+        # Grava um nó sem os filhos e devolve (linha para o próximo nó, filhos)
+        out = self.nodes
+        type = node.type
+        mode = SHAPES.get(type, (GENERIC,))[0]
+        value = node.value
+        if type == 'VarDeclaration' and node.kind != 'var':
+            value = node.kind
+        lineno = node.lineno
+        node_binding = getattr(node, 'binding', None) if mode == LEAF else None
+        head = self.type_id(type)
+        if value is not None:
+            head |= HAS_VALUE
+        if lineno != line:
+            head |= NEW_LINE
+        if node_binding is not None:
+            head |= HAS_BINDING
+        out.append(head)
+        if value is not None:
+            write_varint(out, self.value_id(value))
+        if lineno != line:
+            if lineno is None:
+                out.append(0)
+            else:
+                write_varint(out, zigzag(lineno - line) + 1)
+                line = lineno
+        if node_binding is not None:
+            write_varint(out, node_binding[0])
+            write_varint(out, node_binding[1])
+        if mode == LEAF:
+            return line, ()
+        if mode in (FIXED, OPERATOR):
+            children = []
+            mask = 0
+            for bit, field in enumerate(node.fields):
+                child = getattr(node, field)
+                if child is not None:
+                    mask |= 1 << bit
+                    children.append(child)
+            write_varint(out, mask)
+            return line, children
+        children = node.children
+        write_varint(out, len(children))
+        return line, children
+
+    def write_tree(self, root):
+        # Pré-ordem com pilha explícita, como o resto do pipeline
+        line = self.line
+        stack = [root]
+        while stack:
+            line, children = self.write_node(stack.pop(), line)
+            stack.extend(reversed(children))
+        self.line = line
+
+    def assemble(self):
+        table = bytearray()
+        write_varint(table, len(self.type_names))
+        for name in self.type_names:
+            encoded = name.encode()
+            write_varint(table, len(encoded))
+            table += encoded
+        write_varint(table, len(self.values))
+        for value in self.values:
+            if value.__class__ is bool:
+                table.append(TRUE if value else FALSE)
+            elif isinstance(value, int):
+                table.append(INTEGER)
+                write_varint(table, zigzag(value))
+            elif isinstance(value, float):
+                table.append(FLOAT)
+                table += DOUBLE.pack(value)
+            elif isinstance(value, str):
+                encoded = value.encode('utf-8', 'surrogatepass')
+                table.append(STRING)
+                write_varint(table, len(encoded))
+                table += encoded
+            else:
+                raise TypeError(f"Valor de nó não serializável: {value!r}")
+        index = bytearray(COUNT.pack(len(self.entries)))
+        for entry in self.entries:
+            index += ENTRY.pack(*entry)
+        table_offset = HEADER.size
+        index_offset = table_offset + len(table)
+        nodes_offset = index_offset + len(index)
+        return b''.join((HEADER.pack(MAGIC, table_offset, index_offset, nodes_offset),
+                         table, index, self.nodes))
+
+class ArvoreSerializada:
+    # Leitura de um AST serializado em bytes ou num mmap. Só a tabela é lida
+    # na abertura; cada filho da raiz é decodificado quando pedido
+    def __init__(self, data):
+        self.data = data
+        if len(data) < HEADER.size:
+            raise ValueError("AST serializado truncado")
+        magic, table_offset, self.index_offset, self.nodes_offset = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("Não é um AST serializado nesta versão do formato")
+        self.read_table(table_offset)
+        self.count, = COUNT.unpack_from(data, self.index_offset)
+        self.bindings = {}  # tuplas de binding compartilhadas entre as leituras
+
+    def read_table(self, position):
+        data = self.data
+        count, position = read_varint(data, position)
+        self.type_names = []
+        for _ in range(count):
+            size, position = read_varint(data, position)
+            self.type_names.append(bytes(data[position:position + size]).decode())
+            position += size
+        # Por tipo: classe se for folha (senão None), se o número de filhos
+        # é uma máscara de campos, e a função que monta o nó
+        self.kinds = []
+        for type in self.type_names:
+            mode, cls = SHAPES.get(type, (GENERIC, ASTNode))
+            self.kinds.append((cls if mode == LEAF else None, mode in (FIXED, OPERATOR), node_builder(type)))
+        count, position = read_varint(data, position)
+        self.values = []
+        for _ in range(count):
+            tag = data[position]
+            position += 1
+            if tag == STRING:
+                size, position = read_varint(data, position)
+                self.values.append(bytes(data[position:position + size]).decode('utf-8', 'surrogatepass'))
+                position += size
+            elif tag == INTEGER:
+                number, position = read_varint(data, position)
+                self.values.append(unzigzag(number))
+            elif tag == FLOAT:
+                self.values.append(DOUBLE.unpack_from(data, position)[0])
+                position += DOUBLE.size
+            else:
+                self.values.append(tag == TRUE)
+
+    def __len__(self):
+        return self.count
+
+    def entry(self, index):
+        # (início da subárvore do filho index da raiz, linha de partida); o
+        # fim do arquivo depois do último
+        if index >= self.count:
+            return len(self.data), None
+        offset, line = ENTRY.unpack_from(self.data, self.index_offset + COUNT.size + ENTRY.size * index)
+        return self.nodes_offset + offset, line
+
+    def statement(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        start, line = self.entry(index)
+        end, _ = self.entry(index + 1)
+        records, _ = self.read_records(bytes(self.data[start:end]), 0, 1, line)
+        return self.build(records)
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self.statement(index)
+
+    def root(self):
+        # O AST inteiro, numa leitura só do fluxo de nós
+        records, _ = self.read_records(bytes(self.data[self.nodes_offset:]), 0, 1, 0)
+        return self.build(records)
+
+    def read_records(self, data, position, pending, line):
+        # Lê registros em pré-ordem até fechar pending subárvores; o nó só
+        # é montado depois, em build
+        records = []
+        append = records.append
+        kinds = self.kinds
+        values = self.values
+        while pending:
+            head = data[position]
+            position += 1
+            value = node_binding = None
+            if head & HAS_VALUE:
+                value, position = read_varint(data, position)
+                value = values[value]
+            if head & NEW_LINE:
+                delta, position = read_varint(data, position)
+                if delta:
+                    delta -= 1
+                    line += delta >> 1 if not delta & 1 else -((delta + 1) >> 1)
+                    lineno = line
+                else:
+                    lineno = None
+            else:
+                lineno = line
+            if head & HAS_BINDING:
+                depth, position = read_varint(data, position)
+                slot, position = read_varint(data, position)
+                node_binding = binding(self.bindings, depth, slot)
+            pending -= 1
+            leaf, masked, _ = kinds[head & TYPE_MASK]
+            if leaf is not None:
+                append((head, value, lineno, node_binding, None, 0))
+                continue
+            mask, position = read_varint(data, position)
+            count = mask.bit_count() if masked else mask
+            append((head, value, lineno, node_binding, mask, count))
+            pending += count
+        return records, position
+
+    def build(self, records):
+        # De trás para frente: quando um nó aparece, os filhos já estão no
+        # topo da pilha, o primeiro por cima
+        stack = []
+        push = stack.append
+        kinds = self.kinds
+        for head, value, lineno, node_binding, mask, count in reversed(records):
+            leaf, _, build = kinds[head & TYPE_MASK]
+            if leaf is not None:
+                if node_binding is not None:
+                    push(leaf(value, lineno, node_binding))
+                else:
+                    push(leaf(value, lineno))
+                continue
+            if count:
+                children = stack[-count:]
+                del stack[-count:]
+                children.reverse()
+            else:
+                children = []
+            push(build(value, lineno, mask, children))
+        return stack[0]
+
+class ArvoreMapeada(ArvoreSerializada):
+    # Arquivo aberto com mmap: abrir custa a tabela, e statement(i) lê só os
+    # bytes daquela subárvore do disco
+    def __init__(self, path):
+        with open(path, 'rb') as input_file:
+            data = mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ)
+        super().__init__(data)
+
+    def close(self):
+        self.data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def encode(ast):
+    return CodificadorAST().encode(ast)
+
+def decode(data):
+    return ArvoreSerializada(data).root()
+
+def dump(ast, path):
+    # Escrita atômica: quem abre o arquivo com mmap nunca vê metade dele
+    data = encode(ast)
+    descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(path) or '.')
+    try:
+        with os.fdopen(descriptor, 'wb') as output:
+            output.write(data)
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.unlink(temporary)
+        raise
+    return len(data)
+
+def load(path):
+    return ArvoreMapeada(path)
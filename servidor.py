@@ -0,0 +1,251 @@
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from analiseLexica import create_lexer
+from diagnosticos import Diagnosticos
+from transpilador import options_with_defaults, transpile
+
+# Servidor de transpilação de longa duração: recebe pedidos JSON-lines num
+# socket Unix (ou na entrada padrão) e responde uma linha JSON por pedido.
+#
+#   pedido:   {"id": 1, "source": "var a = 1;", "options": {"level": 1}}
+#   resposta: {"id": 1, "python_code": "a = 1", "errors": [], "diagnostics": []}
+#             {"id": 1, "failure": "ValueError: ..."}
+#
+# diagnostics traz os erros do arquivo como em Diagnostico.as_dict; com erro
+# de sintaxe, python_code é null. Com "options": {"source_map": true} a
+# resposta traz também source_map, no formato de MapaDeFontes.as_dict.
+#
+# Os processos de trabalho são criados uma vez e aquecidos (import do ply,
+# tabelas do analisador léxico, uma transpilação pequena), então cada pedido
+# só paga as quatro etapas. As respostas saem na ordem em que ficam prontas;
+# o id liga cada uma ao seu pedido.
+#
+# Contrapressão: no máximo max_pending pedidos ficam em andamento somando
+# todas as conexões. Quando o limite é atingido o servidor para de ler
+# novas linhas, o buffer do socket enche e quem envia fica bloqueado, em vez
+# de a fila crescer sem limite na memória.
+MAX_LINE = 16 * 1024 * 1024
+WARMUP_SOURCE = 'function f(a) { return a + 1; }\nconsole.log(f(1));'
+
+_worker = None  # (analisadores léxicos por tipo, cache ou None) deste processo
+
+def init_worker(options, cache_directory=None):
+    global _worker
+    cache = None
+    if cache_directory is not None:
+        from cacheTranspilacao import CacheDeTranspilacao
+        cache = CacheDeTranspilacao(cache_directory)
+    _worker = ({options['lexer']: create_lexer(options['lexer'])}, cache)
+    transpile(WARMUP_SOURCE, _worker[0][options['lexer']], **options)
+
+def transpile_request(source, options):
+    lexers, cache = _worker
+    diagnostics = Diagnosticos(source)
+    if cache is not None:
+        result = cache.transpile(source, diagnostics, **options)
+    else:
+        tokenizer = lexers.get(options['lexer'])
+        if tokenizer is None:
+            tokenizer = lexers[options['lexer']] = create_lexer(options['lexer'])
+        result = transpile(source, tokenizer, diagnostics=diagnostics, **options)
+    source_map = result.source_map.as_dict() if result.source_map is not None else None
+    return result.python_code, result.errors, [record.as_dict() for record in diagnostics], source_map
+
+class EntradaPadrao:
+    # A parte de StreamReader que o servidor usa, sobre a entrada padrão. A
+    # leitura bloqueante roda numa thread e só acontece quando o servidor
+    # pede a próxima linha, então a contrapressão vale aqui também
+    def __init__(self, stream):
+        self.stream = stream
+
+    async def readline(self):
+        line = await asyncio.get_running_loop().run_in_executor(None, self.stream.readline, MAX_LINE + 1)
+        if len(line) > MAX_LINE:
+            raise ValueError("Linha maior que o limite")
+        return line
+
+class SaidaPadrao:
+    # A parte de StreamWriter que o servidor usa, sobre a saída padrão
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, data):
+        self.stream.write(data)
+        self.stream.flush()
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        pass
+
+    async def wait_closed(self):
+        pass
+
+class ServidorDeTranspilacao:
+    def __init__(self, workers=None, max_pending=64, cache_directory=None, **options):
+        self.options = options_with_defaults(options)
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.cache_directory = cache_directory
+        self.executor = None
+        self.pending = None
+        self.served = 0
+        self.failed = 0
+
+    def start_executor(self):
+        # Com um processo só, o trabalho roda numa thread deste mesmo processo
+        # e economiza a ida e volta pelo pipe
+        initargs = (self.options, self.cache_directory)
+        if self.workers == 1:
+            self.executor = ThreadPoolExecutor(1, initializer=init_worker, initargs=initargs)
+        else:
+            self.executor = ProcessPoolExecutor(self.workers, initializer=init_worker, initargs=initargs)
+
+    async def warm_up(self):
+        # Um pedido por processo força a criação e o initializer de todos
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, transpile_request, '', self.options)
+                               for _ in range(self.workers)))
+
+    async def open(self):
+        self.pending = asyncio.Semaphore(self.max_pending)
+        self.start_executor()
+        await self.warm_up()
+
+    def close(self, wait=True):
+        if self.executor is not None:
+            self.executor.shutdown(wait, cancel_futures=True)
+            self.executor = None
+
+    async def handle(self, line):
+        response = {'id': None}
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("O pedido deve ser um objeto")
+            response['id'] = request.get('id')
+            if not isinstance(request.get('source'), str):
+                raise ValueError("Pedido sem o campo 'source'")
+            options = request.get('options') or {}
+            if not isinstance(options, dict):
+                raise ValueError("O campo 'options' deve ser um objeto")
+            options = options_with_defaults({**self.options, **options})
+        except ValueError as error:
+            self.failed += 1
+            response['failure'] = f"{error.__class__.__name__}: {error}"
+            return response
+        loop = asyncio.get_running_loop()
+        executor = self.executor
+        try:
+            python_code, errors, diagnostics, source_map = await loop.run_in_executor(
+                executor, transpile_request, request['source'], options)
+        except BrokenProcessPool:
+            # Um processo morreu (falta de memória, sinal): refaz o pool para
+            # os próximos pedidos, uma vez só para todos os que falharam juntos
+            if self.executor is executor:
+                self.close(wait=False)
+                self.start_executor()
+            self.failed += 1
+            response['failure'] = "Processo de trabalho interrompido"
+            return response
+        except Exception as error:
+            self.failed += 1
+            response['failure'] = f"{error.__class__.__name__}: {error}"
+            return response
+        self.served += 1
+        response['python_code'] = python_code
+        response['errors'] = errors
+        response['diagnostics'] = diagnostics
+        if source_map is not None:
+            response['source_map'] = source_map
+        return response
+
+    async def serve_connection(self, reader, writer):
+        lock = asyncio.Lock()
+        tasks = set()
+
+        async def respond(line):
+            try:
+                response = await self.handle(line)
+                async with lock:
+                    writer.write(json.dumps(response).encode() + b'\n')
+                    await writer.drain()
+            except ConnectionError:
+                pass
+            finally:
+                self.pending.release()
+
+        try:
+            while True:
+                # Só lê o próximo pedido quando há vaga
+                await self.pending.acquire()
+                try:
+                    line = await reader.readline()
+                except (ValueError, ConnectionError):
+                    # Linha maior que MAX_LINE ou conexão derrubada
+                    self.pending.release()
+                    break
+                if not line.strip():
+                    self.pending.release()
+                    if not line:
+                        break
+                    continue
+                task = asyncio.create_task(respond(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def serve_unix(self, path, ready=None):
+        await self.open()
+        server = await asyncio.start_unix_server(self.serve_connection, path, limit=MAX_LINE)
+        try:
+            if ready is not None:
+                ready()
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.close()
+            if os.path.exists(path):
+                os.unlink(path)
+
+    async def serve_stdin(self, ready=None, input_stream=None, output_stream=None):
+        # A entrada padrão pode ser um arquivo comum, que o asyncio não sabe
+        # observar, então não usa connect_read_pipe
+        await self.open()
+        try:
+            if ready is not None:
+                ready()
+            await self.serve_connection(EntradaPadrao(input_stream or sys.stdin.buffer),
+                                        SaidaPadrao(output_stream or sys.stdout.buffer))
+        finally:
+            self.close()
+
+    def run(self, path=None, stream=sys.stderr):
+        start = time.perf_counter()
+
+        def ready():
+            print(f"servidor em {path or '-'} com {self.workers} processo(s), pronto em "
+                  f"{(time.perf_counter() - start) * 1e3:.0f} ms", file=stream)
+
+        try:
+            if path is None or path == '-':
+                asyncio.run(self.serve_stdin(ready))
+            else:
+                asyncio.run(self.serve_unix(path, ready))
+        except KeyboardInterrupt:
+            pass
+        print(f"{self.served} pedidos atendidos, {self.failed} com falha", file=stream)
@@ -0,0 +1,129 @@
+import sys
+
+# Tabela de símbolos com escopos encadeados. Cada escopo tem um dicionário
+# nome -> Simbolo só com o que foi declarado nele, e um escopo sai da pilha
+# assim que termina, então a memória acompanha a profundidade de aninhamento
+# atual e não o total de declarações do programa.
+#
+# Um símbolo é resolvido para (profundidade, slot): profundidade é o nível de
+# função (0 para o programa) e slot a posição dele no quadro daquela função.
+# Escopos de bloco (let/const) alocam slots no quadro da função que os
+# contém, como o Python faz. As tuplas são compartilhadas dentro de uma
+# tabela: todas as leituras da mesma variável apontam para o mesmo objeto.
+# O dicionário que as guarda vive e morre com a tabela, então processos
+# longos (servidor, modo de observação) não acumulam um por análise.
+
+def binding(bindings, depth, slot):
+    key = (depth, slot)
+    return bindings.setdefault(key, key)
+
+class Simbolo:
+    # kind: 'var', 'let', 'const', 'param', 'function' ou 'builtin'; params é
+    # a lista de parâmetros de funções (None aceita qualquer quantidade);
+    # name, o nome no Python quando não é o do JS (let/const que sombreia
+    # outra variável)
+    __slots__ = ('kind', 'binding', 'initialized', 'params', 'name')
+
+    def __init__(self, kind, binding, initialized=False, params=None):
+        self.kind = kind
+        self.binding = binding
+        self.initialized = initialized
+        self.params = params
+        self.name = None
+
+class Escopo:
+    __slots__ = ('parent', 'function', 'depth', 'names', 'size', 'pending')
+
+    def __init__(self, parent, function=False):
+        self.parent = parent
+        self.names = {}
+        self.pending = []  # funções declaradas aqui cujo corpo ainda será analisado
+        if function or parent is None:
+            self.function = self
+            self.depth = parent.depth + 1 if parent is not None else 0
+            self.size = 0
+        else:
+            self.function = parent.function
+            self.depth = parent.depth
+
+class TabelaDeSimbolos:
+    def __init__(self):
+        self.scope = Escopo(None)
+        self.bindings = {}
+
+    @property
+    def depth(self):
+        return self.scope.depth
+
+    def enter(self, function=False):
+        self.scope = Escopo(self.scope, function)
+        return self.scope
+
+    def exit(self):
+        self.scope = self.scope.parent
+
+    def declare(self, name, kind, initialized=False, params=None):
+        # var e function vão para o escopo da função; o resto fica no bloco.
+        # Devolve None se o nome já foi declarado ali de forma incompatível
+        # (só var repetido é permitido, e reaproveita o slot).
+        name = sys.intern(name)
+        scope = self.scope.function if kind in ('var', 'function') else self.scope
+        existing = scope.names.get(name)
+        if existing is not None:
+            if existing.kind == 'var' and kind == 'var':
+                return existing
+            return None
+        frame = scope.function
+        symbol = Simbolo(kind, binding(self.bindings, frame.depth, frame.size), initialized, params)
+        frame.size += 1
+        scope.names[name] = symbol
+        return symbol
+
+    def resolve(self, name):
+        scope = self.scope
+        while scope is not None:
+            symbol = scope.names.get(name)
+            if symbol is not None:
+                return symbol
+            scope = scope.parent
+        return None
+
+    def visible_names(self):
+        # Nomes no Python de tudo o que é visível no escopo atual
+        names = set()
+        scope = self.scope
+        while scope is not None:
+            for name, symbol in scope.names.items():
+                names.add(symbol.name or name)
+            scope = scope.parent
+        return names
+
+def outer_assignments(body, depth):
+    # Nomes que o corpo de uma função de profundidade `depth` atribui mas que
+    # pertencem a outra função: (globais, não locais), na ordem em que
+    # aparecem. Funções aninhadas não entram; elas declaram os seus.
+    global_names = []
+    nonlocal_names = []
+    stack = [body]
+    while stack:
+        node = stack.pop()
+        if node.type == 'FunctionDeclaration':
+            continue
+        if node.type == 'AssignmentExpression':
+            target = node.children[0]
+            target_binding = getattr(target, 'binding', None)
+            if target_binding is not None and target_binding[0] < depth:
+                names = global_names if target_binding[0] == 0 else nonlocal_names
+                if target.value not in names:
+                    names.append(target.value)
+        stack.extend(reversed(node.children))
+    return global_names, nonlocal_names
+
+def hoisted(statements):
+    # As declarações de uma lista na ordem em que o Python precisa delas: as
+    # de função primeiro, como o JS as iça (e como a análise semântica já as
+    # declara), e as outras depois, cada grupo na ordem original
+    functions = [statement for statement in statements if statement.type == 'FunctionDeclaration']
+    if not functions or len(functions) == len(statements):
+        return statements
+    return functions + [statement for statement in statements if statement.type != 'FunctionDeclaration']
@@ -0,0 +1,101 @@
+from analiseLexica import create_lexer
+from analiseLexicaEmBlocos import iter_file_tokens
+from analiseSemantica import AnalisadorSemanticoJS
+from analiseSintatica import AnalisadorSintaticoJS
+from diagnosticos import LimiteDeDiagnosticos
+from geradorDeCodigo import GeradorDeCodigoPythonFromJS
+from inferenciaDeTipos import InferenciaDeTipos
+from instrumentacao import no_stage
+from mapaDeFontes import MapaDeFontes
+from otimizador import Otimizador
+
+# Muda sempre que a saída gerada para a mesma entrada puder mudar; entra na
+# chave do cache de transpilação
+VERSION = '9'
+
+# source_map: gera também um MapaDeFontes (mapaDeFontes.py) das linhas do
+# Python para as posições no JS. types: inferência de tipos
+# (inferenciaDeTipos.py) antes da geração, que especializa o código gerado
+DEFAULT_OPTIONS = {'lexer': 'ply', 'level': 2, 'source_map': False, 'types': True}
+
+class ResultadoTranspilacao:
+    # Código Python gerado e os erros semânticos encontrados no caminho.
+    # python_code é None quando, com diagnósticos, houve erro de sintaxe ou o
+    # limite de erros foi atingido; source_map, o MapaDeFontes quando pedido
+    __slots__ = ('python_code', 'errors', 'source_map')
+
+    def __init__(self, python_code, errors, source_map=None):
+        self.python_code = python_code
+        self.errors = errors
+        self.source_map = source_map
+
+def options_with_defaults(options):
+    unknown = set(options) - set(DEFAULT_OPTIONS)
+    if unknown:
+        raise ValueError(f"Opções desconhecidas: {', '.join(sorted(unknown))}")
+    return {**DEFAULT_OPTIONS, **options}
+
+def transpile(source, tokenizer=None, *, instrumentation=None, diagnostics=None, stage=no_stage, **options):
+    # As quatro etapas sobre uma string JS. tokenizer é um analisador léxico
+    # já construído para reaproveitar entre chamadas; sem ele, um novo do
+    # tipo options['lexer']. Com uma Instrumentacao (instrumentacao.py), as
+    # etapas rodam medidas por ela; stage é o gancho em volta de cada etapa
+    # que ela usa para isso. Com um Diagnosticos (diagnosticos.py), os erros
+    # de todas as etapas vão para ele e um erro de sintaxe não interrompe a
+    # análise do resto do arquivo
+    options = options_with_defaults(options)
+    if tokenizer is None:
+        tokenizer = create_lexer(options['lexer'])
+    if instrumentation is not None:
+        return instrumentation.transpile(source, tokenizer, options, diagnostics)
+    tokens = tokenizer.iter_tokens(source, diagnostics)
+    if stage is not no_stage:
+        # Medida, a análise léxica roda inteira antes da sintática
+        with stage('lexica', tokenizer) as measured:
+            tokens = measured.result = list(tokens)
+    return transpile_tokens(tokens, diagnostics, options, source, stage)
+
+def transpile_file(path, tokenizer=None, *, diagnostics=None, **options):
+    # Como transpile, mas lendo o arquivo por mmap em blocos
+    # (analiseLexicaEmBlocos): o texto inteiro nunca fica em memória
+    options = options_with_defaults(options)
+    if tokenizer is None:
+        tokenizer = create_lexer(options['lexer'])
+    return transpile_tokens(iter_file_tokens(path, tokenizer, diagnostics=diagnostics), diagnostics, options)
+
+def transpile_tokens(tokens, diagnostics, options, source=None, stage=no_stage):
+    try:
+        parser = AnalisadorSintaticoJS(tokens, diagnostics)
+        with stage('sintatica', parser) as measured:
+            ast = measured.result = parser.parse()
+    except LimiteDeDiagnosticos:
+        return ResultadoTranspilacao(None, [])
+    if parser.syntax_errors:
+        return ResultadoTranspilacao(None, [])
+    return transpile_ast(ast, diagnostics=diagnostics, source=source, stage=stage, **options)
+
+def transpile_ast(ast, *, diagnostics=None, source=None, stage=no_stage, **options):
+    # As etapas depois do parser, sobre um AST já pronto (por exemplo, um
+    # lido de serializacaoAST). source, o texto JS, dá as colunas do mapa
+    options = options_with_defaults(options)
+    analyzer = AnalisadorSemanticoJS(ast, diagnostics)
+    try:
+        with stage('semantica', analyzer):
+            analyzer.visit(ast)
+    except LimiteDeDiagnosticos:
+        return ResultadoTranspilacao(None, analyzer.errors)
+    if analyzer.unsupported and diagnostics is not None:
+        # O erro já está nos diagnósticos; sem eles, a geração levanta
+        # NotImplementedError como antes
+        return ResultadoTranspilacao(None, analyzer.errors)
+    ast = Otimizador(options['level']).optimize(ast, stage)
+    types = None
+    if options['types']:
+        inference = InferenciaDeTipos(ast)
+        with stage('tipos', inference) as measured:
+            types = measured.result = inference.run()
+    source_map = MapaDeFontes(source) if options['source_map'] else None
+    generator = GeradorDeCodigoPythonFromJS(ast, source_map=source_map, types=types)
+    with stage('geracao', generator) as measured:
+        python_code = measured.result = generator.generate()
+    return ResultadoTranspilacao(python_code, analyzer.errors, source_map)
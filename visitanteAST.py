@@ -0,0 +1,49 @@
+from types import GeneratorType
+
+class VisitanteAST:
+    # Base dos visitantes: a tabela tipo de nó -> método visit_<tipo> é montada
+    # uma vez por classe, em vez de getattr(self, f'visit_{node.type}') por nó.
+    #
+    # A travessia usa uma pilha explícita, não a pilha do Python: um método
+    # visit_<tipo> que precisa visitar filhos é um gerador que faz
+    # `resultado = yield filho` (ou `yield (filho, *args)` para passar outros
+    # argumentos) e recebe de volta o valor do visit do filho. Métodos que não
+    # visitam filhos continuam funções comuns.
+    dispatch = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.dispatch = {
+            name[len('visit_'):]: getattr(cls, name)
+            for name in dir(cls)
+            if name.startswith('visit_')
+        }
+
+    def visit(self, node, *args):
+        dispatch = self.dispatch
+        generic = self.__class__.generic_visit
+        stack = []
+        while True:
+            result = dispatch.get(node.type, generic)(self, node, *args)
+            if result.__class__ is GeneratorType:
+                stack.append(result)
+                result = None
+            while stack:
+                try:
+                    request = stack[-1].send(result)
+                except StopIteration as stop:
+                    stack.pop()
+                    result = stop.value
+                    continue
+                if request.__class__ is tuple:
+                    node = request[0]
+                    args = request[1:]
+                else:
+                    node, args = request, ()
+                break
+            else:
+                return result
+
+    def generic_visit(self, node, *args):
+        for child in node.children:
+            yield (child, *args)